@@ -0,0 +1,7 @@
+"""
+.. module:: benchmarks
+    :synopsis: LDAP Groups Benchmarks.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
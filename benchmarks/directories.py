@@ -0,0 +1,86 @@
+"""
+.. module:: benchmarks.directories
+    :synopsis: Synthetic directories for the LDAP Groups benchmarks.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from tests.mock_directory import MockDirectory
+
+
+def _add_users(directory, group_dn, prefix, count):
+    for index in range(count):
+        directory.add_user("{prefix}-user{index}".format(prefix=prefix, index=index), member_of=[group_dn])
+
+
+def deep_nesting(depth=50, members_per_group=20):
+    """ A chain of groups, each nested in the one before it.
+
+    :returns: The directory and the dn of the outermost group.
+
+    """
+
+    directory = MockDirectory()
+    ou_dn = directory.add_ou("Deep")
+    root_dn = parent_dn = directory.add_group("deep0", ou_dn)
+    _add_users(directory, root_dn, "deep0", members_per_group)
+
+    for level in range(1, depth):
+        name = "deep{level}".format(level=level)
+        parent_dn = directory.add_group(name, ou_dn, member_of=[parent_dn])
+        _add_users(directory, parent_dn, name, members_per_group)
+
+    return directory, root_dn
+
+
+def wide_fan_out(width=200, members_per_group=20):
+    """ A group with many child groups, each with its own members.
+
+    :returns: The directory and the dn of the parent group.
+
+    """
+
+    directory = MockDirectory()
+    ou_dn = directory.add_ou("Wide")
+    root_dn = directory.add_group("wide", ou_dn)
+    _add_users(directory, root_dn, "wide", members_per_group)
+
+    for index in range(width):
+        name = "wide{index}".format(index=index)
+        child_dn = directory.add_group(name, ou_dn, member_of=[root_dn])
+        _add_users(directory, child_dn, name, members_per_group)
+
+    return directory, root_dn
+
+
+def cycle(size=20, members_per_group=20):
+    """ A ring of groups, each nested in the one before it and the first nested in the last.
+
+    :returns: The directory and the dn of the first group in the ring.
+
+    """
+
+    directory = MockDirectory()
+    ou_dn = directory.add_ou("Cycle")
+    group_dns = [directory.add_group("cycle{index}".format(index=index), ou_dn) for index in range(size)]
+
+    for index, group_dn in enumerate(group_dns):
+        directory.add_membership(group_dns[index - 1], group_dn)
+        _add_users(directory, group_dn, "cycle{index}".format(index=index), members_per_group)
+
+    return directory, group_dns[0]
+
+
+def huge_group(members=100000):
+    """ A single group with a very large member attribute.
+
+    :returns: The directory and the dn of the group.
+
+    """
+
+    directory = MockDirectory()
+    root_dn = directory.add_group("huge", directory.add_ou("Huge"))
+    _add_users(directory, root_dn, "huge", members)
+
+    return directory, root_dn
@@ -0,0 +1,141 @@
+"""
+.. module:: benchmarks.suite
+    :synopsis: LDAP Groups Benchmark Suite.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from collections import namedtuple, OrderedDict
+import time
+import tracemalloc
+
+from ldap_groups.groups import RECORDS, COLUMNS
+from ldap_groups.instrumentation import record_operations
+
+from . import directories
+
+Measurement = namedtuple("Measurement", ["scenario", "operation", "round_trips", "entries", "bytes", "seconds",
+                                         "peak_memory"])
+
+
+class Scenario:
+    """A synthetic directory and the ADGroup methods to measure against it."""
+
+    def __init__(self, name, builder, sizes, skip=()):
+        """ Create a scenario.
+
+        :param name: The scenario's name.
+        :type name: str
+        :param builder: A function from benchmarks.directories that builds the directory.
+        :type builder: callable
+        :param sizes: Keyword arguments for the builder. They are multiplied by the scale when the suite runs.
+        :type sizes: dict
+        :param skip: The names of operations that aren't run against this scenario.
+        :type skip: tuple
+
+        """
+
+        self.name = name
+        self.builder = builder
+        self.sizes = sizes
+        self.skip = skip
+
+    def build(self, scale=1.0):
+        return self.builder(**{name: max(1, int(size * scale)) for name, size in self.sizes.items()})
+
+
+OPERATIONS = OrderedDict([
+    ("get_member_info", lambda group: group.get_member_info()),
+    ("get_member_info(result_type=RECORDS)", lambda group: group.get_member_info(result_type=RECORDS)),
+    ("get_member_info(result_type=COLUMNS)", lambda group: group.get_member_info(result_type=COLUMNS)),
+    ("get_member_info(from_member_attribute)", lambda group: group.get_member_info(from_member_attribute=True)),
+    ("get_member_dns", lambda group: group.get_member_dns()),
+    ("get_children", lambda group: group.get_children()),
+    ("get_descendants", lambda group: group.get_descendants()),
+    ("get_tree_members", lambda group: group.get_tree_members()),
+    ("get_tree_members(workers=4)", lambda group: group.get_tree_members(workers=4)),
+    ("get_tree_members(result_type=RECORDS)", lambda group: group.get_tree_members(result_type=RECORDS)),
+])
+
+# The mock server evaluates every filter against every entry, so the batched distinguishedName searches of
+# from_member_attribute are far slower here than on an indexed directory. They are left out of the huge group.
+SCENARIOS = [
+    Scenario("deep_nesting", directories.deep_nesting, {'depth': 50, 'members_per_group': 20}),
+    Scenario("wide_fan_out", directories.wide_fan_out, {'width': 200, 'members_per_group': 20}),
+    Scenario("cycle", directories.cycle, {'size': 20, 'members_per_group': 20}),
+    Scenario("huge_group", directories.huge_group, {'members': 100000},
+             skip=("get_member_info(from_member_attribute)",)),
+]
+
+
+def measure(scenario_name, operation_name, operation, make_group, trace_memory=True):
+    """ Runs an operation against a fresh group and measures it.
+
+    Wall time, round trips, entries and bytes come from a first run. Peak memory comes from a second run under
+    tracemalloc, which would otherwise skew the wall time.
+
+    :returns: A Measurement.
+
+    """
+
+    group = make_group()
+
+    with record_operations() as operations:
+        start = time.perf_counter()
+        operation(group)
+        seconds = time.perf_counter() - start
+
+    round_trips = sum(recorded.round_trips for recorded in operations)
+    entries = sum(recorded.entries for recorded in operations)
+    size = sum(recorded.bytes for recorded in operations)
+    peak_memory = None
+
+    if trace_memory:
+        group = make_group()
+
+        tracemalloc.start()
+
+        try:
+            operation(group)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return Measurement(scenario_name, operation_name, round_trips, entries, size, seconds, peak_memory)
+
+
+def run(scale=1.0, scenarios=None, operations=None, trace_memory=True):
+    """ Runs the benchmark suite.
+
+    :param scale: A factor applied to every scenario's sizes. (default: 1.0)
+    :type scale: float
+    :param scenarios: The names of the scenarios to run. Default None (all scenarios).
+    :type scenarios: list
+    :param operations: The names of the operations to run. Default None (all operations).
+    :type operations: list
+    :param trace_memory: Set to False to skip measuring peak memory, which runs every operation a second time.
+    :type trace_memory: boolean
+
+    :returns: A generator of Measurements.
+
+    """
+
+    for scenario in SCENARIOS:
+        if scenarios and scenario.name not in scenarios:
+            continue
+
+        directory, root_dn = scenario.build(scale)
+        pool = directory.connection_pool(size=8)
+
+        def make_group():
+            # Lookups aren't cached between runs, so every run pays for the round trips it makes
+            return directory.group(root_dn, connection_pool=pool, cache=False)
+
+        for operation_name, operation in OPERATIONS.items():
+            if operation_name in scenario.skip or (operations and operation_name not in operations):
+                continue
+
+            yield measure(scenario.name, operation_name, operation, make_group, trace_memory)
+
+        pool.close()
@@ -0,0 +1,230 @@
+"""
+.. module:: ldap_groups.aio
+    :synopsis: LDAP Groups asyncio Group Objects.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .groups import ADGroup, BREADTH_FIRST, IN_CHAIN, DICTS, COLUMNS, _TreeWalk
+
+
+class AsyncADGroup:
+    """
+    An Active Directory group with an asyncio interface.
+
+    Every blocking ADGroup call runs on a thread pool whose size bounds the number of concurrent LDAP operations.
+    Groups returned by traversal methods share the parent's thread pool and connection pool.
+
+    """
+
+    def __init__(self, group_dn, max_concurrency=None, executor=None, **kwargs):
+        """ Create an async AD group object. Nothing is sent to the server until the group is first used.
+            Any other keyword arguments are passed on to ADGroup.
+
+        :param group_dn: The distinguished name of the active directory group to be modified.
+        :type group_dn: str
+        :param max_concurrency: The maximum number of LDAP operations run at once. Defaults to the connection pool
+                                size, so workers never wait on a connection.
+        :type max_concurrency: int
+        :param executor: An executor to run blocking calls on instead of a dedicated thread pool.
+        :type executor: concurrent.futures.Executor
+
+        """
+
+        kwargs['lazy'] = True
+        self._setup(ADGroup(group_dn, **kwargs), max_concurrency, executor)
+
+    @classmethod
+    def from_group(cls, group, max_concurrency=None, executor=None):
+        """ Wraps an existing ADGroup.
+
+        :param group: The group to wrap.
+        :type group: ldap_groups.groups.ADGroup
+
+        """
+
+        async_group = cls.__new__(cls)
+        async_group._setup(group, max_concurrency, executor)
+
+        return async_group
+
+    def _setup(self, group, max_concurrency, executor):
+        self.group = group
+        self.max_concurrency = max_concurrency if max_concurrency else group.pool_size
+        self._owns_executor = executor is None
+        self._executor = executor if executor else ThreadPoolExecutor(max_workers=self.max_concurrency)
+
+    def _wrap(self, group):
+        """Wraps a group derived from this one so that it shares this group's executor."""
+
+        # child() returns None (or an empty list) when there is no matching child
+        if not isinstance(group, ADGroup):
+            return group
+
+        return self.from_group(group, self.max_concurrency, self._executor)
+
+    def _run(self, function, *args, **kwargs):
+        """Runs a blocking call on the executor."""
+
+        return asyncio.get_event_loop().run_in_executor(self._executor, partial(function, *args, **kwargs))
+
+    def close(self):
+        """Shuts down the thread pool if this group created it."""
+
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return "<AsyncADGroup: " + str(self.group_dn.split(",", 1)[0]) + ">"
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.group == other.group
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.group)
+
+    @property
+    def group_dn(self):
+        return self.group.group_dn
+
+    ###############################################################################################################
+    #                                         Group Information Methods                                           #
+    ###############################################################################################################
+
+    async def get_attribute(self, attribute_name, no_cache=False):
+        """See ADGroup.get_attribute."""
+
+        return await self._run(self.group.get_attribute, attribute_name, no_cache)
+
+    async def get_attributes(self, no_cache=False, names=None):
+        """See ADGroup.get_attributes."""
+
+        return await self._run(self.group.get_attributes, no_cache, names)
+
+    async def get_member_dns(self, range_size=None):
+        """See ADGroup.get_member_dns."""
+
+        return await self._run(self.group.get_member_dns, range_size)
+
+    async def get_member_info(self, page_size=500, from_member_attribute=False, result_type=DICTS, member_filter=None,
+                              attr_list=None):
+        """See ADGroup.get_member_info."""
+
+        return await self._run(self.group.get_member_info, page_size, from_member_attribute, result_type,
+                               member_filter, attr_list)
+
+    async def get_member_page(self, offset=0, limit=50, sort_by='displayName', reverse=False, page_size=500,
+                              attr_list=None):
+        """See ADGroup.get_member_page."""
+
+        return await self._run(self.group.get_member_page, offset, limit, sort_by, reverse, page_size, attr_list)
+
+    async def get_user_groups(self, user_lookup_attribute_value, nested=True):
+        """See ADGroup.get_user_groups."""
+
+        return await self._run(self.group.get_user_groups, user_lookup_attribute_value, nested)
+
+    async def get_nested_member_info(self, page_size=500, result_type=DICTS, member_filter=None, attr_list=None):
+        """See ADGroup.get_nested_member_info."""
+
+        return await self._run(self.group.get_nested_member_info, page_size, result_type, member_filter, attr_list)
+
+    async def get_tree_members(self, strategy=BREADTH_FIRST, page_size=500, result_type=DICTS, member_filter=None,
+                               attr_list=None):
+        """ Retrieves all members from this node of the tree down. Every group on a level of the tree is expanded
+            concurrently, up to max_concurrency at a time. See ADGroup.get_tree_members.
+
+        """
+
+        if strategy not in (BREADTH_FIRST, IN_CHAIN):
+            raise ValueError("Unknown tree member strategy: {strategy}".format(strategy=strategy))
+
+        members = []
+        walk = _TreeWalk()
+        level = walk.unvisited([self.group])
+
+        while level:
+            expansions = await asyncio.gather(*[
+                self._run(node._expand_tree_node, strategy, page_size, member_filter, attr_list) for node in level
+            ])
+            children = []
+
+            for node_members, node_children in expansions:
+                members.extend(walk.new_members(node_members))
+                children.extend(node_children)
+
+            level = walk.unvisited(children)
+
+        members = self.group._convert_members(members, result_type, tree=True, attr_list=attr_list)
+        return members if result_type == COLUMNS else list(members)
+
+    ###############################################################################################################
+    #                                         Group Modification Methods                                          #
+    ###############################################################################################################
+
+    async def add_member(self, user_lookup_attribute_value):
+        """See ADGroup.add_member."""
+
+        await self._run(self.group.add_member, user_lookup_attribute_value)
+
+    async def remove_member(self, user_lookup_attribute_value):
+        """See ADGroup.remove_member."""
+
+        await self._run(self.group.remove_member, user_lookup_attribute_value)
+
+    async def add_child(self, group_lookup_attribute_value):
+        """See ADGroup.add_child."""
+
+        await self._run(self.group.add_child, group_lookup_attribute_value)
+
+    async def remove_child(self, group_lookup_attribute_value):
+        """See ADGroup.remove_child."""
+
+        await self._run(self.group.remove_child, group_lookup_attribute_value)
+
+    ###################################################################################################################
+    #                                         Group Traversal Methods                                                 #
+    ###################################################################################################################
+
+    async def get_descendants(self, page_size=500):
+        """See ADGroup.get_descendants."""
+
+        descendants = await self._run(self.group.get_descendants, page_size)
+
+        return [self._wrap(descendant) for descendant in descendants]
+
+    async def get_children(self, page_size=500):
+        """See ADGroup.get_children."""
+
+        children = await self._run(self.group.get_children, page_size)
+
+        return [self._wrap(child) for child in children]
+
+    async def child(self, group_name, page_size=500):
+        """See ADGroup.child."""
+
+        return self._wrap(await self._run(self.group.child, group_name, page_size))
+
+    async def parent(self):
+        """See ADGroup.parent."""
+
+        return self._wrap(await self._run(self.group.parent))
+
+    async def ancestor(self, generation):
+        """See ADGroup.ancestor."""
+
+        return self._wrap(await self._run(self.group.ancestor, generation))
@@ -0,0 +1,45 @@
+"""
+.. module:: ldap_groups.apps
+    :synopsis: LDAP Groups Django App Configuration.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+import logging
+
+from django.apps import AppConfig
+from django.conf import settings
+
+from .registry import get_registry, DEFAULT_REFRESH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class LDAPGroupsConfig(AppConfig):
+    name = 'ldap_groups'
+    verbose_name = "LDAP Groups"
+
+    def ready(self):
+        """ Warms the groups in LDAP_GROUPS_WARM_GROUPS and starts refreshing them every
+            LDAP_GROUPS_REFRESH_INTERVAL seconds. A group that can't be warmed is logged rather than stopping the
+            project from starting; it is validated on first use instead.
+
+        """
+
+        group_dns = getattr(settings, 'LDAP_GROUPS_WARM_GROUPS', [])
+        refresh_interval = getattr(settings, 'LDAP_GROUPS_REFRESH_INTERVAL', DEFAULT_REFRESH_INTERVAL)
+
+        if not group_dns:
+            return
+
+        registry = get_registry()
+
+        for group_dn in group_dns:
+            try:
+                registry.warm([group_dn])
+            except Exception:
+                logger.exception("Unable to warm LDAP group {group_dn}.".format(group_dn=group_dn))
+
+        if refresh_interval:
+            registry.start_refresh(refresh_interval)
@@ -0,0 +1,250 @@
+"""
+.. module:: ldap_groups.cache
+    :synopsis: LDAP Groups Lookup Caching.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+
+from .exceptions import ImproperlyConfigured
+
+# Cache namespaces
+USER_DN = "user_dn"
+GROUP_DN = "group_dn"
+ATTRIBUTES = "attributes"
+OBJECT_CLASS = "object_class"
+USER_GROUPS = "user_groups"
+GROUP_SID = "group_sid"
+MEMBER_PAGES = "member_pages"
+
+DEFAULT_CACHE_MAX_SIZE = 10000
+DEFAULT_CACHE_TIMEOUT = 300
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    A bounded, thread-safe in-memory cache. Entries expire after the timeout, and the least recently used entries are
+    evicted once the cache is full.
+
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_MAX_SIZE, timeout=DEFAULT_CACHE_TIMEOUT):
+        self.max_size = max_size
+        self.timeout = timeout
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+
+            if entry is _MISSING:
+                return default
+
+            value, expires = entry
+
+            if expires < time.time():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.timeout)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear_namespace(self, namespace):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == namespace]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoCache:
+    """
+    A cache backed by the Django cache framework, so entries are shared between processes.
+
+    Keys are hashed to suit backends like memcached. Namespaces are cleared by bumping a generation number that is
+    part of every key in the namespace.
+
+    """
+
+    def __init__(self, alias="default", timeout=DEFAULT_CACHE_TIMEOUT):
+        try:
+            from django.core.cache import caches
+        except ImportError:
+            raise ImproperlyConfigured("The django cache backend requires Django.")
+
+        self.alias = alias
+        self.timeout = timeout
+        self._cache = caches[alias]
+
+    def _generation(self, namespace):
+        generation_key = "ldap_groups:generation:" + namespace
+        generation = self._cache.get(generation_key)
+
+        if generation is None:
+            # Start from the current time so an evicted generation doesn't bring back stale entries
+            generation = int(time.time() * 1000)
+            self._cache.add(generation_key, generation, None)
+            generation = self._cache.get(generation_key, generation)
+
+        return generation
+
+    def _make_key(self, key):
+        digest = hashlib.sha1(repr(key[1:]).encode("utf-8")).hexdigest()
+
+        return "ldap_groups:{namespace}:{generation}:{digest}".format(
+            namespace=key[0], generation=self._generation(key[0]), digest=digest
+        )
+
+    def get(self, key, default=None):
+        return self._cache.get(self._make_key(key), default)
+
+    def set(self, key, value):
+        self._cache.set(self._make_key(key), value, self.timeout)
+
+    def delete(self, key):
+        self._cache.delete(self._make_key(key))
+
+    def clear_namespace(self, namespace):
+        generation_key = "ldap_groups:generation:" + namespace
+        self._generation(namespace)
+
+        try:
+            self._cache.incr(generation_key)
+        except ValueError:
+            self._cache.set(generation_key, int(time.time() * 1000), None)
+
+
+class DirectoryCache:
+    """
+    Caches directory lookups by namespace on top of a backend and counts hits and misses per namespace.
+
+    Keys are tuples that start with the namespace, e.g. (USER_DN, server_uri, lookup_value).
+
+    """
+
+    def __init__(self, backend=None):
+        """ Create a directory cache.
+
+        :param backend: An object with get, set, delete and clear_namespace methods. Defaults to an LRUCache.
+        :type backend: LRUCache
+
+        """
+
+        self.backend = backend if backend is not None else LRUCache()
+        self.hits = {}
+        self.misses = {}
+
+        self._lock = threading.Lock()
+
+    def _count(self, counter, namespace):
+        with self._lock:
+            counter[namespace] = counter.get(namespace, 0) + 1
+
+    def get(self, key, default=None):
+        value = self.backend.get(key, _MISSING)
+
+        if value is _MISSING:
+            self._count(self.misses, key[0])
+            return default
+
+        self._count(self.hits, key[0])
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    def invalidate(self, key):
+        self.backend.delete(key)
+
+    def clear(self, namespace):
+        self.backend.clear_namespace(namespace)
+
+    def stats(self):
+        """Returns a dictionary of hit and miss counts for each namespace."""
+
+        with self._lock:
+            return {
+                namespace: {'hits': self.hits.get(namespace, 0), 'misses': self.misses.get(namespace, 0)}
+                for namespace in set(self.hits) | set(self.misses)
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """ Returns the process-wide directory cache, creating it from Django settings the first time.
+
+    LDAP_GROUPS_CACHE_BACKEND may be 'memory' (the default), 'django' or None to disable caching. The timeout and
+    size come from LDAP_GROUPS_CACHE_TIMEOUT and LDAP_GROUPS_CACHE_MAX_SIZE, and LDAP_GROUPS_CACHE_ALIAS picks the
+    Django cache to use.
+
+    :returns: A DirectoryCache, or None if caching is disabled.
+
+    """
+
+    global _default_cache
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            try:
+                from django.conf import settings
+            except ImportError:
+                backend_name = 'memory'
+                timeout = DEFAULT_CACHE_TIMEOUT
+                max_size = DEFAULT_CACHE_MAX_SIZE
+                alias = 'default'
+            else:
+                backend_name = getattr(settings, 'LDAP_GROUPS_CACHE_BACKEND', 'memory')
+                timeout = getattr(settings, 'LDAP_GROUPS_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT)
+                max_size = getattr(settings, 'LDAP_GROUPS_CACHE_MAX_SIZE', DEFAULT_CACHE_MAX_SIZE)
+                alias = getattr(settings, 'LDAP_GROUPS_CACHE_ALIAS', 'default')
+
+            if not backend_name:
+                _default_cache = False
+            elif backend_name == 'memory':
+                _default_cache = DirectoryCache(LRUCache(max_size=max_size, timeout=timeout))
+            elif backend_name == 'django':
+                _default_cache = DirectoryCache(DjangoCache(alias=alias, timeout=timeout))
+            else:
+                raise ImproperlyConfigured("Unknown LDAP_GROUPS_CACHE_BACKEND: {backend}".format(
+                    backend=backend_name
+                ))
+
+        return _default_cache if _default_cache else None
+
+
+def reset_default_cache():
+    """Forgets the process-wide directory cache, so it is rebuilt from settings on next use."""
+
+    global _default_cache
+
+    with _default_cache_lock:
+        _default_cache = None
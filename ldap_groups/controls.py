@@ -0,0 +1,177 @@
+"""
+.. module:: ldap_groups.controls
+    :synopsis: LDAP Groups Server Side Sort and Virtual List View Controls.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from pyasn1.codec.ber import decoder
+from pyasn1.type.namedtype import NamedTypes, NamedType, OptionalNamedType, DefaultedNamedType
+from pyasn1.type.tag import Tag, tagClassContext, tagFormatSimple, tagFormatConstructed
+from pyasn1.type.univ import Sequence, SequenceOf, Choice, OctetString, Integer, Boolean, Enumerated
+
+from ldap3.protocol.controls import build_control
+
+# Server side sort (RFC 2891)
+SERVER_SIDE_SORT_CONTROL = '1.2.840.113556.1.4.473'
+SERVER_SIDE_SORT_RESPONSE_CONTROL = '1.2.840.113556.1.4.474'
+
+# Virtual list view (draft-ietf-ldapext-ldapv3-vlv)
+VLV_REQUEST_CONTROL = '2.16.840.1.113730.3.4.9'
+VLV_RESPONSE_CONTROL = '2.16.840.1.113730.3.4.10'
+
+
+class SortKey(Sequence):
+    # SortKey ::= SEQUENCE {
+    #     attributeType   AttributeDescription,
+    #     orderingRule    [0] MatchingRuleId OPTIONAL,
+    #     reverseOrder    [1] BOOLEAN DEFAULT FALSE }
+
+    componentType = NamedTypes(
+        NamedType('attributeType', OctetString()),
+        OptionalNamedType('orderingRule',
+                          OctetString().subtype(implicitTag=Tag(tagClassContext, tagFormatSimple, 0))),
+        DefaultedNamedType('reverseOrder',
+                           Boolean(False).subtype(implicitTag=Tag(tagClassContext, tagFormatSimple, 1)))
+    )
+
+
+class SortKeyList(SequenceOf):
+    # SortKeyList ::= SEQUENCE OF SortKey
+
+    componentType = SortKey()
+
+
+class ByOffset(Sequence):
+    # byOffset [0] SEQUENCE {
+    #     offset          INTEGER (0 .. maxInt),
+    #     contentCount    INTEGER (0 .. maxInt) }
+
+    tagSet = Sequence.tagSet.tagImplicitly(Tag(tagClassContext, tagFormatConstructed, 0))
+    componentType = NamedTypes(
+        NamedType('offset', Integer()),
+        NamedType('contentCount', Integer())
+    )
+
+
+class Target(Choice):
+    # target CHOICE {
+    #     byOffset            [0] SEQUENCE { ... },
+    #     greaterThanOrEqual  [1] AssertionValue }
+
+    componentType = NamedTypes(
+        NamedType('byOffset', ByOffset()),
+        NamedType('greaterThanOrEqual', OctetString().subtype(implicitTag=Tag(tagClassContext, tagFormatSimple, 1)))
+    )
+
+
+class VirtualListViewRequest(Sequence):
+    # VirtualListViewRequest ::= SEQUENCE {
+    #     beforeCount    INTEGER (0..maxInt),
+    #     afterCount     INTEGER (0..maxInt),
+    #     target         CHOICE { ... },
+    #     contextID      OCTET STRING OPTIONAL }
+
+    componentType = NamedTypes(
+        NamedType('beforeCount', Integer()),
+        NamedType('afterCount', Integer()),
+        NamedType('target', Target()),
+        OptionalNamedType('contextID', OctetString())
+    )
+
+
+class VirtualListViewResponse(Sequence):
+    # VirtualListViewResponse ::= SEQUENCE {
+    #     targetPosition         INTEGER (0 .. maxInt),
+    #     contentCount           INTEGER (0 .. maxInt),
+    #     virtualListViewResult  ENUMERATED { ... },
+    #     contextID              OCTET STRING OPTIONAL }
+
+    componentType = NamedTypes(
+        NamedType('targetPosition', Integer()),
+        NamedType('contentCount', Integer()),
+        NamedType('virtualListViewResult', Enumerated()),
+        OptionalNamedType('contextID', OctetString())
+    )
+
+
+def server_side_sort_control(attribute, reverse=False, criticality=True):
+    """ Builds a control that asks the server to sort the results of a search by an attribute.
+
+    :param attribute: The attribute to sort by.
+    :type attribute: str
+    :param reverse (optional): Set to True to sort in descending order. (default: False)
+    :type reverse: bool
+    :param criticality (optional): Whether the server must fail the search if it can't sort. (default: True)
+    :type criticality: bool
+
+    """
+
+    sort_key = SortKey()
+    sort_key.setComponentByName('attributeType', attribute)
+
+    if reverse:
+        sort_key.setComponentByName('reverseOrder', True)
+
+    sort_key_list = SortKeyList()
+    sort_key_list.setComponentByPosition(0, sort_key)
+
+    return build_control(SERVER_SIDE_SORT_CONTROL, criticality, sort_key_list)
+
+
+def vlv_request_control(offset, before_count, after_count, content_count=0, context_id=None, criticality=True):
+    """ Builds a control that asks the server for a window of a sorted search's results. Must be sent along with a
+        server side sort control.
+
+    :param offset: The position of the target entry, starting at 1.
+    :type offset: int
+    :param before_count: The number of entries to return before the target.
+    :type before_count: int
+    :param after_count: The number of entries to return after the target.
+    :type after_count: int
+    :param content_count (optional): The client's estimate of the number of results, or 0 to make offset an
+                                     absolute position. (default: 0)
+    :type content_count: int
+    :param context_id (optional): The context id the server returned for the previous window, if any.
+    :type context_id: bytes
+    :param criticality (optional): Whether the server must fail the search if it doesn't support virtual list
+                                   views. (default: True)
+    :type criticality: bool
+
+    """
+
+    by_offset = ByOffset()
+    by_offset.setComponentByName('offset', offset)
+    by_offset.setComponentByName('contentCount', content_count)
+
+    target = Target()
+    target.setComponentByName('byOffset', by_offset)
+
+    request = VirtualListViewRequest()
+    request.setComponentByName('beforeCount', before_count)
+    request.setComponentByName('afterCount', after_count)
+    request.setComponentByName('target', target)
+
+    if context_id:
+        request.setComponentByName('contextID', context_id)
+
+    return build_control(VLV_REQUEST_CONTROL, criticality, request)
+
+
+def decode_vlv_response(value):
+    """ Decodes the value of a virtual list view response control, which ldap3 returns undecoded.
+
+    :returns: A dictionary with the target_position, content_count, result and context_id.
+
+    """
+
+    response, _unprocessed = decoder.decode(value, asn1Spec=VirtualListViewResponse())
+    context_id = response.getComponentByName('contextID')
+
+    return {
+        'target_position': int(response['targetPosition']),
+        'content_count': int(response['contentCount']),
+        'result': int(response['virtualListViewResult']),
+        'context_id': bytes(context_id) if context_id.isValue else None,
+    }
@@ -55,3 +55,13 @@ class EntryAlreadyExists(ModificationFailed):
 class InsufficientPermissions(ModificationFailed):
     """The bind user does not have permission to modify a group."""
     pass
+
+
+class ConnectionPoolExhausted(Exception):
+    """No pooled LDAP connection became available in time."""
+    pass
+
+
+class EntryNotInGroup(ModificationFailed):
+    """The account or group provided is not in the group being modified."""
+    pass
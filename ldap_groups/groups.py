@@ -7,22 +7,103 @@
 """
 
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import copy
 import logging
+import re
+import threading
+
+from ldap3 import BASE, SUBTREE, MODIFY_DELETE, MODIFY_ADD, ALL_ATTRIBUTES, NO_ATTRIBUTES, LEVEL
+from ldap3.core.exceptions import (LDAPException, LDAPExceptionError, LDAPOperationResult, LDAPOperationsErrorResult,
+                                   LDAPInvalidDNSyntaxResult, LDAPNoSuchObjectResult, LDAPSizeLimitExceededResult,
+                                   LDAPEntryAlreadyExistsResult, LDAPInsufficientAccessRightsResult,
+                                   LDAPInvalidFilterError, LDAPNoSuchAttributeResult, LDAPUnwillingToPerformResult)
+from ldap3.protocol.formatters.formatters import format_sid
+from ldap3.utils.ciDict import CaseInsensitiveDict
+from ldap3.utils.conv import escape_bytes
+
+from .cache import (get_default_cache, USER_DN, GROUP_DN, ATTRIBUTES, OBJECT_CLASS, USER_GROUPS, GROUP_SID,
+                    MEMBER_PAGES)
+from .controls import server_side_sort_control, vlv_request_control, decode_vlv_response, VLV_RESPONSE_CONTROL
+from .exceptions import (AccountDoesNotExist, GroupDoesNotExist, InvalidGroupDN, ImproperlyConfigured,
+                         ModificationFailed, EntryAlreadyExists, EntryNotInGroup, InsufficientPermissions,
+                         LDAPServerUnreachable)
+from .instrumentation import track, SEARCH, PAGED_SEARCH, MODIFY
+from .pool import get_pool, DEFAULT_POOL_SIZE, DEFAULT_IDLE_TIMEOUT, DEFAULT_SERVER_STRATEGY
+from .retry import RetryPolicy, NO_RETRY, DEFAULT_MAX_ATTEMPTS, DEFAULT_BACKOFF
+from .results import (BatchModificationResult, DNResolution, MembershipReconciliation, MemberColumns, MemberPage,
+                      member_record_class, _unwrap)
+from .utils import escape_query, chunked, build_filter
 
-from ldap3 import (Server, Connection, BASE, SUBTREE, MODIFY_DELETE,
-                   MODIFY_ADD, ALL_ATTRIBUTES, NO_ATTRIBUTES, LEVEL)
-from ldap3.core.exceptions import (LDAPException, LDAPExceptionError, LDAPInvalidServerError,
-                                   LDAPInvalidCredentialsResult, LDAPOperationsErrorResult, LDAPInvalidDNSyntaxResult,
-                                   LDAPNoSuchObjectResult, LDAPSizeLimitExceededResult, LDAPEntryAlreadyExistsResult,
-                                   LDAPInsufficientAccessRightsResult, LDAPInvalidFilterError)
+logger = logging.getLogger(__name__)
 
-from .exceptions import (AccountDoesNotExist, GroupDoesNotExist, InvalidGroupDN, ImproperlyConfigured,
-                         InvalidCredentials, LDAPServerUnreachable, ModificationFailed, EntryAlreadyExists,
-                         InsufficientPermissions)
+# The simple paged results control (RFC 2696)
+PAGED_RESULTS_CONTROL = '1.2.840.113556.1.4.319'
 
-from .utils import escape_query
+# Batch operation sizes
+DEFAULT_LOOKUP_CHUNK_SIZE = 100
+DEFAULT_MODIFY_CHUNK_SIZE = 500
 
-logger = logging.getLogger(__name__)
+# Attributes fetched along with the group's dn so that finding its type costs no extra search
+DEFAULT_PREFETCH_ATTRIBUTES = ['objectClass']
+
+# Attributes in Active Directory's default Global Catalog partial attribute set that lookups commonly use
+GLOBAL_CATALOG_ATTRIBUTES = ['cn', 'displayName', 'distinguishedName', 'givenName', 'groupType', 'mail', 'manager',
+                             'member', 'memberOf', 'name', 'objectCategory', 'objectClass', 'objectGUID', 'objectSid',
+                             'proxyAddresses', 'sAMAccountName', 'sAMAccountType', 'sn', 'telephoneNumber',
+                             'userAccountControl', 'userPrincipalName']
+
+# Extra member filter clauses
+ENABLED_ACCOUNTS = "(!(userAccountControl:1.2.840.113556.1.4.803:=2))"
+
+# The attribute names in a raw filter string, e.g. userAccountControl in (userAccountControl:1.2.840.113556.1.4.803:=2)
+FILTER_ATTRIBUTE = re.compile(r"\(([\w-]+)(?::[\w.]*)*[~<>]?=")
+
+# Tree member strategies
+BREADTH_FIRST = "breadth_first"
+IN_CHAIN = "in_chain"
+
+# Member result types
+DICTS = "dicts"
+RECORDS = "records"
+COLUMNS = "columns"
+
+
+class _TreeWalk:
+    """
+    The bookkeeping shared by every walk of the tree: each node is only expanded once, so groups nested in each
+    other don't loop forever, and each member is only returned once, however many groups it is reached through.
+
+    """
+
+    def __init__(self):
+        self._visited = set()
+        self._member_dns = set()
+
+    def visit(self, node):
+        """Returns True the first time a node is visited, and False after that."""
+
+        if node in self._visited:
+            return False
+
+        self._visited.add(node)
+        return True
+
+    def unvisited(self, nodes):
+        """Visits nodes and returns the ones that hadn't been visited yet, such as the next level of the tree."""
+
+        return [node for node in nodes if self.visit(node)]
+
+    def new_members(self, members):
+        """Yields the member search results that haven't been seen yet and have attributes."""
+
+        for member in members:
+            if member["dn"] not in self._member_dns:
+                self._member_dns.add(member["dn"])
+
+                if member["attributes"]:
+                    yield member
 
 
 class ADGroup:
@@ -36,7 +117,10 @@ class ADGroup:
 
     def __init__(self, group_dn, server_uri=None, base_dn=None, user_lookup_attr=None, group_lookup_attr=None,
                  attr_list=None, bind_dn=None, bind_password=None, user_search_base_dn=None,
-                 group_search_base_dn=None):
+                 group_search_base_dn=None, pool_size=None, pool_idle_timeout=None, connection_pool=None,
+                 lazy=False, cache=None, prefetch_attributes=None, retry_policy=None, server_strategy=None,
+                 write_server_uri=None, global_catalog_uri=None, global_catalog_base_dn=None,
+                 global_catalog_pool=None):
         """ Create an AD group object and establish an ldap search connection.
             Any arguments other than group_dn are pulled from django settings
             if they aren't passed in.
@@ -44,8 +128,9 @@ class ADGroup:
         :param group_dn: The distinguished name of the active directory group to be modified.
         :type group_dn: str
 
-        :param server_uri: (Required) The ldap server uri. Pulled from Django settings if None.
-        :type server_uri: str
+        :param server_uri: (Required) The ldap server uri, or a list of uris to spread connections across several
+                           domain controllers. Pulled from Django settings if None.
+        :type server_uri: str or list
         :param base_dn: (Required) The ldap base dn. Pulled from Django settings if None.
         :type base_dn: str
         :param user_lookup_attr: The attribute used in user searches. Default is 'sAMAccountName'.
@@ -63,6 +148,46 @@ class ADGroup:
         :param group_search_base_dn: The base dn to use when performing a group search. Defaults to base_dn.
                                      urrently unused.
         :type group_search_base_dn: str
+        :param pool_size: The maximum number of pooled connections to the server. Default is 10.
+        :type pool_size: int
+        :param pool_idle_timeout: The number of seconds an idle pooled connection is kept open. Default is 300.
+        :type pool_idle_timeout: int
+        :param connection_pool: A connection pool to use instead of the shared pool for this server and bind dn.
+                                Any object with a connection() context manager that yields a bound ldap3
+                                Connection will do.
+        :type connection_pool: ldap_groups.pool.ConnectionPool
+        :param lazy: Set to True to defer connecting to the server and validating group_dn until the group is first
+                     used. An invalid dn then raises InvalidGroupDN from the first method that needs the server.
+                     Default False.
+        :type lazy: boolean
+        :param cache: A DirectoryCache to use instead of the process-wide cache configured by the
+                      LDAP_GROUPS_CACHE_* settings, or False to disable caching of lookups and attributes.
+        :type cache: ldap_groups.cache.DirectoryCache
+        :param prefetch_attributes: Attributes of this group to fetch while validating it, and of derived groups
+                                    while finding them. Default ['objectClass'].
+        :type prefetch_attributes: list
+        :param retry_policy: How operations that fail with transient errors, such as a dropped connection, are
+                             retried, or False to disable retries. Default is 3 attempts with exponential backoff.
+        :type retry_policy: ldap_groups.retry.RetryPolicy
+        :param server_strategy: How a server is chosen for each connection when server_uri is a list. One of
+                                ROUND_ROBIN, LEAST_LATENCY or FIRST_AVAILABLE from ldap_groups.pool. Default is
+                                ROUND_ROBIN.
+        :type server_strategy: str
+        :param write_server_uri: The server that group modifications are sent to when server_uri is a list.
+                                 Searches are then spread across the other servers. By default writes are spread like
+                                 searches.
+        :type write_server_uri: str
+        :param global_catalog_uri: A Global Catalog uri (port 3268, or 3269 for SSL), or a list of them. Lookups of
+                                   users and groups, member searches and descendant listings are sent to the Global
+                                   Catalog when the attributes they filter on and return are replicated to it.
+                                   Default None.
+        :type global_catalog_uri: str or list
+        :param global_catalog_base_dn: The base dn of searches sent to the Global Catalog, e.g. the forest root.
+                                       Defaults to base_dn.
+        :type global_catalog_base_dn: str
+        :param global_catalog_pool: A connection pool to use for Global Catalog searches instead of the shared pool
+                                    for global_catalog_uri.
+        :type global_catalog_pool: ldap_groups.pool.ConnectionPool
 
         """
 
@@ -85,6 +210,17 @@ class ADGroup:
             self.bind_password = bind_password
             self.user_search_base_dn = user_search_base_dn if user_search_base_dn else self.base_dn
             self.group_search_base_dn = group_search_base_dn if group_search_base_dn else self.base_dn
+            self.pool_size = pool_size if pool_size else DEFAULT_POOL_SIZE
+            self.pool_idle_timeout = pool_idle_timeout if pool_idle_timeout else DEFAULT_IDLE_TIMEOUT
+            self.prefetch_attributes = (
+                prefetch_attributes if prefetch_attributes is not None else DEFAULT_PREFETCH_ATTRIBUTES
+            )
+            self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+            self.server_strategy = server_strategy if server_strategy else DEFAULT_SERVER_STRATEGY
+            self.write_server_uri = write_server_uri
+            self.global_catalog_uri = global_catalog_uri
+            self.global_catalog_base_dn = global_catalog_base_dn if global_catalog_base_dn else self.base_dn
+            self.global_catalog_attributes = GLOBAL_CATALOG_ATTRIBUTES
         else:
             if not server_uri:
                 if hasattr(settings, 'LDAP_GROUPS_SERVER_URI'):
@@ -129,12 +265,92 @@ class ADGroup:
                 getattr(settings, 'LDAP_GROUPS_GROUP_SEARCH_BASE_DN', self.base_dn)
                 if not group_search_base_dn else group_search_base_dn
             )
+            self.pool_size = (
+                getattr(settings, 'LDAP_GROUPS_POOL_SIZE', DEFAULT_POOL_SIZE)
+                if not pool_size else pool_size
+            )
+            self.pool_idle_timeout = (
+                getattr(settings, 'LDAP_GROUPS_POOL_IDLE_TIMEOUT', DEFAULT_IDLE_TIMEOUT)
+                if not pool_idle_timeout else pool_idle_timeout
+            )
+            self.prefetch_attributes = (
+                getattr(settings, 'LDAP_GROUPS_PREFETCH_ATTRIBUTES', DEFAULT_PREFETCH_ATTRIBUTES)
+                if prefetch_attributes is None else prefetch_attributes
+            )
+            self.retry_policy = RetryPolicy(
+                max_attempts=getattr(settings, 'LDAP_GROUPS_RETRY_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS),
+                backoff=getattr(settings, 'LDAP_GROUPS_RETRY_BACKOFF', DEFAULT_BACKOFF)
+            ) if retry_policy is None else retry_policy
+            self.server_strategy = (
+                getattr(settings, 'LDAP_GROUPS_SERVER_STRATEGY', DEFAULT_SERVER_STRATEGY)
+                if not server_strategy else server_strategy
+            )
+            self.write_server_uri = (
+                getattr(settings, 'LDAP_GROUPS_WRITE_SERVER_URI', None)
+                if not write_server_uri else write_server_uri
+            )
+            self.global_catalog_uri = (
+                getattr(settings, 'LDAP_GROUPS_GLOBAL_CATALOG_URI', None)
+                if not global_catalog_uri else global_catalog_uri
+            )
+            self.global_catalog_base_dn = (
+                getattr(settings, 'LDAP_GROUPS_GLOBAL_CATALOG_BASE_DN', self.base_dn)
+                if not global_catalog_base_dn else global_catalog_base_dn
+            )
+            self.global_catalog_attributes = getattr(settings, 'LDAP_GROUPS_GLOBAL_CATALOG_ATTRIBUTES',
+                                                     GLOBAL_CATALOG_ATTRIBUTES)
+
+        if not self.retry_policy:
+            self.retry_policy = NO_RETRY
 
         self.group_dn = group_dn
-        self.attributes = []
 
-        # Initialize search objects
+        self._validated = False
+
+        # Groups can be shared by threads (see ldap_groups.registry), so attribute state changes under a lock
+        self._attributes_lock = threading.RLock()
+        self._reset_attributes()
+
+        # Cleared the first time the server turns down a virtual list view search
+        self._virtual_list_view = True
+
+        # Forest-wide lookups can be sent to a Global Catalog, which has its own connections
+        if global_catalog_pool:
+            self.global_catalog_pool = global_catalog_pool
+        elif self.global_catalog_uri:
+            self.global_catalog_pool = get_pool(self.global_catalog_uri, self.bind_dn, self.bind_password,
+                                                size=self.pool_size, idle_timeout=self.pool_idle_timeout,
+                                                strategy=self.server_strategy)
+        else:
+            self.global_catalog_pool = None
+
+        self._build_searches()
+
+        # Lookups and attributes are cached process-wide unless caching is disabled
+        if cache is None:
+            self.cache = get_default_cache()
+        else:
+            self.cache = cache if cache else None
+
+        # Connections are shared by every ADGroup using the same server and bind user
+        if connection_pool:
+            self.connection_pool = connection_pool
+        else:
+            self.connection_pool = get_pool(self.server_uri, self.bind_dn, self.bind_password,
+                                            size=self.pool_size, idle_timeout=self.pool_idle_timeout,
+                                            strategy=self.server_strategy, write_server_uri=self.write_server_uri)
+
+        # Make sure the group is valid, unless that is deferred until the group is first used
+        if not lazy:
+            self._ensure_valid()
+
+    def _build_searches(self):
+        """Builds the search objects for this group's dn and configuration."""
+
+        prefetch_attributes = list(self.prefetch_attributes) if self.prefetch_attributes else NO_ATTRIBUTES
+
         self.ATTRIBUTES_SEARCH = {
+            'name': 'ATTRIBUTES_SEARCH',
             'base_dn': self.group_dn,
             'scope': BASE,
             'filter_string': "(|(objectClass=group)(objectClass=organizationalUnit))",
@@ -142,6 +358,7 @@ class ADGroup:
         }
 
         self.USER_SEARCH = {
+            'name': 'USER_SEARCH',
             'base_dn': self.user_search_base_dn,
             'scope': SUBTREE,
             'filter_string': ("(&(objectClass=user)({lookup_attribute}"
@@ -150,6 +367,7 @@ class ADGroup:
         }
 
         self.GROUP_SEARCH = {
+            'name': 'GROUP_SEARCH',
             'base_dn': self.group_search_base_dn,
             'scope': SUBTREE,
             'filter_string': ("(&(objectClass=group)({lookup_attribute}"
@@ -157,93 +375,189 @@ class ADGroup:
             'attribute_list': NO_ATTRIBUTES
         }
 
+        self.USER_MEMBER_OF_SEARCH = {
+            'name': 'USER_MEMBER_OF_SEARCH',
+            'base_dn': self.user_search_base_dn,
+            'scope': SUBTREE,
+            'filter_string': self.USER_SEARCH['filter_string'],
+            'attribute_list': ['memberOf']
+        }
+
+        # tokenGroups is constructed by the server and only returned by base searches. base_dn is the user's dn.
+        self.TOKEN_GROUPS_SEARCH = {
+            'name': 'TOKEN_GROUPS_SEARCH',
+            'base_dn': None,
+            'scope': BASE,
+            'filter_string': "(objectClass=*)",
+            'attribute_list': ['tokenGroups']
+        }
+
+        self.GROUP_SID_SEARCH = {
+            'name': 'GROUP_SID_SEARCH',
+            'base_dn': self.base_dn,
+            'scope': SUBTREE,
+            'filter_string': "(&(objectClass=group)(|{sid_clauses}))",
+            'attribute_list': ['objectSid']
+        }
+
+        self.USER_BATCH_SEARCH = {
+            'name': 'USER_BATCH_SEARCH',
+            'base_dn': self.user_search_base_dn,
+            'scope': SUBTREE,
+            'filter_string': "(&(objectClass=user)(|{lookup_clauses}))",
+            'attribute_list': [self.user_lookup_attr]
+        }
+
+        self.GROUP_BATCH_SEARCH = {
+            'name': 'GROUP_BATCH_SEARCH',
+            'base_dn': self.group_search_base_dn,
+            'scope': SUBTREE,
+            'filter_string': "(&(objectClass=group)(|{lookup_clauses}))",
+            'attribute_list': [self.group_lookup_attr]
+        }
+
+        # Ranged retrieval is done by hand, so ldap3 must not follow the ranges itself
+        self.MEMBER_RANGE_SEARCH = {
+            'name': 'MEMBER_RANGE_SEARCH',
+            'base_dn': self.group_dn,
+            'scope': BASE,
+            'filter_string': "(objectClass=*)",
+            'attribute_list': ["member;range={low}-{high}"],
+            'auto_range': False
+        }
+
+        self.MEMBER_DN_SEARCH = {
+            'name': 'MEMBER_DN_SEARCH',
+            'base_dn': self.base_dn,
+            'scope': SUBTREE,
+            'filter_string': "(&(objectCategory=user)(|{dn_clauses}))",
+            'attribute_list': self.attr_list
+        }
+
+        # objectCategory=user also matches contacts, and computers are users too
+        self.USER_ACCOUNT_DN_SEARCH = {
+            'name': 'USER_ACCOUNT_DN_SEARCH',
+            'base_dn': self.base_dn,
+            'scope': SUBTREE,
+            'filter_string': "(&(objectClass=user)(!(objectClass=computer))(|{dn_clauses}))",
+            'attribute_list': [self.user_lookup_attr]
+        }
+
         self.GROUP_MEMBER_SEARCH = {
+            'name': 'GROUP_MEMBER_SEARCH',
             'base_dn': self.base_dn,
             'scope': SUBTREE,
             'filter_string': "(&(objectCategory=user)(memberOf={group_dn}))",
             'attribute_list': self.attr_list
         }
 
+        # LDAP_MATCHING_RULE_IN_CHAIN makes the server walk nested memberships (Active Directory only)
+        self.NESTED_GROUP_MEMBER_SEARCH = {
+            'name': 'NESTED_GROUP_MEMBER_SEARCH',
+            'base_dn': self.base_dn,
+            'scope': SUBTREE,
+            'filter_string': "(&(objectCategory=user)(memberOf:1.2.840.113556.1.4.1941:={group_dn}))",
+            'attribute_list': self.attr_list
+        }
+
         self.GROUP_CHILDREN_SEARCH = {
+            'name': 'GROUP_CHILDREN_SEARCH',
             'base_dn': self.base_dn,
             'scope': SUBTREE,
             'filter_string': ("(&(|(objectClass=group)(objectClass=organizationalUnit))"
                               "(memberOf={group_dn}))").format(group_dn=escape_query(self.group_dn)),
-            'attribute_list': NO_ATTRIBUTES
+            'attribute_list': prefetch_attributes
         }
 
         self.OU_CHILDREN_SEARCH = {
+            'name': 'OU_CHILDREN_SEARCH',
             'base_dn': self.group_dn,
             'scope': LEVEL,
             'filter_string': "(|(objectClass=group)(objectClass=organizationalUnit))",
-            'attribute_list': NO_ATTRIBUTES
+            'attribute_list': prefetch_attributes
         }
 
         self.GROUP_SINGLE_CHILD_SEARCH = {
+            'name': 'GROUP_SINGLE_CHILD_SEARCH',
             'base_dn': self.base_dn,
             'scope': SUBTREE,
             'filter_string': ("(&(&(|(objectClass=group)(objectClass=organizationalUnit))(name={{child_group_name}}))"
                               "(memberOf={parent_dn}))").format(parent_dn=escape_query(self.group_dn)),
-            'attribute_list': NO_ATTRIBUTES
+            'attribute_list': prefetch_attributes
         }
 
         self.OU_SINGLE_CHILD_SEARCH = {
+            'name': 'OU_SINGLE_CHILD_SEARCH',
             'base_dn': self.group_dn,
             'scope': LEVEL,
             'filter_string': "(&(|(objectClass=group)(objectClass=organizationalUnit))(name={child_group_name}))",
-            'attribute_list': NO_ATTRIBUTES
+            'attribute_list': prefetch_attributes
         }
 
         self.DESCENDANT_SEARCH = {
+            'name': 'DESCENDANT_SEARCH',
             'base_dn': self.group_dn,
             'scope': SUBTREE,
             'filter_string': "(|(objectClass=group)(objectClass=organizationalUnit))",
-            'attribute_list': NO_ATTRIBUTES
+            'attribute_list': prefetch_attributes
         }
 
         self.VALID_GROUP_TEST = {
+            'name': 'VALID_GROUP_TEST',
             'base_dn': self.group_dn,
             'scope': BASE,
             'filter_string': "(|(objectClass=group)(objectClass=organizationalUnit))",
-            'attribute_list': NO_ATTRIBUTES
+            'attribute_list': prefetch_attributes
         }
 
-        ldap_server = Server(self.server_uri)
+        if self.global_catalog_pool:
+            self._route_to_global_catalog(self.USER_SEARCH, [self.user_lookup_attr])
+            self._route_to_global_catalog(self.GROUP_SEARCH, [self.group_lookup_attr])
+            self._route_to_global_catalog(self.USER_BATCH_SEARCH)
+            self._route_to_global_catalog(self.GROUP_BATCH_SEARCH)
+            self._route_to_global_catalog(self.GROUP_SID_SEARCH)
+            self._route_to_global_catalog(self.MEMBER_DN_SEARCH)
+            self._route_to_global_catalog(self.USER_ACCOUNT_DN_SEARCH)
+            self._route_to_global_catalog(self.GROUP_MEMBER_SEARCH)
+            self._route_to_global_catalog(self.NESTED_GROUP_MEMBER_SEARCH)
+            self._route_to_global_catalog(self.GROUP_CHILDREN_SEARCH)
+            self._route_to_global_catalog(self.GROUP_SINGLE_CHILD_SEARCH)
+            self._route_to_global_catalog(self.DESCENDANT_SEARCH)
+
+    def _route_to_global_catalog(self, search, filter_attributes=()):
+        """ Marks a search to be sent to the Global Catalog if every attribute it filters on (beyond the ones the
+            search templates always use, which are replicated) and returns is replicated there. Searches rooted at
+            a domain base dn are rooted at the Global Catalog base dn instead. Any other search stays on the domain
+            controller, which has every attribute.
+
+        :param search: One of this group's search dictionaries.
+        :type search: dict
+        :param filter_attributes: The configurable attributes the search's filter uses.
+        :type filter_attributes: list
 
-        if self.bind_dn and self.bind_password:
-            try:
-                self.ldap_connection = Connection(
-                    ldap_server,
-                    auto_bind=True,
-                    user=self.bind_dn,
-                    password=self.bind_password,
-                    raise_exceptions=True
-                )
-            except LDAPInvalidServerError:
-                raise LDAPServerUnreachable("The LDAP server is down or the SERVER_URI is invalid.")
-            except LDAPInvalidCredentialsResult:
-                raise InvalidCredentials("The SERVER_URI, BIND_DN, or BIND_PASSWORD provided is not valid.")
-        else:
-            logger.warning("LDAP Bind Credentials are not set. Group modification methods will most likely fail.")
-            self.ldap_connection = Connection(ldap_server, auto_bind=True, raise_exceptions=True)
+        """
 
-        # Make sure the group is valid
-        valid, reason = self._get_valididty()
+        if search['attribute_list'] == ALL_ATTRIBUTES:
+            return
 
-        if not valid:
-            raise InvalidGroupDN("The AD Group distinguished name provided is invalid:"
-                                 "\n\t{reason}".format(reason=reason))
+        attributes = [] if search['attribute_list'] == NO_ATTRIBUTES else list(search['attribute_list'])
+        replicated_attributes = [attribute.lower() for attribute in self.global_catalog_attributes]
 
-    def __enter__(self):
-        return self
+        if any(attribute.lower() not in replicated_attributes for attribute in attributes + list(filter_attributes)):
+            return
 
-    def __exit__(self):
-        self.__del__()
+        if search['base_dn'] in (self.base_dn, self.user_search_base_dn, self.group_search_base_dn):
+            search['domain_base_dn'] = search['base_dn']
+            search['base_dn'] = self.global_catalog_base_dn
 
-    def __del__(self):
-        """Closes the LDAP connection."""
+        search['global_catalog'] = True
+
+    def __enter__(self):
+        return self
 
-        self.ldap_connection.unbind()
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Connections are returned to the pool after every operation, so there is nothing to close here.
+        pass
 
     def __repr__(self):
         try:
@@ -263,10 +577,245 @@ class ADGroup:
     def __hash__(self):
         return hash(self.group_dn)
 
+    ###############################################################################################################
+    #                                            Connection Methods                                               #
+    ###############################################################################################################
+
+    def _search(self, search, validate=True, **filter_kwargs):
+        """ Performs a search on a pooled connection and returns the entries found.
+
+        :param search: One of this group's search dictionaries. Set 'auto_range' to False in the dictionary to stop
+                       ldap3 from following ranged attribute values, and 'controls' to send extra controls. Set
+                       'response_controls' to a dictionary to have it filled with the controls the server returned.
+        :type search: dict
+        :param validate: Whether to validate this group first if it hasn't been yet. Default True.
+        :type validate: boolean
+        :param filter_kwargs: Values used to format the search's filter string. They must already be escaped.
+
+        """
+
+        if validate:
+            self._ensure_valid()
+
+        search_filter = search['filter_string'].format(**filter_kwargs) if filter_kwargs else search['filter_string']
+        description = "{name} on {base_dn}".format(name=search['name'], base_dn=search['base_dn'])
+
+        return self.retry_policy.call(self._send_search, description, search, search_filter)
+
+    @contextmanager
+    def _connection(self, write=False, global_catalog=False):
+        """ Checks a connection out of the pool for the duration of a with block. A connection that fails with a
+            retryable error is unbound, so the pool discards it instead of handing it out again.
+
+            Writes use the pool's write_connection() if it has one, so a multi-server pool can pin them to one
+            server. Searches marked for the Global Catalog use the Global Catalog pool.
+
+        """
+
+        if global_catalog and self.global_catalog_pool:
+            pool_connection = self.global_catalog_pool.connection()
+        elif write and hasattr(self.connection_pool, 'write_connection'):
+            pool_connection = self.connection_pool.write_connection()
+        else:
+            pool_connection = self.connection_pool.connection()
+
+        with pool_connection as connection:
+            try:
+                yield connection
+            except self.retry_policy.retryable:
+                try:
+                    connection.unbind()
+                except (LDAPException, LDAPExceptionError):
+                    pass
+
+                raise
+
+    def _send_search(self, search, search_filter):
+        """Sends a search on a pooled connection and returns the entries found. Called once per attempt."""
+
+        with self._connection(global_catalog=search.get('global_catalog', False)) as connection, \
+                track(SEARCH, search['name'], search['base_dn'], search_filter, self.group_dn) as operation:
+            auto_range = connection.auto_range
+            connection.auto_range = search.get('auto_range', auto_range)
+
+            try:
+                with operation.request():
+                    connection.search(search_base=search['base_dn'],
+                                      search_filter=search_filter,
+                                      search_scope=search['scope'],
+                                      attributes=search['attribute_list'],
+                                      controls=search.get('controls'))
+            finally:
+                connection.auto_range = auto_range
+
+            operation.add_response(connection.response)
+
+            if 'response_controls' in search:
+                search['response_controls'].update(connection.result.get('controls') or {})
+
+            return [entry for entry in connection.response if entry["type"] == "searchResEntry"]
+
+    def _iter_paged_search(self, search, page_size, **filter_kwargs):
+        """ Performs a paged search on a pooled connection and yields the entries found one page at a time.
+            The connection is checked out until the generator is exhausted or closed.
+
+            If a page fails with a retryable error, the page is requested again with the same cookie on a new
+            connection. If the server no longer accepts the cookie (e.g. the DC was restarted), the search starts
+            over and skips as many entries as were already yielded. Only a count is kept, so memory use doesn't grow
+            with the size of the search, but an entry added or removed in the meantime can shift the results, so
+            one may be missed or yielded twice.
+
+        :param search: One of this group's search dictionaries.
+        :type search: dict
+        :param page_size: The number of entries to request per page.
+        :type page_size: int
+        :param filter_kwargs: Values used to format the search's filter string. They must already be escaped.
+
+        """
+
+        self._ensure_valid()
+
+        search_filter = search['filter_string'].format(**filter_kwargs) if filter_kwargs else search['filter_string']
+        description = "{name} on {base_dn}".format(name=search['name'], base_dn=search['base_dn'])
+
+        with track(PAGED_SEARCH, search['name'], search['base_dn'], search_filter, self.group_dn) as operation:
+            cookie = None
+            attempt = 1
+            resumed = False
+
+            # The number of entries yielded so far, and the number still to skip after starting over
+            yielded = 0
+            skip = 0
+
+            while True:
+                try:
+                    with self._connection(global_catalog=search.get('global_catalog', False)) as connection:
+                        while True:
+                            with operation.request():
+                                connection.search(search_base=search['base_dn'],
+                                                  search_filter=search_filter,
+                                                  search_scope=search['scope'],
+                                                  attributes=search['attribute_list'],
+                                                  controls=search.get('controls'),
+                                                  paged_size=page_size,
+                                                  paged_cookie=cookie)
+
+                            # Only consecutive failures count against the retry policy
+                            attempt = 1
+                            resumed = False
+
+                            response = connection.response
+                            operation.add_response(response)
+
+                            cookie = connection.result.get('controls', {}).get(PAGED_RESULTS_CONTROL, {}).get(
+                                'value', {}
+                            ).get('cookie')
+
+                            for entry in response:
+                                if entry["type"] == "searchResEntry":
+                                    if skip:
+                                        skip -= 1
+                                        continue
+
+                                    yielded += 1
+                                    yield entry
+
+                            if not cookie:
+                                return
+                except Exception as error:
+                    if self.retry_policy.wait(error, attempt, description):
+                        attempt += 1
+                        resumed = True
+                    elif resumed and cookie and isinstance(error, LDAPOperationResult):
+                        logger.warning("{description} could not be resumed, starting over: {error!r}".format(
+                            description=description, error=error
+                        ))
+
+                        cookie = None
+                        resumed = False
+                        skip = yielded
+                    else:
+                        raise
+
+    def _paged_search(self, search, page_size, **filter_kwargs):
+        """Performs a paged search on a pooled connection and returns the entries found."""
+
+        return list(self._iter_paged_search(search, page_size, **filter_kwargs))
+
+    def _cache_key(self, namespace, *parts):
+        """Builds a cache key scoped to this group's server and bind user."""
+
+        return (namespace, str(self.server_uri), self.bind_dn) + parts
+
+    def _get_cached(self, key):
+        return self.cache.get(key) if self.cache else None
+
+    def _set_cached(self, key, value):
+        if self.cache:
+            self.cache.set(key, value)
+
+    def _invalidate_membership_caches(self, member_dns):
+        """ Forgets cached attributes made stale by a membership change: this group's member attribute and the
+            memberOf attribute of each entry added or removed. A change to a nested group can change the groups of
+            any user below it, so every cached user group list is forgotten, along with the sorted member lists.
+
+        """
+
+        self._reset_attributes(keep=self.prefetch_attributes)
+
+        if self.cache:
+            self.cache.clear(USER_GROUPS)
+            self.cache.clear(MEMBER_PAGES)
+
+            for dn in [self.group_dn] + list(member_dns):
+                self.cache.invalidate(self._cache_key(ATTRIBUTES, dn.lower()))
+
+    def _group_from_dn(self, group_dn, trusted=False, attributes=None):
+        """ Creates a lazy ADGroup for group_dn that shares this group's configuration and connection pool.
+            Settings are not re-read and nothing is sent to the server.
+
+        :param group_dn: The distinguished name of the group.
+        :type group_dn: str
+        :param trusted: Set to True if group_dn was just returned by the server, so the group never needs to be
+                        validated. Otherwise it is validated when it is first used. Default False.
+        :type trusted: boolean
+        :param attributes: The prefetch attributes returned along with group_dn, if any.
+        :type attributes: dict
+
+        """
+
+        group = copy.copy(self)
+        group.group_dn = group_dn
+        group._validated = trusted
+        group._attributes_lock = threading.RLock()
+        group._reset_attributes()
+        group._build_searches()
+
+        if attributes is not None and self.prefetch_attributes:
+            group._merge_attributes(attributes, self.prefetch_attributes)
+
+        return group
+
     ###############################################################################################################
     #                                         Group Information Methods                                           #
     ###############################################################################################################
 
+    def _ensure_valid(self):
+        """ Validates this group the first time it needs the server.
+
+        :raises: **InvalidGroupDN** if this group's dn is invalid.
+
+        """
+
+        if not self._validated:
+            valid, reason = self._get_valididty()
+
+            if not valid:
+                raise InvalidGroupDN("The AD Group distinguished name provided is invalid:"
+                                     "\n\t{reason}".format(reason=reason))
+
+            self._validated = True
+
     def _get_valididty(self):
         """ Determines whether this AD Group is valid.
 
@@ -276,10 +825,7 @@ class ADGroup:
         """
 
         try:
-            self.ldap_connection.search(search_base=self.VALID_GROUP_TEST['base_dn'],
-                                        search_filter=self.VALID_GROUP_TEST['filter_string'],
-                                        search_scope=self.VALID_GROUP_TEST['scope'],
-                                        attributes=self.VALID_GROUP_TEST['attribute_list'])
+            results = self._search(self.VALID_GROUP_TEST, validate=False)
         except LDAPOperationsErrorResult as error_message:
             raise ImproperlyConfigured("The LDAP server most-likely does not accept anonymous connections:"
                                        "\n\t{error}".format(error=error_message[0]['info']))
@@ -291,10 +837,13 @@ class ADGroup:
             return False, ("This group has too many children for ldap-groups to handle: "
                            "{group_dn}".format(group_dn=self.group_dn))
 
+        if results and self.prefetch_attributes:
+            self._merge_attributes(results[0]["attributes"], self.prefetch_attributes)
+
         return True, ""
 
     def get_attribute(self, attribute_name, no_cache=False):
-        """ Gets the passed attribute of this group.
+        """ Gets the passed attribute of this group. Only that attribute is requested from the server.
 
         :param attribute_name: The name of the attribute to get.
         :type attribute_name: str
@@ -306,7 +855,7 @@ class ADGroup:
 
         """
 
-        attributes = self.get_attributes(no_cache)
+        attributes = self.get_attributes(no_cache, names=[attribute_name])
 
         if attribute_name not in attributes:
             logger.debug("ADGroup {group_dn} does not have the attribute "
@@ -321,7 +870,7 @@ class ADGroup:
 
             return raw_attribute
 
-    def get_attributes(self, no_cache=False):
+    def get_attributes(self, no_cache=False, names=None):
         """
         Returns a dictionary of this group's attributes. This method caches the attributes after
         the first search unless no_cache is specified.
@@ -329,44 +878,166 @@ class ADGroup:
         :param no_cache (optional): Set to True to pull attributes directly from an LDAP search instead of
                                     from the cache. Default False
         :type no_cache: boolean
+        :param names (optional): The names of the attributes to get. Only attributes that haven't been fetched
+                                 yet are requested from the server, and the result only contains these
+                                 attributes. Default None (all attributes).
+        :type names: list
+
+        """
+
+        # Held across the fetch so that a concurrent refresh can't forget the attributes before they are returned
+        with self._attributes_lock:
+            if names is None:
+                if no_cache or not self._all_attributes_fetched:
+                    self._fetch_attributes(None, no_cache)
+
+                return self.attributes
+
+            if no_cache:
+                self._fetch_attributes(list(names), no_cache)
+            elif not self._all_attributes_fetched:
+                missing_names = [name for name in names if name.lower() not in self._fetched_attributes]
+
+                if missing_names:
+                    self._fetch_attributes(missing_names, no_cache)
+
+            requested_names = set(name.lower() for name in names)
+
+            return CaseInsensitiveDict(
+                (name, value) for name, value in self.attributes.items() if name.lower() in requested_names
+            )
+
+    def _fetch_attributes(self, names, no_cache=False):
+        """ Fills in the instance cache from the process cache or, for anything it is missing, an LDAP search.
+
+        :param names: The names of the attributes to fetch, or None for all attributes.
+        :type names: list
+        :param no_cache: Set to True to skip the process cache.
+        :type no_cache: boolean
 
         """
 
-        if not self.attributes:
-            self.ldap_connection.search(search_base=self.ATTRIBUTES_SEARCH['base_dn'],
-                                        search_filter=self.ATTRIBUTES_SEARCH['filter_string'],
-                                        search_scope=self.ATTRIBUTES_SEARCH['scope'],
-                                        attributes=self.ATTRIBUTES_SEARCH['attribute_list'])
+        cache_key = self._cache_key(ATTRIBUTES, self.group_dn.lower())
+
+        if not no_cache:
+            cached = self._get_cached(cache_key)
+
+            if cached is not None:
+                cached_names, cached_attributes = cached
+                self._merge_attributes(cached_attributes, cached_names)
+
+                if cached_names is None:
+                    return
+                elif names is not None:
+                    names = [name for name in names if name.lower() not in cached_names]
 
-            results = [
-                result["attributes"] for result in self.ldap_connection.response if result["type"] == "searchResEntry"
-            ]
+                    if not names:
+                        return
 
-            if len(results) != 1:
-                logger.debug("Search returned {count} results: {results}".format(count=len(results), results=results))
+        search = dict(self.ATTRIBUTES_SEARCH, attribute_list=ALL_ATTRIBUTES if names is None else names)
+        results = [result["attributes"] for result in self._search(search)]
 
-            if results:
-                self.attributes = results[0]
+        if len(results) != 1:
+            logger.debug("Search returned {count} results: {results}".format(count=len(results), results=results))
+
+        if results:
+            self._merge_attributes(results[0], names)
+            self._set_cached(cache_key, (
+                None if self._all_attributes_fetched else frozenset(self._fetched_attributes),
+                dict(self.attributes)
+            ))
+
+    def _merge_attributes(self, attributes, names=None):
+        """ Merges attributes returned by the server into the instance cache. The merged attributes replace the
+            instance cache's dictionary and set instead of changing them, so a dictionary returned by get_attributes
+            never changes while it is being read.
+
+        :param attributes: The attributes returned.
+        :type attributes: dict
+        :param names: The names of the attributes that were requested, or None if all of them were. Requested
+                      attributes that weren't returned are not set on this group.
+        :type names: list
+
+        """
+
+        with self._attributes_lock:
+            if names is None:
+                merged_attributes = CaseInsensitiveDict()
+                fetched_attributes = set()
             else:
-                self.attributes = []
+                merged_attributes = CaseInsensitiveDict(self.attributes)
+                fetched_attributes = set(self._fetched_attributes)
+
+                for name in names:
+                    merged_attributes.pop(name, None)
+                    fetched_attributes.add(name.lower())
+
+            for name, value in attributes.items():
+                # Unset attributes come back as empty lists when they are requested by name
+                if value is not None and value != []:
+                    merged_attributes[name] = value
+
+            self.attributes = merged_attributes
+            self._fetched_attributes = fetched_attributes
+            self._all_attributes_fetched = self._all_attributes_fetched or names is None
+
+    def _reset_attributes(self, keep=None):
+        """ Forgets the attributes fetched so far.
+
+        :param keep: The names of attributes to hold on to, such as attributes that never change.
+        :type keep: list
+
+        """
+
+        with self._attributes_lock:
+            kept = CaseInsensitiveDict()
+
+            if keep and getattr(self, 'attributes', None):
+                for name in keep:
+                    if name in self.attributes:
+                        kept[name] = self.attributes[name]
+
+            self.attributes = kept
+            self._fetched_attributes = set(name.lower() for name in kept)
+            self._all_attributes_fetched = False
+
+    def _get_group_type(self):
+        """Returns 'group' or 'organizationalUnit' depending on this group's objectClass, or None."""
+
+        # objectClass never changes, so it is cached apart from attributes that membership changes invalidate
+        cache_key = self._cache_key(OBJECT_CLASS, self.group_dn.lower())
+        object_class = self._get_cached(cache_key)
+
+        if object_class is None:
+            object_class = self.get_attribute("objectClass")
+
+            if object_class:
+                self._set_cached(cache_key, object_class)
 
-        return self.attributes
+        return object_class[-1] if object_class else None
 
-    def _get_user_dn(self, user_lookup_attribute_value):
+    def _get_user_dn(self, user_lookup_attribute_value, validate=True):
         """ Searches for a user and retrieves his distinguished name.
 
         :param user_lookup_attribute_value: The value for the LDAP_GROUPS_USER_LOOKUP_ATTRIBUTE
         :type user_lookup_attribute_value: str
+        :param validate: Whether to validate this group first if it hasn't been yet. Default True.
+        :type validate: boolean
 
         :raises: **AccountDoesNotExist** if the account doesn't exist in the active directory.
 
         """
-        self.ldap_connection.search(search_base=self.USER_SEARCH['base_dn'],
-                                    search_filter=self.USER_SEARCH['filter_string'].format(
-                                        lookup_value=escape_query(user_lookup_attribute_value)),
-                                    search_scope=self.USER_SEARCH['scope'],
-                                    attributes=self.USER_SEARCH['attribute_list'])
-        results = [result["dn"] for result in self.ldap_connection.response if result["type"] == "searchResEntry"]
+        cache_key = self._cache_key(USER_DN, self.user_search_base_dn, self.user_lookup_attr,
+                                    user_lookup_attribute_value.lower())
+        user_dn = self._get_cached(cache_key)
+
+        if user_dn:
+            return user_dn
+
+        results = [
+            result["dn"] for result in self._search(self.USER_SEARCH, validate,
+                                                    lookup_value=escape_query(user_lookup_attribute_value))
+        ]
 
         if not results:
             raise AccountDoesNotExist("The {user_lookup_attribute} provided does not exist in the Active "
@@ -375,10 +1046,9 @@ class ADGroup:
         if len(results) > 1:
             logger.debug("Search returned more than one result: {results}".format(results=results))
 
-        if results:
-            return results[0]
-        else:
-            return results
+        self._set_cached(cache_key, results[0])
+
+        return results[0]
 
     def _get_group_dn(self, group_lookup_attribute_value):
         """ Searches for a group and retrieves its distinguished name.
@@ -389,12 +1059,17 @@ class ADGroup:
         :raises: **GroupDoesNotExist** if the group doesn't exist in the active directory.
 
         """
-        self.ldap_connection.search(search_base=self.GROUP_SEARCH['base_dn'],
-                                    search_filter=self.GROUP_SEARCH['filter_string'].format(
-                                        lookup_value=escape_query(group_lookup_attribute_value)),
-                                    search_scope=self.GROUP_SEARCH['scope'],
-                                    attributes=self.GROUP_SEARCH['attribute_list'])
-        results = [result["dn"] for result in self.ldap_connection.response if result["type"] == "searchResEntry"]
+        cache_key = self._cache_key(GROUP_DN, self.group_search_base_dn, self.group_lookup_attr,
+                                    group_lookup_attribute_value.lower())
+        group_dn = self._get_cached(cache_key)
+
+        if group_dn:
+            return group_dn
+
+        results = [
+            result["dn"] for result in self._search(self.GROUP_SEARCH,
+                                                    lookup_value=escape_query(group_lookup_attribute_value))
+        ]
 
         if not results:
             raise GroupDoesNotExist("The {group_lookup_attribute} provided does not exist in the Active "
@@ -403,138 +1078,952 @@ class ADGroup:
         if len(results) > 1:
             logger.debug("Search returned more than one result: {results}".format(results=results))
 
-        if results:
-            return results[0]
-        else:
-            return results
+        self._set_cached(cache_key, results[0])
 
-    def _get_group_members(self, page_size=500):
-        """ Searches for a group and retrieve its members.
+        return results[0]
 
-        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
-                                     Paged searches circumvent that limit. Adjust the page_size to be below the
-                                     server's size limit. (default: 500)
-        :type page_size: int
+    def _member_search(self, search, member_filter=None, attr_list=None, sort_by=None):
+        """ Returns a copy of one of this group's member searches with extra filter clauses and another attribute
+            list, and decides again whether it can be sent to the Global Catalog.
+
+        :param search: GROUP_MEMBER_SEARCH, NESTED_GROUP_MEMBER_SEARCH or MEMBER_DN_SEARCH.
+        :type search: dict
+        :param member_filter: A raw filter string, or a dictionary mapping attribute names to values, which are
+                              escaped. See build_filter.
+        :type member_filter: str or dict
+        :param attr_list: The attributes to return instead of attr_list.
+        :type attr_list: list
+        :param sort_by: The attribute the server is asked to sort the members by.
+        :type sort_by: str
 
         """
 
-        entry_list = self.ldap_connection.extend.standard.paged_search(
-            search_base=self.GROUP_MEMBER_SEARCH['base_dn'],
-            search_filter=self.GROUP_MEMBER_SEARCH['filter_string'].format(group_dn=escape_query(self.group_dn)),
-            search_scope=self.GROUP_MEMBER_SEARCH['scope'],
-            attributes=self.GROUP_MEMBER_SEARCH['attribute_list'],
-            paged_size=page_size
-        )
-        return [
-            {"dn": result["dn"], "attributes": result["attributes"]}
-            for result in entry_list if result["type"] == "searchResEntry"
-        ]
+        if not member_filter and not attr_list and not sort_by:
+            return search
 
-    def get_member_info(self, page_size=500):
-        """ Retrieves member information from the AD group object.
+        search = dict(search)
+        filter_attributes = []
+
+        if member_filter:
+            clause = build_filter(member_filter)
+            filter_attributes = list(member_filter) if isinstance(member_filter, dict) else \
+                FILTER_ATTRIBUTE.findall(clause)
+
+            # The clause is added to a filter template, so its braces must survive formatting
+            search['filter_string'] = "(&{filter_string}{clause})".format(
+                filter_string=search['filter_string'], clause=clause.replace("{", "{{").replace("}", "}}")
+            )
+
+        if attr_list:
+            search['attribute_list'] = list(attr_list)
+
+        if sort_by:
+            filter_attributes.append(sort_by)
+
+        if search.pop('global_catalog', False):
+            search['base_dn'] = search.pop('domain_base_dn', search['base_dn'])
+            self._route_to_global_catalog(search, filter_attributes)
+
+        return search
+
+    def _iter_group_members(self, page_size=500, member_filter=None, attr_list=None):
+        """ Searches for a group and yields its members.
 
         :param page_size (optional): Many servers have a limit on the number of results that can be returned.
                                      Paged searches circumvent that limit. Adjust the page_size to be below the
                                      server's size limit. (default: 500)
         :type page_size: int
-
-        :returns: A dictionary of information on members of the AD group based on the LDAP_GROUPS_ATTRIBUTE_LIST
-                  setting or attr_list argument.
+        :param member_filter (optional): Extra filter clauses the members must match. See _member_search.
+        :type member_filter: str or dict
+        :param attr_list (optional): The attributes to return instead of attr_list.
+        :type attr_list: list
 
         """
 
-        member_info = []
+        search = self._member_search(self.GROUP_MEMBER_SEARCH, member_filter, attr_list)
 
-        for member in self._get_group_members(page_size):
-            info_dict = {}
+        for result in self._iter_paged_search(search, page_size, group_dn=escape_query(self.group_dn)):
+            yield {"dn": result["dn"], "attributes": result["attributes"]}
 
-            for attribute_name in member["attributes"]:
-                raw_attribute = member["attributes"][attribute_name]
+    def _resolve_dns(self, namespace, search, lookup_attribute, lookup_values,
+                     chunk_size=DEFAULT_LOOKUP_CHUNK_SIZE, page_size=500):
+        """ Looks up the distinguished names of many entries with one OR filter search per chunk of lookup values
+            that aren't already cached.
 
-                # Pop one-item lists
-                if len(raw_attribute) == 1:
-                    raw_attribute = raw_attribute[0]
+        :param namespace: USER_DN or GROUP_DN, the cache namespace of the lookups.
+        :type namespace: str
+        :param search: USER_BATCH_SEARCH or GROUP_BATCH_SEARCH.
+        :type search: dict
+        :param lookup_attribute: The attribute the lookup values belong to.
+        :type lookup_attribute: str
+        :param lookup_values: The values to look up.
+        :type lookup_values: iterable
+        :param chunk_size (optional): The number of values per search filter. (default: 100)
+        :type chunk_size: int
 
-                info_dict.update({attribute_name: raw_attribute})
+        :returns: A DNResolution of the lookup values.
 
-            member_info.append(info_dict)
+        """
 
-        return member_info
+        # Lookup attributes are compared case-insensitively, as Active Directory does
+        values_by_key = {}
 
-    def get_tree_members(self):
-        """ Retrieves all members from this node of the tree down."""
+        for value in lookup_values:
+            values_by_key.setdefault(value.lower(), []).append(value)
 
-        members = []
-        queue = deque()
-        queue.appendleft(self)
-        visited = set()
+        dns_by_key = {}
+        uncached_keys = []
 
-        while len(queue):
-            node = queue.popleft()
+        for key in values_by_key:
+            dn = self._get_cached(self._cache_key(namespace, search['base_dn'], lookup_attribute, key))
 
-            if node not in visited:
-                members.extend(node.get_member_info())
-                queue.extendleft(node.get_children())
-                visited.add(node)
+            if dn:
+                dns_by_key[key] = [dn]
+            else:
+                uncached_keys.append(key)
 
-        return [{attribute: member.get(attribute) for attribute in self.attr_list} for member in members if member]
+        for chunk in chunked(uncached_keys, chunk_size):
+            lookup_clauses = "".join(
+                "({attribute}={value})".format(attribute=escape_query(lookup_attribute), value=escape_query(key))
+                for key in chunk
+            )
 
-    ###############################################################################################################
-    #                                         Group Modification Methods                                          #
-    ###############################################################################################################
+            for entry in self._iter_paged_search(search, page_size, lookup_clauses=lookup_clauses):
+                entry_values = entry["attributes"].get(lookup_attribute)
 
-    def _attempt_modification(self, target_type, target_identifier, modification):
-        mod_type = list(modification.values())[0][0]
-        action_word = "adding" if mod_type == MODIFY_ADD else "removing"
-        action_prep = "to" if mod_type == MODIFY_ADD else "from"
+                if not isinstance(entry_values, list):
+                    entry_values = [entry_values]
 
-        message_base = "Error {action} {target_type} '{target_id}' {prep} group '{group_dn}': ".format(
-            action=action_word,
-            target_type=target_type,
-            target_id=target_identifier,
-            prep=action_prep,
-            group_dn=self.group_dn
-        )
+                for entry_value in entry_values:
+                    key = str(entry_value).lower()
 
-        try:
-            self.ldap_connection.modify(dn=self.group_dn, changes=modification)
-        except LDAPEntryAlreadyExistsResult:
-            raise EntryAlreadyExists(
-                message_base + "The {target_type} already exists.".format(target_type=target_type)
-            )
-        except LDAPInsufficientAccessRightsResult:
-            raise InsufficientPermissions(
-                message_base + "The bind user does not have permission to modify this group."
-            )
-        except (LDAPException, LDAPExceptionError) as error_message:
-            raise ModificationFailed(message_base + str(error_message))
+                    if key in values_by_key:
+                        dns_by_key.setdefault(key, []).append(entry["dn"])
 
-    def add_member(self, user_lookup_attribute_value):
-        """ Attempts to add a member to the AD group.
+            for key in chunk:
+                if len(dns_by_key.get(key, [])) == 1:
+                    self._set_cached(self._cache_key(namespace, search['base_dn'], lookup_attribute, key),
+                                     dns_by_key[key][0])
 
-        :param user_lookup_attribute_value: The value for the LDAP_GROUPS_USER_LOOKUP_ATTRIBUTE.
-        :type user_lookup_attribute_value: str
+        resolution = DNResolution()
 
-        :raises: **AccountDoesNotExist** if the provided account doesn't exist in the active directory.
-                                         (inherited from _get_user_dn)
-        :raises: **EntryAlreadyExists** if the account already exists in this group. (subclass of ModificationFailed)
-        :raises: **InsufficientPermissions** if the bind user does not have permission to modify this group.
-                                             (subclass of ModificationFailed)
-        :raises: **ModificationFailed** if the modification could not be performed for an unforseen reason.
+        for key, values in values_by_key.items():
+            dns = dns_by_key.get(key, [])
 
-        """
+            for value in values:
+                if not dns:
+                    resolution.missing.append(value)
+                elif len(dns) > 1:
+                    resolution.ambiguous[value] = dns
+                else:
+                    resolution[value] = dns[0]
 
-        add_member = {'member': (MODIFY_ADD, [self._get_user_dn(user_lookup_attribute_value)])}
-        self._attempt_modification("member", user_lookup_attribute_value, add_member)
+        return resolution
 
-    def remove_member(self, user_lookup_attribute_value):
-        """ Attempts to remove a member from the AD group.
+    def resolve_user_dns(self, user_lookup_attribute_values, chunk_size=DEFAULT_LOOKUP_CHUNK_SIZE, page_size=500):
+        """ Searches for many users at once and retrieves their distinguished names. Each chunk of lookup values is
+            resolved with a single paged OR filter search.
+
+        :param user_lookup_attribute_values: The values for the LDAP_GROUPS_USER_LOOKUP_ATTRIBUTE.
+        :type user_lookup_attribute_values: iterable
+        :param chunk_size (optional): The number of values per search filter. (default: 100)
+        :type chunk_size: int
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+
+        :returns: A DNResolution mapping each value to its user's distinguished name. Values that matched no user
+                  are listed in its missing attribute, and values that matched several in its ambiguous attribute.
+
+        """
+
+        return self._resolve_dns(USER_DN, self.USER_BATCH_SEARCH, self.user_lookup_attr,
+                                 user_lookup_attribute_values, chunk_size, page_size)
+
+    def resolve_group_dns(self, group_lookup_attribute_values, chunk_size=DEFAULT_LOOKUP_CHUNK_SIZE, page_size=500):
+        """ Searches for many groups at once and retrieves their distinguished names. Each chunk of lookup values is
+            resolved with a single paged OR filter search.
+
+        :param group_lookup_attribute_values: The values for the LDAP_GROUPS_GROUP_LOOKUP_ATTRIBUTE.
+        :type group_lookup_attribute_values: iterable
+        :param chunk_size (optional): The number of values per search filter. (default: 100)
+        :type chunk_size: int
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+
+        :returns: A DNResolution mapping each value to its group's distinguished name. Values that matched no group
+                  are listed in its missing attribute, and values that matched several in its ambiguous attribute.
+
+        """
+
+        return self._resolve_dns(GROUP_DN, self.GROUP_BATCH_SEARCH, self.group_lookup_attr,
+                                 group_lookup_attribute_values, chunk_size, page_size)
+
+    def _resolve_group_sids(self, sids, chunk_size=DEFAULT_LOOKUP_CHUNK_SIZE):
+        """ Maps binary group SIDs to distinguished names with one OR filter search per chunk of SIDs that aren't
+            already cached. SIDs that don't belong to a group under the base dn are left out.
+
+        :param sids: The binary SIDs to map.
+        :type sids: list
+        :param chunk_size (optional): The number of SIDs per search filter. (default: 100)
+        :type chunk_size: int
+
+        :returns: A list of distinguished names, in the order of the SIDs.
+
+        """
+
+        dns_by_sid = {}
+        uncached_sids = []
+
+        for sid in sids:
+            dn = self._get_cached(self._cache_key(GROUP_SID, self.base_dn, format_sid(sid)))
+
+            if dn:
+                dns_by_sid[sid] = dn
+            else:
+                uncached_sids.append(sid)
+
+        for chunk in chunked(uncached_sids, chunk_size):
+            sid_clauses = "".join("(objectSid={sid})".format(sid=escape_bytes(sid)) for sid in chunk)
+
+            for entry in self._search(self.GROUP_SID_SEARCH, validate=False, sid_clauses=sid_clauses):
+                for sid in entry["raw_attributes"].get("objectSid", []):
+                    dns_by_sid[sid] = entry["dn"]
+                    self._set_cached(self._cache_key(GROUP_SID, self.base_dn, format_sid(sid)), entry["dn"])
+
+        return [dns_by_sid[sid] for sid in sids if sid in dns_by_sid]
+
+    def get_user_groups(self, user_lookup_attribute_value, nested=True, chunk_size=DEFAULT_LOOKUP_CHUNK_SIZE):
+        """ Retrieves the distinguished names of the groups a user is a member of. The result is cached per user,
+            so repeated checks for the same user don't contact the server until the cache entry expires or a
+            membership is changed through an ADGroup.
+
+        :param user_lookup_attribute_value: The value for the LDAP_GROUPS_USER_LOOKUP_ATTRIBUTE.
+        :type user_lookup_attribute_value: str
+        :param nested (optional): True reads the user's tokenGroups with a single base search. Active Directory
+                                  computes tokenGroups from every group the user is in, directly or through nesting;
+                                  it only lists security groups and includes the user's primary group. The SIDs it
+                                  returns are mapped to distinguished names in batches, and the mappings are cached.
+                                  False reads the user's memberOf attribute, which lists the groups the user is
+                                  directly in, in the same search that finds the user. (default: True)
+        :type nested: boolean
+        :param chunk_size (optional): The number of SIDs mapped per search filter. (default: 100)
+        :type chunk_size: int
+
+        :returns: A list of group distinguished names.
+
+        :raises: **AccountDoesNotExist** if the account doesn't exist in the active directory.
+
+        """
+
+        cache_key = self._cache_key(USER_GROUPS, self.user_search_base_dn, self.user_lookup_attr,
+                                    user_lookup_attribute_value.lower(), nested)
+        group_dns = self._get_cached(cache_key)
+
+        if group_dns is not None:
+            return list(group_dns)
+
+        if nested:
+            user_dn = self._get_user_dn(user_lookup_attribute_value, validate=False)
+            results = self._search(dict(self.TOKEN_GROUPS_SEARCH, base_dn=user_dn), validate=False)
+            sids = results[0]["raw_attributes"].get("tokenGroups", []) if results else []
+            group_dns = self._resolve_group_sids(sids, chunk_size)
+        else:
+            results = self._search(self.USER_MEMBER_OF_SEARCH, validate=False,
+                                   lookup_value=escape_query(user_lookup_attribute_value))
+
+            if not results:
+                raise AccountDoesNotExist("The {user_lookup_attribute} provided does not exist in the Active "
+                                          "Directory.".format(user_lookup_attribute=self.user_lookup_attr))
+
+            self._set_cached(self._cache_key(USER_DN, self.user_search_base_dn, self.user_lookup_attr,
+                                             user_lookup_attribute_value.lower()), results[0]["dn"])
+            group_dns = list(results[0]["attributes"].get("memberOf") or [])
+
+        self._set_cached(cache_key, group_dns)
+
+        return list(group_dns)
+
+    def _get_group_members(self, page_size=500):
+        """ Searches for a group and retrieve its members.
+
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+
+        """
+
+        return list(self._iter_group_members(page_size))
+
+    def _iter_nested_group_members(self, page_size=500, member_filter=None, attr_list=None):
+        """ Searches for all members of a group and of the groups nested in it, in a single paged search.
+
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+        :param member_filter (optional): Extra filter clauses the members must match. See _member_search.
+        :type member_filter: str or dict
+        :param attr_list (optional): The attributes to return instead of attr_list.
+        :type attr_list: list
+
+        """
+
+        search = self._member_search(self.NESTED_GROUP_MEMBER_SEARCH, member_filter, attr_list)
+
+        for result in self._iter_paged_search(search, page_size, group_dn=escape_query(self.group_dn)):
+            yield {"dn": result["dn"], "attributes": result["attributes"]}
+
+    def iter_member_dns(self, range_size=None):
+        """ Yields the distinguished names in this group's member attribute. The attribute is read a range of values
+            at a time, so groups with more members than the server returns at once (MaxValRange, 1500 on Active
+            Directory) aren't truncated. Unlike the member info methods, this includes members of any type.
+
+        :param range_size (optional): The number of values to request at a time. By default, the server's limit is
+                                      used.
+        :type range_size: int
+
+        """
+
+        low = 0
+
+        while True:
+            high = "*" if range_size is None else low + range_size - 1
+            search = dict(self.MEMBER_RANGE_SEARCH, attribute_list=[
+                attribute.format(low=low, high=high) for attribute in self.MEMBER_RANGE_SEARCH['attribute_list']
+            ])
+            results = self._search(search)
+
+            if not results:
+                return
+
+            for attribute_name, values in results[0]["attributes"].items():
+                base_name, _separator, value_range = attribute_name.partition(";")
+
+                if base_name.lower() == "member":
+                    break
+            else:
+                # The group has no members
+                return
+
+            for dn in values if isinstance(values, list) else [values]:
+                yield dn
+
+            # The last range ends in '*'. Servers that don't support ranged retrieval return all values at once.
+            range_end = value_range.rpartition("-")[2]
+
+            if not value_range or range_end == "*":
+                return
+
+            low = int(range_end) + 1
+
+    def get_member_dns(self, range_size=None):
+        """ Returns a list of the distinguished names in this group's member attribute.
+
+        :param range_size (optional): The number of values to request at a time. By default, the server's limit is
+                                      used.
+        :type range_size: int
+
+        """
+
+        return list(self.iter_member_dns(range_size))
+
+    def _iter_group_members_by_dn(self, page_size=500, chunk_size=DEFAULT_LOOKUP_CHUNK_SIZE, member_filter=None,
+                                  attr_list=None):
+        """ Reads this group's member attribute and fetches the users in it with batched distinguishedName searches,
+            instead of searching the whole base dn for users whose memberOf contains this group.
+
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+        :param chunk_size (optional): The number of member dns per search filter. (default: 100)
+        :type chunk_size: int
+        :param member_filter (optional): Extra filter clauses the members must match. See _member_search.
+        :type member_filter: str or dict
+        :param attr_list (optional): The attributes to return instead of attr_list.
+        :type attr_list: list
+
+        """
+
+        search = self._member_search(self.MEMBER_DN_SEARCH, member_filter, attr_list)
+
+        for chunk in chunked(self.iter_member_dns(), chunk_size):
+            dn_clauses = "".join("(distinguishedName={dn})".format(dn=escape_query(dn)) for dn in chunk)
+
+            for result in self._iter_paged_search(search, page_size, dn_clauses=dn_clauses):
+                yield {"dn": result["dn"], "attributes": result["attributes"]}
+
+    @staticmethod
+    def _get_info_dict(member):
+        """Converts a member's search result attributes into an info dictionary."""
+
+        info_dict = {}
+
+        for attribute_name in member["attributes"]:
+            raw_attribute = member["attributes"][attribute_name]
+
+            # Pop one-item lists
+            if len(raw_attribute) == 1:
+                raw_attribute = raw_attribute[0]
+
+            info_dict.update({attribute_name: raw_attribute})
+
+        return info_dict
+
+    def _convert_members(self, members, result_type=DICTS, tree=False, attr_list=None):
+        """ Converts member search results into the requested result type. Records and columns are built straight
+            from the search results, without an intermediate dictionary per member.
+
+        :param tree (optional): Whether the members are tree members, whose dictionaries hold exactly the attr_list
+                                attributes. (default: False)
+        :type tree: boolean
+        :param attr_list (optional): The attributes that were requested, if not this group's attr_list.
+        :type attr_list: list
+
+        :returns: A generator of dictionaries or records, or a MemberColumns.
+
+        """
+
+        attr_list = attr_list if attr_list else self.attr_list
+
+        if result_type == DICTS:
+            if tree:
+                return ({attribute: _unwrap(member["attributes"].get(attribute)) for attribute in attr_list}
+                        for member in members)
+
+            return (self._get_info_dict(member) for member in members)
+        elif result_type == RECORDS:
+            record_class = member_record_class(attr_list)
+            return (record_class.from_attributes(member["attributes"]) for member in members)
+        elif result_type == COLUMNS:
+            columns = MemberColumns(attr_list)
+
+            for member in members:
+                columns.append_attributes(member["attributes"])
+
+            return columns
+
+        raise ValueError("Unknown member result type: {result_type}".format(result_type=result_type))
+
+    def _iter_member_results(self, page_size=500, from_member_attribute=False, member_filter=None, attr_list=None):
+        if from_member_attribute:
+            return self._iter_group_members_by_dn(page_size, member_filter=member_filter, attr_list=attr_list)
+
+        return self._iter_group_members(page_size, member_filter, attr_list)
+
+    def iter_member_info(self, page_size=500, from_member_attribute=False, result_type=DICTS, member_filter=None,
+                         attr_list=None):
+        """ Yields member information from the AD group object one page at a time, so memory use doesn't grow with
+            the size of the group.
+
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+        :param from_member_attribute (optional): Set to True to read the group's member attribute and fetch those
+                                                 users by dn, instead of searching the base dn for users that are
+                                                 members of the group. Faster for groups that are small compared to
+                                                 the directory. (default: False)
+        :type from_member_attribute: boolean
+        :param result_type (optional): DICTS yields a dictionary per member. RECORDS yields a MemberRecord (a
+                                       namedtuple of the attr_list attributes), which takes a fraction of the
+                                       memory. (default: DICTS)
+        :type result_type: str
+        :param member_filter (optional): Extra LDAP filter clauses the members must match, so the server does the
+                                         filtering. Either a dictionary mapping attribute names to a value or a list
+                                         of values (any of which matches), which are escaped, or a raw filter
+                                         string such as ENABLED_ACCOUNTS. (default: None)
+        :type member_filter: dict or str
+        :param attr_list (optional): The attributes to return for each member instead of the group's attr_list.
+                                     (default: None)
+        :type attr_list: list
+
+        :returns: A generator of information on members of the AD group based on the LDAP_GROUPS_ATTRIBUTE_LIST
+                  setting or attr_list argument.
+
+        """
+
+        if result_type == COLUMNS:
+            raise ValueError("COLUMNS results can't be iterated one member at a time. Use get_member_info.")
+
+        members = self._iter_member_results(page_size, from_member_attribute, member_filter, attr_list)
+        yield from self._convert_members(members, result_type, attr_list=attr_list)
+
+    def get_member_info(self, page_size=500, from_member_attribute=False, result_type=DICTS, member_filter=None,
+                        attr_list=None):
+        """ Retrieves member information from the AD group object.
+
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+        :param from_member_attribute (optional): Set to True to read the group's member attribute and fetch those
+                                                 users by dn, instead of searching the base dn for users that are
+                                                 members of the group. Faster for groups that are small compared to
+                                                 the directory. (default: False)
+        :type from_member_attribute: boolean
+        :param result_type (optional): DICTS returns a list of dictionaries. RECORDS returns a list of MemberRecords
+                                       (namedtuples of the attr_list attributes). COLUMNS returns a MemberColumns
+                                       with one list per attribute, which takes the least memory. (default: DICTS)
+        :type result_type: str
+        :param member_filter (optional): Extra LDAP filter clauses the members must match, so the server does the
+                                         filtering. Either a dictionary mapping attribute names to a value or a list
+                                         of values (any of which matches), which are escaped, or a raw filter
+                                         string such as ENABLED_ACCOUNTS. (default: None)
+        :type member_filter: dict or str
+        :param attr_list (optional): The attributes to return for each member instead of the group's attr_list.
+                                     (default: None)
+        :type attr_list: list
+
+        :returns: Information on members of the AD group based on the LDAP_GROUPS_ATTRIBUTE_LIST setting or attr_list
+                  argument.
+
+        """
+
+        members = self._convert_members(self._iter_member_results(page_size, from_member_attribute, member_filter,
+                                                                  attr_list), result_type, attr_list=attr_list)
+        return members if result_type == COLUMNS else list(members)
+
+    @staticmethod
+    def _sort_value(member, sort_by):
+        """ Returns a member's sort_by value for sorting, or None if it doesn't have one. Multi-valued attributes sort
+            by their first value.
+
+        """
+
+        value = _unwrap(member["attributes"].get(sort_by))
+
+        if isinstance(value, list):
+            value = value[0] if value else None
+
+        if value is None or value == "":
+            return None
+
+        return str(value).lower()
+
+    def _get_sorted_member_dns(self, sort_by, reverse, page_size=500):
+        """ Returns the dns of this group's members sorted by an attribute, reading only that attribute. The list is
+            cached until this group's membership is changed through ldap_groups or the cache times out.
+
+        """
+
+        cache_key = self._cache_key(MEMBER_PAGES, self.group_dn.lower(), sort_by.lower(), reverse)
+        member_dns = self._get_cached(cache_key)
+
+        if member_dns is not None:
+            return member_dns
+
+        keyed_members = [(self._sort_value(member, sort_by), member["dn"])
+                         for member in self._iter_group_members(page_size, attr_list=[sort_by])]
+
+        # Members without the attribute go last in either direction
+        present = sorted((member for member in keyed_members if member[0] is not None), reverse=reverse)
+        missing = sorted(member for member in keyed_members if member[0] is None)
+        member_dns = [dn for _value, dn in present + missing]
+
+        self._set_cached(cache_key, member_dns)
+
+        return member_dns
+
+    def _get_member_page_by_vlv(self, offset, limit, sort_by, reverse, attr_list=None):
+        """ Asks the server to sort this group's members and return one window of them, using the server side sort
+            and virtual list view controls.
+
+        :returns: A MemberPage, or None if the server doesn't support virtual list views.
+
+        """
+
+        search = dict(self._member_search(self.GROUP_MEMBER_SEARCH, attr_list=attr_list, sort_by=sort_by),
+                      name='MEMBER_PAGE_SEARCH', response_controls={})
+
+        # Virtual list view offsets start at 1, and a content count of 0 makes the offset an absolute position
+        search['controls'] = [server_side_sort_control(sort_by, reverse),
+                              vlv_request_control(offset + 1, 0, limit - 1)]
+
+        try:
+            members = self._search(search, group_dn=escape_query(self.group_dn))
+        except LDAPOperationResult as error:
+            if self.retry_policy.is_retryable(error):
+                raise
+
+            logger.info("{group} can't be paged with a virtual list view, sorting cached member lists instead: "
+                        "{error!r}".format(group=self, error=error))
+            self._virtual_list_view = False
+            return None
+
+        response = search['response_controls'].get(VLV_RESPONSE_CONTROL)
+
+        if not response or not isinstance(response.get('value'), bytes):
+            self._virtual_list_view = False
+            return None
+
+        view = decode_vlv_response(response['value'])
+
+        if view['result'] != 0:
+            self._virtual_list_view = False
+            return None
+
+        # An offset past the end of the list targets the last member instead
+        if view['target_position'] != offset + 1:
+            members = []
+
+        return MemberPage(self._convert_members(members, attr_list=attr_list), offset=offset, limit=limit,
+                          total=view['content_count'], sort_by=sort_by, server_sorted=True)
+
+    def _get_member_page_from_cache(self, offset, limit, sort_by, reverse, page_size=500, attr_list=None):
+        """ Slices a page from this group's cached, sorted member dns and fetches just those members by dn."""
+
+        member_dns = self._get_sorted_member_dns(sort_by, reverse, page_size)
+        page_dns = member_dns[offset:offset + limit]
+        members = {}
+
+        if page_dns:
+            search = self._member_search(self.MEMBER_DN_SEARCH, attr_list=attr_list)
+            dn_clauses = "".join("(distinguishedName={dn})".format(dn=escape_query(dn)) for dn in page_dns)
+
+            for result in self._iter_paged_search(search, page_size, dn_clauses=dn_clauses):
+                members[result["dn"].lower()] = result
+
+        # Members removed since the list was cached are left out
+        ordered_members = [members[dn.lower()] for dn in page_dns if dn.lower() in members]
+
+        return MemberPage(self._convert_members(ordered_members, attr_list=attr_list), offset=offset, limit=limit,
+                          total=len(member_dns), sort_by=sort_by, server_sorted=False)
+
+    def get_member_page(self, offset=0, limit=50, sort_by='displayName', reverse=False, page_size=500,
+                        attr_list=None):
+        """ Retrieves member information for one page of this group's members, sorted by an attribute.
+
+            The page is sorted and sliced by the server with the server side sort and virtual list view controls
+            where they are supported. Otherwise the dns of every member are read once, sorted and cached, so later
+            pages only fetch the members on them.
+
+        :param offset (optional): The position of the first member on the page, starting at 0. (default: 0)
+        :type offset: int
+        :param limit (optional): The number of members on the page. (default: 50)
+        :type limit: int
+        :param sort_by (optional): The attribute to sort the members by. Members without it go last.
+                                   (default: 'displayName')
+        :type sort_by: str
+        :param reverse (optional): Set to True to sort in descending order. (default: False)
+        :type reverse: bool
+        :param page_size (optional): The page size of the searches used when the server can't page the members
+                                     itself. (default: 500)
+        :type page_size: int
+        :param attr_list (optional): The attributes to return for each member instead of the group's attr_list.
+                                     (default: None)
+        :type attr_list: list
+
+        :returns: A MemberPage, a list of member information dictionaries that also has the total number of members.
+
+        """
+
+        if offset < 0 or limit < 1:
+            raise ValueError("A member page needs an offset of at least 0 and a limit of at least 1.")
+
+        if self._virtual_list_view:
+            page = self._get_member_page_by_vlv(offset, limit, sort_by, reverse, attr_list)
+
+            if page is not None:
+                return page
+
+        return self._get_member_page_from_cache(offset, limit, sort_by, reverse, page_size, attr_list)
+
+    def get_nested_member_info(self, page_size=500, result_type=DICTS, member_filter=None, attr_list=None):
+        """ Retrieves member information for every user in this group or in any group nested in it, using a single
+            paged LDAP_MATCHING_RULE_IN_CHAIN search. Only supported by Active Directory.
+
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+        :param result_type (optional): DICTS returns a list of dictionaries. RECORDS returns a list of MemberRecords
+                                       (namedtuples of the attr_list attributes). COLUMNS returns a MemberColumns
+                                       with one list per attribute, which takes the least memory. (default: DICTS)
+        :type result_type: str
+        :param member_filter (optional): Extra LDAP filter clauses the members must match, so the server does the
+                                         filtering. Either a dictionary mapping attribute names to a value or a list
+                                         of values (any of which matches), which are escaped, or a raw filter
+                                         string such as ENABLED_ACCOUNTS. (default: None)
+        :type member_filter: dict or str
+        :param attr_list (optional): The attributes to return for each member instead of the group's attr_list.
+                                     (default: None)
+        :type attr_list: list
+
+        :returns: Information on nested members of the AD group based on the LDAP_GROUPS_ATTRIBUTE_LIST setting or
+                  attr_list argument. Each user is listed once.
+
+        """
+
+        members = self._convert_members(self._iter_nested_group_members(page_size, member_filter, attr_list),
+                                        result_type, attr_list=attr_list)
+        return members if result_type == COLUMNS else list(members)
+
+    def iter_tree_members(self, strategy=BREADTH_FIRST, page_size=500, workers=1, result_type=DICTS,
+                          member_filter=None, attr_list=None):
+        """ Yields all members from this node of the tree down, one group page at a time. Members reached through
+            more than one group are only yielded once.
+
+        :param strategy (optional): BREADTH_FIRST walks the tree one group at a time and works with any server.
+                                    IN_CHAIN fetches all nested members of a group in one search, which only Active
+                                    Directory supports. Organizational units are still walked level by level.
+                                    (default: BREADTH_FIRST)
+        :type strategy: str
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+        :param workers (optional): The number of groups to expand at once. With more than one worker, every group on a
+                                   level of the tree is expanded in parallel on a thread pool, each worker using its
+                                   own pooled connection, and members are yielded a level at a time. Keep this at or
+                                   below the connection pool size. (default: 1)
+        :type workers: int
+        :param result_type (optional): DICTS yields a dictionary per member. RECORDS yields a MemberRecord (a
+                                       namedtuple of the attr_list attributes), which takes a fraction of the
+                                       memory. (default: DICTS)
+        :type result_type: str
+        :param member_filter (optional): Extra LDAP filter clauses the members must match, so the server does the
+                                         filtering. Either a dictionary mapping attribute names to a value or a list
+                                         of values (any of which matches), which are escaped, or a raw filter
+                                         string such as ENABLED_ACCOUNTS. (default: None)
+        :type member_filter: dict or str
+        :param attr_list (optional): The attributes to return for each member instead of the group's attr_list.
+                                     (default: None)
+        :type attr_list: list
+
+        """
+
+        if result_type == COLUMNS:
+            raise ValueError("COLUMNS results can't be iterated one member at a time. Use get_tree_members.")
+
+        members = self._iter_tree_member_results(strategy, page_size, workers, member_filter, attr_list)
+        yield from self._convert_members(members, result_type, tree=True, attr_list=attr_list)
+
+    def _iter_tree_member_results(self, strategy=BREADTH_FIRST, page_size=500, workers=1, member_filter=None,
+                                  attr_list=None):
+        """ Walks the tree and yields the search result of each member with attributes, once per member.
+
+        :returns: A generator of member search results.
+
+        """
+
+        if strategy not in (BREADTH_FIRST, IN_CHAIN):
+            raise ValueError("Unknown tree member strategy: {strategy}".format(strategy=strategy))
+
+        if workers < 1:
+            raise ValueError("At least one worker is required to walk the tree.")
+        elif workers > 1:
+            yield from self._iter_tree_members_in_parallel(strategy, page_size, workers, member_filter, attr_list)
+            return
+
+        walk = _TreeWalk()
+        queue = deque()
+        queue.appendleft(self)
+
+        while len(queue):
+            node = queue.popleft()
+
+            if walk.visit(node):
+                group_type = node._get_group_type()
+
+                if group_type == "organizationalUnit":
+                    # Users can't be members of an OU, only of the groups in it
+                    node_members = iter(())
+                elif strategy == IN_CHAIN:
+                    node_members = node._iter_nested_group_members(page_size, member_filter, attr_list)
+                else:
+                    node_members = node._iter_group_members(page_size, member_filter, attr_list)
+
+                yield from walk.new_members(node_members)
+
+                # Children are expanded after the member search has handed back its connection
+                if group_type == "organizationalUnit" or strategy == BREADTH_FIRST:
+                    queue.extendleft(node.get_children(page_size))
+
+    def _expand_tree_node(self, strategy=BREADTH_FIRST, page_size=500, member_filter=None, attr_list=None):
+        """ Fetches the members of this node of the tree and the children that still need to be walked.
+
+        :returns: A tuple of this node's member search results and its children.
+
+        """
+
+        group_type = self._get_group_type()
+
+        if group_type == "organizationalUnit":
+            # Users can't be members of an OU, only of the groups in it
+            members = []
+        elif strategy == IN_CHAIN:
+            members = list(self._iter_nested_group_members(page_size, member_filter, attr_list))
+        else:
+            members = list(self._iter_group_members(page_size, member_filter, attr_list))
+
+        if group_type == "organizationalUnit" or strategy == BREADTH_FIRST:
+            children = self.get_children(page_size)
+        else:
+            children = []
+
+        return members, children
+
+    def _iter_tree_members_in_parallel(self, strategy, page_size, workers, member_filter=None, attr_list=None):
+        """ Walks the tree a level at a time, expanding every group on a level in parallel on a thread pool.
+
+        :returns: A generator of member search results with attributes, deduplicated.
+
+        """
+
+        walk = _TreeWalk()
+        level = walk.unvisited([self])
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while level:
+                expansions = executor.map(
+                    lambda node: node._expand_tree_node(strategy, page_size, member_filter, attr_list), level
+                )
+                children = []
+
+                for node_members, node_children in expansions:
+                    yield from walk.new_members(node_members)
+                    children.extend(node_children)
+
+                level = walk.unvisited(children)
+
+    def get_tree_members(self, strategy=BREADTH_FIRST, page_size=500, workers=1, result_type=DICTS,
+                         member_filter=None, attr_list=None):
+        """ Retrieves all members from this node of the tree down. Members reached through more than one group are
+            only listed once.
+
+        :param strategy (optional): BREADTH_FIRST walks the tree one group at a time and works with any server.
+                                    IN_CHAIN fetches all nested members of a group in one search, which only Active
+                                    Directory supports. Organizational units are still walked level by level.
+                                    (default: BREADTH_FIRST)
+        :type strategy: str
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+        :param workers (optional): The number of groups to expand at once. With more than one worker, every group on a
+                                   level of the tree is expanded in parallel on a thread pool, each worker using its
+                                   own pooled connection. Keep this at or below the connection pool size. (default: 1)
+        :type workers: int
+        :param result_type (optional): DICTS returns a list of dictionaries. RECORDS returns a list of MemberRecords
+                                       (namedtuples of the attr_list attributes). COLUMNS returns a MemberColumns
+                                       with one list per attribute, which takes the least memory. (default: DICTS)
+        :type result_type: str
+        :param member_filter (optional): Extra LDAP filter clauses the members must match, so the server does the
+                                         filtering. Either a dictionary mapping attribute names to a value or a list
+                                         of values (any of which matches), which are escaped, or a raw filter
+                                         string such as ENABLED_ACCOUNTS. (default: None)
+        :type member_filter: dict or str
+        :param attr_list (optional): The attributes to return for each member instead of the group's attr_list.
+                                     (default: None)
+        :type attr_list: list
+
+        """
+
+        members = self._convert_members(self._iter_tree_member_results(strategy, page_size, workers, member_filter,
+                                                                       attr_list), result_type, tree=True,
+                                        attr_list=attr_list)
+        return members if result_type == COLUMNS else list(members)
+
+    ###############################################################################################################
+    #                                         Group Modification Methods                                          #
+    ###############################################################################################################
+
+    def _attempt_modification(self, target_type, target_identifier, modification):
+        mod_type = list(modification.values())[0][0]
+        action_word = "adding" if mod_type == MODIFY_ADD else "removing"
+        action_prep = "to" if mod_type == MODIFY_ADD else "from"
+
+        description = "{action} {target_type} '{target_id}' {prep} group '{group_dn}'".format(
+            action=action_word,
+            target_type=target_type,
+            target_id=target_identifier,
+            prep=action_prep,
+            group_dn=self.group_dn
+        )
+        message_base = "Error " + description + ": "
+
+        self._ensure_valid()
+
+        # A retry of a single-value modification that fails this way finds the work done, as the connection dropped
+        # after the server applied it. A multi-value modification can fail this way because of any one of its values.
+        single_value = len(list(modification.values())[0][1]) == 1
+        attempt = 1
+
+        while True:
+            try:
+                with self._connection(write=True) as connection, \
+                        track(MODIFY, mod_type, self.group_dn, group_dn=self.group_dn) as operation:
+                    with operation.request():
+                        connection.modify(dn=self.group_dn, changes=modification)
+            except LDAPEntryAlreadyExistsResult:
+                if attempt > 1 and single_value:
+                    break
+
+                raise EntryAlreadyExists(
+                    message_base + "The {target_type} already exists.".format(target_type=target_type)
+                )
+            except LDAPInsufficientAccessRightsResult:
+                raise InsufficientPermissions(
+                    message_base + "The bind user does not have permission to modify this group."
+                )
+            except (LDAPNoSuchAttributeResult, LDAPUnwillingToPerformResult) as error_message:
+                # Active Directory refuses to remove a value that isn't in the group
+                if mod_type == MODIFY_DELETE:
+                    if attempt > 1 and single_value:
+                        break
+
+                    raise EntryNotInGroup(
+                        message_base + "The {target_type} is not in this group.".format(target_type=target_type)
+                    )
+
+                raise ModificationFailed(message_base + str(error_message))
+            except (LDAPException, LDAPExceptionError, LDAPServerUnreachable) as error_message:
+                if self.retry_policy.wait(error_message, attempt, description):
+                    attempt += 1
+                    continue
+
+                if isinstance(error_message, LDAPServerUnreachable):
+                    raise
+
+                raise ModificationFailed(message_base + str(error_message))
+
+            break
+
+        self._invalidate_membership_caches(list(modification.values())[0][1])
+
+    def add_member(self, user_lookup_attribute_value):
+        """ Attempts to add a member to the AD group.
+
+        :param user_lookup_attribute_value: The value for the LDAP_GROUPS_USER_LOOKUP_ATTRIBUTE.
+        :type user_lookup_attribute_value: str
+
+        :raises: **AccountDoesNotExist** if the provided account doesn't exist in the active directory.
+                                         (inherited from _get_user_dn)
+        :raises: **EntryAlreadyExists** if the account already exists in this group. (subclass of ModificationFailed)
+        :raises: **InsufficientPermissions** if the bind user does not have permission to modify this group.
+                                             (subclass of ModificationFailed)
+        :raises: **ModificationFailed** if the modification could not be performed for an unforseen reason.
+
+        """
+
+        add_member = {'member': (MODIFY_ADD, [self._get_user_dn(user_lookup_attribute_value)])}
+        self._attempt_modification("member", user_lookup_attribute_value, add_member)
+
+    def remove_member(self, user_lookup_attribute_value):
+        """ Attempts to remove a member from the AD group.
 
         :param user_lookup_attribute_value: The value for the LDAP_GROUPS_USER_LOOKUP_ATTRIBUTE.
         :type user_lookup_attribute_value: str
 
         :raises: **AccountDoesNotExist** if the provided account doesn't exist in the active directory.
                                          (inherited from _get_user_dn)
+        :raises: **EntryNotInGroup** if the account is not in this group. (subclass of ModificationFailed)
         :raises: **InsufficientPermissions** if the bind user does not have permission to modify this group.
                                              (subclass of ModificationFailed)
         :raises: **ModificationFailed** if the modification could not be performed for an unforseen reason.
@@ -570,7 +2059,7 @@ class ADGroup:
 
         :raises: **GroupDoesNotExist** if the provided group doesn't exist in the active directory.
                                        (inherited from _get_group_dn)
-        :raises: **EntryAlreadyExists** if the child already exists in this group. (subclass of ModificationFailed)
+        :raises: **EntryNotInGroup** if the child is not in this group. (subclass of ModificationFailed)
         :raises: **InsufficientPermissions** if the bind user does not have permission to modify this group.
                                              (subclass of ModificationFailed)
         :raises: **ModificationFailed** if the modification could not be performed for an unforseen reason.
@@ -580,10 +2069,227 @@ class ADGroup:
         remove_child = {'member': (MODIFY_DELETE, [self._get_group_dn(group_lookup_attribute_value)])}
         self._attempt_modification("child", group_lookup_attribute_value, remove_child)
 
+    def _modify_in_chunks(self, target_type, mod_type, dns_by_value, result, chunk_size):
+        """ Applies a membership change to many entries with one multi-value modify per chunk, recording the outcome
+            for each lookup value in result.
+
+        """
+
+        for chunk in chunked(dns_by_value.items(), chunk_size):
+            self._modify_chunk(target_type, mod_type, chunk, result)
+
+    def _modify_chunk(self, target_type, mod_type, chunk, result):
+        """ Modifies a chunk of (lookup value, dn) pairs at once. If the server rejects the chunk, it is split in half
+            until the entries responsible are isolated, so one existing member costs a few extra round trips rather
+            than aborting the batch.
+
+        """
+
+        values = [value for value, _dn in chunk]
+        modification = {'member': (mod_type, [dn for _value, dn in chunk])}
+
+        try:
+            self._attempt_modification(target_type, ", ".join(values), modification)
+        except InsufficientPermissions as error_message:
+            # Every other entry would fail the same way
+            result.failed.update({value: str(error_message) for value in values})
+        except (EntryAlreadyExists, EntryNotInGroup, ModificationFailed) as error_message:
+            if len(chunk) == 1:
+                if isinstance(error_message, (EntryAlreadyExists, EntryNotInGroup)):
+                    result.unchanged.append(values[0])
+                else:
+                    result.failed[values[0]] = str(error_message)
+            else:
+                middle = len(chunk) // 2
+                self._modify_chunk(target_type, mod_type, chunk[:middle], result)
+                self._modify_chunk(target_type, mod_type, chunk[middle:], result)
+        else:
+            result.modified.extend(values)
+
+    def _modify_many(self, target_type, mod_type, lookup_values, chunk_size):
+        """Resolves lookup values in batches and applies a membership change to all of them."""
+
+        if target_type == "member":
+            resolution = self.resolve_user_dns(lookup_values)
+        else:
+            resolution = self.resolve_group_dns(lookup_values)
+
+        result = BatchModificationResult()
+        result.missing.extend(resolution.missing)
+        dns_by_value = dict(resolution)
+
+        # Like add_member and add_child, fall back to the first result of an ambiguous lookup
+        for value, dns in resolution.ambiguous.items():
+            logger.debug("Search returned more than one result: {results}".format(results=dns))
+            dns_by_value[value] = dns[0]
+
+        self._modify_in_chunks(target_type, mod_type, dns_by_value, result, chunk_size)
+
+        return result
+
+    def add_members(self, user_lookup_attribute_values, chunk_size=DEFAULT_MODIFY_CHUNK_SIZE):
+        """ Attempts to add many members to the AD group. Accounts are looked up with a few OR filter searches and
+            added with one modification per chunk. Failures are reported per account instead of being raised.
+
+        :param user_lookup_attribute_values: The values for the LDAP_GROUPS_USER_LOOKUP_ATTRIBUTE.
+        :type user_lookup_attribute_values: iterable
+        :param chunk_size (optional): The number of members added per modification. (default: 500)
+        :type chunk_size: int
+
+        :returns: A BatchModificationResult. Accounts that are already members are reported as unchanged.
+
+        """
+
+        return self._modify_many("member", MODIFY_ADD, user_lookup_attribute_values, chunk_size)
+
+    def remove_members(self, user_lookup_attribute_values, chunk_size=DEFAULT_MODIFY_CHUNK_SIZE):
+        """ Attempts to remove many members from the AD group. Accounts are looked up with a few OR filter searches
+            and removed with one modification per chunk. Failures are reported per account instead of being raised.
+
+        :param user_lookup_attribute_values: The values for the LDAP_GROUPS_USER_LOOKUP_ATTRIBUTE.
+        :type user_lookup_attribute_values: iterable
+        :param chunk_size (optional): The number of members removed per modification. (default: 500)
+        :type chunk_size: int
+
+        :returns: A BatchModificationResult. Accounts that are not members are reported as unchanged.
+
+        """
+
+        return self._modify_many("member", MODIFY_DELETE, user_lookup_attribute_values, chunk_size)
+
+    def add_children(self, group_lookup_attribute_values, chunk_size=DEFAULT_MODIFY_CHUNK_SIZE):
+        """ Attempts to add many children to the AD group. Groups are looked up with a few OR filter searches and
+            added with one modification per chunk. Failures are reported per group instead of being raised.
+
+        :param group_lookup_attribute_values: The values for the LDAP_GROUPS_GROUP_LOOKUP_ATTRIBUTE.
+        :type group_lookup_attribute_values: iterable
+        :param chunk_size (optional): The number of children added per modification. (default: 500)
+        :type chunk_size: int
+
+        :returns: A BatchModificationResult. Groups that are already children are reported as unchanged.
+
+        """
+
+        return self._modify_many("child", MODIFY_ADD, group_lookup_attribute_values, chunk_size)
+
+    def remove_children(self, group_lookup_attribute_values, chunk_size=DEFAULT_MODIFY_CHUNK_SIZE):
+        """ Attempts to remove many children from the AD group. Groups are looked up with a few OR filter searches
+            and removed with one modification per chunk. Failures are reported per group instead of being raised.
+
+        :param group_lookup_attribute_values: The values for the LDAP_GROUPS_GROUP_LOOKUP_ATTRIBUTE.
+        :type group_lookup_attribute_values: iterable
+        :param chunk_size (optional): The number of children removed per modification. (default: 500)
+        :type chunk_size: int
+
+        :returns: A BatchModificationResult. Groups that are not children are reported as unchanged.
+
+        """
+
+        return self._modify_many("child", MODIFY_DELETE, group_lookup_attribute_values, chunk_size)
+
+    def set_members(self, user_lookup_attribute_values, dry_run=False, chunk_size=DEFAULT_MODIFY_CHUNK_SIZE,
+                    page_size=500):
+        """ Makes the AD group's members match a desired set of accounts: accounts that aren't members are added
+            and members that aren't in the set are removed. Only members found to be user accounts are removed, so
+            child groups, contacts, computers, foreign security principals and entries outside the base dn are left
+            alone.
+
+            The current members are read from the member attribute with ranged retrieval and the desired accounts
+            are looked up with a few OR filter searches, so computing the difference takes a handful of round trips
+            however large the group. The changes are then made with one modification per chunk.
+
+        :param user_lookup_attribute_values: The values for the LDAP_GROUPS_USER_LOOKUP_ATTRIBUTE of every account
+                                             that should be a member. An empty set removes every member.
+        :type user_lookup_attribute_values: iterable
+        :param dry_run (optional): Set to True to compute the changes without making them. (default: False)
+        :type dry_run: bool
+        :param chunk_size (optional): The number of members added or removed per modification. (default: 500)
+        :type chunk_size: int
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+
+        :returns: A MembershipReconciliation. Accounts are reported by their lookup value, and its dns attribute maps
+                  each added, removed and unchanged value to the account's dn. Desired accounts that don't exist are
+                  reported as missing and nothing is done for them.
+
+        """
+
+        resolution = self.resolve_user_dns(user_lookup_attribute_values)
+        desired_dns = dict(resolution)
+
+        # Like add_members, fall back to the first result of an ambiguous lookup
+        for value, dns in resolution.ambiguous.items():
+            logger.debug("Search returned more than one result: {results}".format(results=dns))
+            desired_dns[value] = dns[0]
+
+        current_dns = {dn.lower(): dn for dn in self.iter_member_dns()}
+        desired_keys = {dn.lower() for dn in desired_dns.values()}
+
+        result = MembershipReconciliation(dry_run)
+        result.missing.extend(resolution.missing)
+
+        dns_to_add = {}
+
+        for value, dn in desired_dns.items():
+            result.dns[value] = dn
+
+            if dn.lower() in current_dns:
+                result.unchanged.append(value)
+            else:
+                dns_to_add[value] = dn
+
+        candidate_dns = [dn for key, dn in current_dns.items() if key not in desired_keys]
+
+        # Anything the user account search doesn't find is not ours to remove
+        dns_to_remove = {}
+
+        for chunk in chunked(candidate_dns, DEFAULT_LOOKUP_CHUNK_SIZE):
+            dn_clauses = "".join("(distinguishedName={dn})".format(dn=escape_query(dn)) for dn in chunk)
+
+            for entry in self._iter_paged_search(self.USER_ACCOUNT_DN_SEARCH, page_size, dn_clauses=dn_clauses):
+                dn = current_dns.get(entry["dn"].lower(), entry["dn"])
+                value = entry["attributes"].get(self.user_lookup_attr)
+
+                if isinstance(value, list):
+                    value = value[0] if value else None
+
+                # Members without a (distinct) lookup value are reported by dn
+                value = str(value) if value else dn
+
+                if value in result.dns:
+                    value = dn
+
+                dns_to_remove[value] = dn
+                result.dns[value] = dn
+
+        if dry_run:
+            result.added.modified.extend(dns_to_add)
+            result.removed.modified.extend(dns_to_remove)
+        else:
+            self._modify_in_chunks("member", MODIFY_ADD, dns_to_add, result.added, chunk_size)
+            self._modify_in_chunks("member", MODIFY_DELETE, dns_to_remove, result.removed, chunk_size)
+
+        return result
+
     ###################################################################################################################
     #                                         Group Traversal Methods                                                 #
     ###################################################################################################################
 
+    def iter_descendants(self, page_size=500):
+        """ Yields all descendants of this group one page at a time.
+
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+
+        """
+
+        for entry in self._iter_paged_search(self.DESCENDANT_SEARCH, page_size):
+            yield self._group_from_dn(entry["dn"], trusted=True, attributes=entry["attributes"])
+
     def get_descendants(self, page_size=500):
         """ Returns a list of all descendants of this group.
 
@@ -594,25 +2300,10 @@ class ADGroup:
 
         """
 
-        entry_list = self.ldap_connection.extend.standard.paged_search(
-            search_base=self.DESCENDANT_SEARCH['base_dn'],
-            search_filter=self.DESCENDANT_SEARCH['filter_string'],
-            search_scope=self.DESCENDANT_SEARCH['scope'],
-            attributes=self.DESCENDANT_SEARCH['attribute_list'],
-            paged_size=page_size
-        )
+        return list(self.iter_descendants(page_size))
 
-        return [
-            ADGroup(
-                group_dn=entry["dn"], server_uri=self.server_uri, base_dn=self.base_dn,
-                user_lookup_attr=self.user_lookup_attr, group_lookup_attr=self.group_lookup_attr,
-                attr_list=self.attr_list, bind_dn=self.bind_dn, bind_password=self.bind_password,
-                user_search_base_dn=self.user_search_base_dn, group_search_base_dn=self.user_search_base_dn
-            ) for entry in entry_list if entry["type"] == "searchResEntry"
-        ]
-
-    def get_children(self, page_size=500):
-        """ Returns a list of this group's children.
+    def iter_children(self, page_size=500):
+        """ Yields this group's children one page at a time.
 
         :param page_size (optional): Many servers have a limit on the number of results that can be returned.
                                      Paged searches circumvent that limit. Adjust the page_size to be below the
@@ -621,10 +2312,7 @@ class ADGroup:
 
         """
 
-        children = []
-
-        object_class = self.get_attribute("objectClass")
-        group_type = object_class[-1] if object_class else None
+        group_type = self._get_group_type()
 
         if group_type == "group":
             connection_dict = self.GROUP_CHILDREN_SEARCH
@@ -635,35 +2323,25 @@ class ADGroup:
                 group_dn=self.group_dn,
                 group_type=group_type
             ))
-            return []
+            return
 
         try:
-            entry_list = self.ldap_connection.extend.standard.paged_search(
-                search_base=connection_dict['base_dn'],
-                search_filter=connection_dict['filter_string'],
-                search_scope=connection_dict['scope'],
-                attributes=connection_dict['attribute_list'],
-                paged_size=page_size
-            )
+            for result in self._iter_paged_search(connection_dict, page_size):
+                yield self._group_from_dn(result["dn"], trusted=True, attributes=result["attributes"])
         except LDAPInvalidFilterError:
             logger.debug("Invalid Filter!: {filter}".format(filter=connection_dict['filter_string']))
 
-            return []
-        else:
-            results = [result["dn"] for result in entry_list if result["type"] == "searchResEntry"]
-
-            for result in results:
-                children.append(
-                    ADGroup(
-                        group_dn=result, server_uri=self.server_uri, base_dn=self.base_dn,
-                        user_lookup_attr=self.user_lookup_attr, group_lookup_attr=self.group_lookup_attr,
-                        attr_list=self.attr_list, bind_dn=self.bind_dn, bind_password=self.bind_password,
-                        user_search_base_dn=self.user_search_base_dn,
-                        group_search_base_dn=self.user_search_base_dn
-                    )
-                )
+    def get_children(self, page_size=500):
+        """ Returns a list of this group's children.
 
-            return children
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+
+        """
+
+        return list(self.iter_children(page_size))
 
     def child(self, group_name, page_size=500):
         """ Returns the child ad group that matches the provided group_name or none if the child does not exist.
@@ -677,8 +2355,7 @@ class ADGroup:
 
         """
 
-        object_class = self.get_attribute("objectClass")
-        group_type = object_class[-1] if object_class else None
+        group_type = self._get_group_type()
 
         if group_type == "group":
             connection_dict = self.GROUP_SINGLE_CHILD_SEARCH
@@ -690,26 +2367,15 @@ class ADGroup:
             ))
             return []
 
-        entry_list = self.ldap_connection.extend.standard.paged_search(
-            search_base=connection_dict['base_dn'],
-            search_filter=connection_dict['filter_string'].format(child_group_name=escape_query(group_name)),
-            search_scope=connection_dict['scope'],
-            attributes=connection_dict['attribute_list'],
-            paged_size=page_size
-        )
+        entry_list = self._paged_search(connection_dict, page_size, child_group_name=escape_query(group_name))
 
-        results = [result["dn"] for result in entry_list if result["type"] == "searchResEntry"]
+        results = [result["dn"] for result in entry_list]
 
         if len(results) != 1:
             logger.debug("Search returned {count} results: {results}".format(count=len(results), results=results))
 
         if results:
-            return ADGroup(
-                group_dn=results[0], server_uri=self.server_uri, base_dn=self.base_dn,
-                user_lookup_attr=self.user_lookup_attr, group_lookup_attr=self.group_lookup_attr,
-                attr_list=self.attr_list, bind_dn=self.bind_dn, bind_password=self.bind_password,
-                user_search_base_dn=self.user_search_base_dn, group_search_base_dn=self.user_search_base_dn
-            )
+            return self._group_from_dn(results[0], trusted=True, attributes=entry_list[0]["attributes"])
         else:
             return None
 
@@ -721,12 +2387,7 @@ class ADGroup:
             return self
         else:
             parent_dn = self.group_dn.split(",", 1).pop()
-            return ADGroup(
-                group_dn=parent_dn, server_uri=self.server_uri, base_dn=self.base_dn,
-                user_lookup_attr=self.user_lookup_attr, group_lookup_attr=self.group_lookup_attr,
-                attr_list=self.attr_list, bind_dn=self.bind_dn, bind_password=self.bind_password,
-                user_search_base_dn=self.user_search_base_dn, group_search_base_dn=self.user_search_base_dn
-            )
+            return self._group_from_dn(parent_dn)
 
     def ancestor(self, generation):
         """ Returns an ancestor of this group given a generation (up to the DC).
@@ -748,9 +2409,4 @@ class ADGroup:
                 else:
                     ancestor_dn = ancestor_dn.split(",", 1).pop()
 
-            return ADGroup(
-                group_dn=ancestor_dn, server_uri=self.server_uri, base_dn=self.base_dn,
-                user_lookup_attr=self.user_lookup_attr, group_lookup_attr=self.group_lookup_attr,
-                attr_list=self.attr_list, bind_dn=self.bind_dn, bind_password=self.bind_password,
-                user_search_base_dn=self.user_search_base_dn, group_search_base_dn=self.user_search_base_dn
-            )
+            return self._group_from_dn(ancestor_dn)
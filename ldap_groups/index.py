@@ -0,0 +1,352 @@
+"""
+.. module:: ldap_groups.index
+    :synopsis: LDAP Groups In-Memory Membership Index.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from array import array
+import threading
+
+from ldap3 import SUBTREE
+
+from .snapshot import GROUP, USER
+from .utils import as_list
+
+
+def _dn_of(entry):
+    """Accepts a dn or anything with a group_dn, such as an ADGroup or SnapshotADGroup."""
+
+    return getattr(entry, 'group_dn', entry)
+
+
+class MembershipIndex:
+    """
+    An in-memory graph of group membership that answers transitive membership questions without contacting the
+    server.
+
+    Every group and user gets an integer id. Each group's direct members and each entry's direct groups are kept in
+    compact integer arrays, and the transitive closures are computed on first use and memoized until a change
+    made through the index touches them. Groups that are nested in each other are handled.
+
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._dns = []
+        self._groups = set()
+        self._members = []
+        self._member_of = []
+
+        self._nested_members = {}
+        self._nested_groups = {}
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return "<MembershipIndex: " + str(len(self._groups)) + " groups, " + str(len(self)) + " entries>"
+
+    def __len__(self):
+        return len(self._dns)
+
+    def __contains__(self, dn):
+        return _dn_of(dn).lower() in self._ids
+
+    ###############################################################################################################
+    #                                              Loading Methods                                                #
+    ###############################################################################################################
+
+    @classmethod
+    def from_directory(cls, group, search_base_dn=None, page_size=500):
+        """ Builds an index with two paged searches: every group under search_base_dn, then every user under the
+            group's base_dn that is a member of one of them. Only memberOf is requested. Groups outside
+            search_base_dn are not indexed, so nesting through them is not followed.
+
+        :param group: The group whose configuration and connection pool are used for the searches.
+        :type group: ADGroup
+        :param search_base_dn (optional): The root of the subtree whose groups are indexed. Defaults to the group's
+                                          base_dn.
+        :type search_base_dn: str
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+
+        """
+
+        group_search = {
+            'name': 'INDEX_GROUP_SEARCH',
+            'base_dn': search_base_dn if search_base_dn else group.base_dn,
+            'scope': SUBTREE,
+            'filter_string': "(objectClass=group)",
+            'attribute_list': ['memberOf']
+        }
+
+        user_search = {
+            'name': 'INDEX_USER_SEARCH',
+            'base_dn': group.base_dn,
+            'scope': SUBTREE,
+            'filter_string': "(&(objectCategory=user)(memberOf=*))",
+            'attribute_list': ['memberOf']
+        }
+
+        index = cls()
+        group_entries = [(entry["dn"], as_list(entry["attributes"].get("memberOf")))
+                         for entry in group._iter_paged_search(group_search, page_size)]
+
+        for group_dn, _member_of in group_entries:
+            index._add_entry(group_dn, is_group=True)
+
+        for group_dn, member_of in group_entries:
+            index._add_memberships(group_dn, member_of)
+
+        for entry in group._iter_paged_search(user_search, page_size):
+            index._add_memberships(entry["dn"], as_list(entry["attributes"].get("memberOf")), is_group=False)
+
+        return index
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """ Builds an index from a snapshot written by export_snapshot. OUs are not groups, so their edges are
+            skipped.
+
+        :param snapshot: The snapshot to read.
+        :type snapshot: Snapshot
+
+        """
+
+        index = cls()
+        dns = {}
+
+        for entry_id, dn, kind in snapshot._query("SELECT id, dn, kind FROM entries WHERE kind IN (?, ?)",
+                                                  (GROUP, USER)):
+            dns[entry_id] = dn
+            index._add_entry(dn, is_group=kind == GROUP)
+
+        for group_id, member_id in snapshot._query("SELECT parent_id, child_id FROM edges UNION ALL "
+                                                   "SELECT group_id, user_id FROM members"):
+            if group_id in dns and member_id in dns:
+                index._link(index._ids[dns[group_id].lower()], index._ids[dns[member_id].lower()])
+
+        return index
+
+    def _add_entry(self, dn, is_group):
+        """Returns the id of an entry, adding it to the index if necessary."""
+
+        dn_key = dn.lower()
+        entry_id = self._ids.get(dn_key)
+
+        if entry_id is None:
+            entry_id = len(self._dns)
+            self._ids[dn_key] = entry_id
+            self._dns.append(dn)
+            self._members.append(array('l'))
+            self._member_of.append(array('l'))
+
+        if is_group:
+            self._groups.add(entry_id)
+
+        return entry_id
+
+    def _add_memberships(self, member_dn, group_dns, is_group=True):
+        """Links an entry to each of the indexed groups it is a member of."""
+
+        member_id = self._add_entry(member_dn, is_group)
+
+        for group_dn in group_dns:
+            group_id = self._ids.get(group_dn.lower())
+
+            if group_id is not None and group_id in self._groups:
+                self._link(group_id, member_id)
+
+    def _link(self, group_id, member_id):
+        # An entry is in far fewer groups than a large group has members, so the reverse edge is checked
+        if group_id not in self._member_of[member_id]:
+            self._members[group_id].append(member_id)
+            self._member_of[member_id].append(group_id)
+
+    def _unlink(self, group_id, member_id):
+        if group_id in self._member_of[member_id]:
+            self._members[group_id].remove(member_id)
+            self._member_of[member_id].remove(group_id)
+
+    ###############################################################################################################
+    #                                              Closure Methods                                                #
+    ###############################################################################################################
+
+    def _walk(self, start_id, adjacency):
+        """Returns every id reachable from start_id, not counting start_id unless it is part of a cycle."""
+
+        reached = set()
+        stack = list(adjacency[start_id])
+
+        while stack:
+            entry_id = stack.pop()
+
+            if entry_id not in reached:
+                reached.add(entry_id)
+                stack.extend(adjacency[entry_id])
+
+        return reached
+
+    def _get_nested_members(self, group_id):
+        nested_members = self._nested_members.get(group_id)
+
+        if nested_members is None:
+            nested_members = frozenset(self._walk(group_id, self._members))
+            self._nested_members[group_id] = nested_members
+
+        return nested_members
+
+    def _get_nested_groups(self, entry_id):
+        nested_groups = self._nested_groups.get(entry_id)
+
+        if nested_groups is None:
+            nested_groups = frozenset(self._walk(entry_id, self._member_of))
+            self._nested_groups[entry_id] = nested_groups
+
+        return nested_groups
+
+    def _forget_closures(self, group_id, member_id):
+        """Drops the memoized closures that an edge between group_id and member_id is part of."""
+
+        for entry_id in self._walk(group_id, self._member_of) | {group_id}:
+            self._nested_members.pop(entry_id, None)
+
+        for entry_id in self._walk(member_id, self._members) | {member_id}:
+            self._nested_groups.pop(entry_id, None)
+
+    ###############################################################################################################
+    #                                               Query Methods                                                 #
+    ###############################################################################################################
+
+    def is_member(self, member_dn, group_dn, nested=True):
+        """ Determines whether a user or group is a member of a group.
+
+        :param member_dn: The distinguished name of the user or group.
+        :type member_dn: str
+        :param group_dn: The distinguished name of the group, or the group itself.
+        :type group_dn: str
+        :param nested (optional): Whether membership through nested groups counts. (default: True)
+        :type nested: bool
+
+        """
+
+        with self._lock:
+            member_id = self._ids.get(_dn_of(member_dn).lower())
+            group_id = self._ids.get(_dn_of(group_dn).lower())
+
+            if member_id is None or group_id is None:
+                return False
+
+            if nested:
+                return group_id in self._get_nested_groups(member_id)
+
+            return group_id in self._member_of[member_id]
+
+    def groups_of(self, member_dn, nested=True):
+        """ Returns the dns of the groups a user or group is a member of.
+
+        :param member_dn: The distinguished name of the user or group.
+        :type member_dn: str
+        :param nested (optional): Whether to include the groups reached through nested groups. (default: True)
+        :type nested: bool
+
+        """
+
+        with self._lock:
+            member_id = self._ids.get(_dn_of(member_dn).lower())
+
+            if member_id is None:
+                return []
+
+            group_ids = self._get_nested_groups(member_id) if nested else self._member_of[member_id]
+            return [self._dns[group_id] for group_id in group_ids]
+
+    def members_of(self, group_dn, nested=True):
+        """ Returns the dns of the users in a group. Like get_member_info and get_tree_members, nested groups are
+            not listed themselves.
+
+        :param group_dn: The distinguished name of the group, or the group itself.
+        :type group_dn: str
+        :param nested (optional): Whether to include the users of nested groups. (default: True)
+        :type nested: bool
+
+        """
+
+        with self._lock:
+            group_id = self._ids.get(_dn_of(group_dn).lower())
+
+            if group_id is None:
+                return []
+
+            member_ids = self._get_nested_members(group_id) if nested else self._members[group_id]
+            return [self._dns[member_id] for member_id in member_ids if member_id not in self._groups]
+
+    ###############################################################################################################
+    #                                           Modification Methods                                              #
+    ###############################################################################################################
+
+    def add_member(self, group, user_lookup_attribute_value):
+        """ Adds a member to a group with ADGroup.add_member and records the new membership in the index.
+
+        :param group: The group to modify.
+        :type group: ADGroup
+        :param user_lookup_attribute_value: The value for the LDAP_GROUPS_USER_LOOKUP_ATTRIBUTE.
+        :type user_lookup_attribute_value: str
+
+        """
+
+        group.add_member(user_lookup_attribute_value)
+        self._record(group, group._get_user_dn(user_lookup_attribute_value), is_group=False, added=True)
+
+    def remove_member(self, group, user_lookup_attribute_value):
+        """ Removes a member from a group with ADGroup.remove_member and records the change in the index.
+
+        :param group: The group to modify.
+        :type group: ADGroup
+        :param user_lookup_attribute_value: The value for the LDAP_GROUPS_USER_LOOKUP_ATTRIBUTE.
+        :type user_lookup_attribute_value: str
+
+        """
+
+        group.remove_member(user_lookup_attribute_value)
+        self._record(group, group._get_user_dn(user_lookup_attribute_value), is_group=False, added=False)
+
+    def add_child(self, group, group_lookup_attribute_value):
+        """ Adds a child to a group with ADGroup.add_child and records the new nesting in the index.
+
+        :param group: The group to modify.
+        :type group: ADGroup
+        :param group_lookup_attribute_value: The value for the LDAP_GROUPS_GROUP_LOOKUP_ATTRIBUTE.
+        :type group_lookup_attribute_value: str
+
+        """
+
+        group.add_child(group_lookup_attribute_value)
+        self._record(group, group._get_group_dn(group_lookup_attribute_value), is_group=True, added=True)
+
+    def remove_child(self, group, group_lookup_attribute_value):
+        """ Removes a child from a group with ADGroup.remove_child and records the change in the index.
+
+        :param group: The group to modify.
+        :type group: ADGroup
+        :param group_lookup_attribute_value: The value for the LDAP_GROUPS_GROUP_LOOKUP_ATTRIBUTE.
+        :type group_lookup_attribute_value: str
+
+        """
+
+        group.remove_child(group_lookup_attribute_value)
+        self._record(group, group._get_group_dn(group_lookup_attribute_value), is_group=True, added=False)
+
+    def _record(self, group, member_dn, is_group, added):
+        with self._lock:
+            group_id = self._add_entry(group.group_dn, is_group=True)
+            member_id = self._add_entry(member_dn, is_group)
+
+            self._forget_closures(group_id, member_id)
+
+            if added:
+                self._link(group_id, member_id)
+            else:
+                self._unlink(group_id, member_id)
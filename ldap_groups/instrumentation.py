@@ -0,0 +1,273 @@
+"""
+.. module:: ldap_groups.instrumentation
+    :synopsis: LDAP Groups Operation Instrumentation.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from contextlib import contextmanager
+import logging
+import threading
+import time
+
+from .exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+# Operation types
+SEARCH = "search"
+PAGED_SEARCH = "paged_search"
+MODIFY = "modify"
+
+
+class Operation:
+    """
+    A record of one LDAP operation sent on behalf of an ADGroup. A paged search is a single operation made up of
+    several round trips, and its duration only counts the time spent waiting on the server.
+
+    """
+
+    def __init__(self, operation_type, template, base_dn, search_filter=None, group_dn=None):
+        """ Create an operation record.
+
+        :param operation_type: SEARCH, PAGED_SEARCH or MODIFY.
+        :type operation_type: str
+        :param template: The name of the search template used, e.g. 'GROUP_MEMBER_SEARCH', or the modification type.
+        :type template: str
+        :param base_dn: The dn searched from or modified.
+        :type base_dn: str
+        :param search_filter: The search filter sent, if any.
+        :type search_filter: str
+        :param group_dn: The dn of the group that sent the operation.
+        :type group_dn: str
+
+        """
+
+        self.operation_type = operation_type
+        self.template = template
+        self.base_dn = base_dn
+        self.search_filter = search_filter
+        self.group_dn = group_dn
+
+        self.round_trips = 0
+        self.entries = 0
+        self.bytes = 0
+        self.duration = 0.0
+        self.error = None
+
+    def __repr__(self):
+        return "<Operation: {type} {template} ({round_trips} round trips, {entries} entries, {duration:.3f}s)>".format(
+            type=self.operation_type, template=self.template, round_trips=self.round_trips, entries=self.entries,
+            duration=self.duration
+        )
+
+    @property
+    def pages(self):
+        """The number of pages a paged search took. Every other operation is a single page."""
+
+        return self.round_trips
+
+    @contextmanager
+    def request(self):
+        """Times one round trip to the server."""
+
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.duration += time.perf_counter() - start
+            self.round_trips += 1
+
+    def add_response(self, response):
+        """ Counts the entries and bytes in a response. Skipped when no hook is listening.
+
+        :param response: An ldap3 connection response.
+        :type response: list
+
+        """
+
+        if not _hooks:
+            return
+
+        for entry in response or []:
+            if entry["type"] == "searchResEntry":
+                self.entries += 1
+                self.bytes += len(entry["dn"])
+
+                for values in entry.get("raw_attributes", {}).values():
+                    self.bytes += sum(len(value) for value in values or [])
+
+    def as_dict(self):
+        return {
+            'operation_type': self.operation_type,
+            'template': self.template,
+            'base_dn': self.base_dn,
+            'search_filter': self.search_filter,
+            'group_dn': self.group_dn,
+            'round_trips': self.round_trips,
+            'pages': self.pages,
+            'entries': self.entries,
+            'bytes': self.bytes,
+            'duration': self.duration,
+            'error': repr(self.error) if self.error else None,
+        }
+
+
+_hooks = []
+_hooks_lock = threading.Lock()
+
+
+def add_hook(hook):
+    """ Registers a hook that is called with an Operation after every LDAP operation an ADGroup sends.
+
+    :param hook: A callable that takes an Operation. Exceptions it raises are logged and otherwise ignored.
+    :type hook: callable
+
+    """
+
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks.append(hook)
+
+
+def remove_hook(hook):
+    """Unregisters a hook. Hooks that aren't registered are ignored."""
+
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def clear_hooks():
+    """Unregisters every hook."""
+
+    with _hooks_lock:
+        del _hooks[:]
+
+
+def emit(operation):
+    """Passes a finished operation to every hook."""
+
+    for hook in list(_hooks):
+        try:
+            hook(operation)
+        except Exception:
+            logger.exception("Instrumentation hook {hook} failed.".format(hook=hook))
+
+
+@contextmanager
+def track(operation_type, template, base_dn, search_filter=None, group_dn=None):
+    """ Records an operation for the duration of a with block and emits it once the block exits.
+
+    :returns: The Operation being recorded. Time round trips with operation.request() and count results with
+              operation.add_response().
+
+    """
+
+    operation = Operation(operation_type, template, base_dn, search_filter, group_dn)
+
+    try:
+        yield operation
+    except Exception as error:
+        operation.error = error
+        raise
+    finally:
+        if _hooks:
+            emit(operation)
+
+
+@contextmanager
+def record_operations():
+    """ Collects every operation sent during a with block.
+
+    :returns: The list the operations are appended to.
+
+    """
+
+    operations = []
+    add_hook(operations.append)
+
+    try:
+        yield operations
+    finally:
+        remove_hook(operations.append)
+
+
+class LoggingHook:
+    """Logs every operation as a structured record. The operation's fields are in the record's ldap_operation."""
+
+    def __init__(self, logger_name="ldap_groups.operations", level=logging.DEBUG):
+        self.logger = logging.getLogger(logger_name)
+        self.level = level
+
+    def __call__(self, operation):
+        if self.logger.isEnabledFor(self.level):
+            fields = operation.as_dict()
+            message = ("{operation_type} {template} on {base_dn}: {round_trips} round trips, {entries} entries, "
+                       "{bytes} bytes in {duration:.3f}s").format(**fields)
+
+            self.logger.log(self.level, message, extra={'ldap_operation': fields})
+
+
+class StatsdHook:
+    """
+    Sends counters and timings to a StatsD-style client, i.e. any object with incr(name, count) and
+    timing(name, milliseconds) methods. Metric names are prefix.operation_type.template.metric.
+
+    """
+
+    def __init__(self, client, prefix="ldap_groups"):
+        self.client = client
+        self.prefix = prefix
+
+    def __call__(self, operation):
+        name = "{prefix}.{type}.{template}".format(prefix=self.prefix, type=operation.operation_type,
+                                                   template=operation.template)
+
+        self.client.incr(name + ".operations", 1)
+        self.client.incr(name + ".round_trips", operation.round_trips)
+        self.client.incr(name + ".entries", operation.entries)
+        self.client.incr(name + ".bytes", operation.bytes)
+        self.client.timing(name + ".duration", operation.duration * 1000)
+
+        if operation.error:
+            self.client.incr(name + ".errors", 1)
+
+
+class PrometheusHook:
+    """Records operations in Prometheus counters and a duration histogram, labelled by operation type and template."""
+
+    def __init__(self, registry=None, namespace="ldap_groups"):
+        try:
+            from prometheus_client import Counter, Histogram, REGISTRY
+        except ImportError:
+            raise ImproperlyConfigured("PrometheusHook requires the prometheus_client package.")
+
+        registry = registry if registry is not None else REGISTRY
+        labels = ["operation_type", "template"]
+
+        self.operations = Counter("operations", "LDAP operations sent.", labels, namespace=namespace,
+                                  registry=registry)
+        self.round_trips = Counter("round_trips", "LDAP round trips.", labels, namespace=namespace,
+                                   registry=registry)
+        self.entries = Counter("entries", "LDAP entries returned.", labels, namespace=namespace, registry=registry)
+        self.bytes = Counter("bytes", "LDAP attribute bytes returned.", labels, namespace=namespace,
+                             registry=registry)
+        self.errors = Counter("errors", "LDAP operations that failed.", labels, namespace=namespace,
+                              registry=registry)
+        self.duration = Histogram("duration_seconds", "Time spent waiting on the LDAP server.", labels,
+                                  namespace=namespace, registry=registry)
+
+    def __call__(self, operation):
+        labels = (operation.operation_type, operation.template)
+
+        self.operations.labels(*labels).inc()
+        self.round_trips.labels(*labels).inc(operation.round_trips)
+        self.entries.labels(*labels).inc(operation.entries)
+        self.bytes.labels(*labels).inc(operation.bytes)
+        self.duration.labels(*labels).observe(operation.duration)
+
+        if operation.error:
+            self.errors.labels(*labels).inc()
@@ -0,0 +1,617 @@
+"""
+.. module:: ldap_groups.pool
+    :synopsis: LDAP Groups Connection Pooling.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from contextlib import contextmanager
+import hashlib
+import itertools
+import logging
+import threading
+import time
+
+from ldap3 import Server, Connection, BASE
+from ldap3.core.exceptions import (LDAPInvalidServerError, LDAPInvalidCredentialsResult, LDAPException,
+                                   LDAPCommunicationError, LDAPOperationResult)
+
+from .exceptions import InvalidCredentials, LDAPServerUnreachable, ConnectionPoolExhausted
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_IDLE_TIMEOUT = 300
+DEFAULT_CHECKOUT_TIMEOUT = 30
+DEFAULT_HEALTH_CHECK_INTERVAL = 60
+
+# Server selection strategies
+ROUND_ROBIN = "round_robin"
+LEAST_LATENCY = "least_latency"
+FIRST_AVAILABLE = "first_available"
+SERVER_STRATEGIES = (ROUND_ROBIN, LEAST_LATENCY, FIRST_AVAILABLE)
+
+DEFAULT_SERVER_STRATEGY = ROUND_ROBIN
+DEFAULT_SERVER_RETRY_INTERVAL = 30
+
+# The weight of the newest sample in a server's moving average latency
+LATENCY_SMOOTHING = 0.3
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of bound LDAP connections.
+
+    Connections are created on demand up to the pool size, handed out by checkout() and returned with checkin().
+    Idle connections that have outlived the idle timeout or are no longer bound are discarded instead of reused.
+    Servers and load balancers often drop idle sockets without the client noticing, so a connection that has been
+    idle for longer than the health check interval reads the rootDSE before it is handed out, and is replaced if
+    the read fails.
+
+    """
+
+    def __init__(self, server_uri, bind_dn=None, bind_password=None, size=DEFAULT_POOL_SIZE,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, checkout_timeout=DEFAULT_CHECKOUT_TIMEOUT,
+                 connection_options=None, health_check_interval=DEFAULT_HEALTH_CHECK_INTERVAL):
+        """ Create a connection pool. No connections are opened until the first checkout.
+
+        :param server_uri: The ldap server uri or an ldap3 Server object.
+        :type server_uri: str
+        :param bind_dn: A user used to bind to the AD.
+        :type bind_dn: str
+        :param bind_password: The bind user's password.
+        :type bind_password: str
+        :param size (optional): The maximum number of connections that may be checked out at once. (default: 10)
+        :type size: int
+        :param idle_timeout (optional): The number of seconds an unused connection is kept before it is discarded.
+                                        (default: 300)
+        :type idle_timeout: int
+        :param checkout_timeout (optional): The number of seconds to wait for a free connection. (default: 30)
+        :type checkout_timeout: int
+        :param connection_options (optional): Extra keyword arguments passed to each ldap3 Connection.
+        :type connection_options: dict
+        :param health_check_interval (optional): The number of seconds a connection can be idle before its socket is
+                                                 checked at checkout. (default: 60)
+        :type health_check_interval: int
+
+        """
+
+        self.server_uri = server_uri
+        self.bind_dn = bind_dn
+        self.bind_password = bind_password
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.connection_options = connection_options if connection_options else {}
+        self.health_check_interval = health_check_interval
+        self.closed = False
+        self.retired = False
+
+        self._server = server_uri if isinstance(server_uri, Server) else Server(server_uri)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+        if not (self.bind_dn and self.bind_password):
+            logger.warning("LDAP Bind Credentials are not set. Group modification methods will most likely fail.")
+
+    def __repr__(self):
+        return "<ConnectionPool: " + str(self.server_uri) + " (" + str(self.bind_dn) + ")>"
+
+    def _create_connection(self):
+        """Opens and binds a new connection."""
+
+        if self.bind_dn and self.bind_password:
+            credentials = {'user': self.bind_dn, 'password': self.bind_password}
+        else:
+            credentials = {}
+
+        try:
+            connection = Connection(self._server, auto_bind=True, raise_exceptions=True,
+                                    **dict(self.connection_options, **credentials))
+
+            # Strategies without a real server behind them (e.g. MOCK_SYNC) skip auto_bind
+            if not connection.bound:
+                connection.bind()
+        except LDAPInvalidServerError:
+            raise LDAPServerUnreachable("The LDAP server is down or the SERVER_URI is invalid.")
+        except LDAPInvalidCredentialsResult:
+            raise InvalidCredentials("The SERVER_URI, BIND_DN, or BIND_PASSWORD provided is not valid.")
+
+        return connection
+
+    @staticmethod
+    def _is_healthy(connection):
+        """Determines whether a connection can be handed out again."""
+
+        return not connection.closed and connection.bound
+
+    @staticmethod
+    def _is_alive(connection):
+        """Reads the rootDSE to check that an idle connection's socket still reaches the server."""
+
+        try:
+            connection.search(search_base='', search_filter='(objectClass=*)', search_scope=BASE, attributes=['1.1'])
+        except LDAPOperationResult:
+            # The server answered, if only with an error
+            return True
+        except LDAPException:
+            return False
+
+        return True
+
+    @staticmethod
+    def _discard(connection):
+        try:
+            connection.unbind()
+        except LDAPException:
+            pass
+
+    def _pop_idle(self):
+        """Returns the most recently used healthy idle connection, or None if there isn't one."""
+
+        while True:
+            now = time.time()
+            stale = []
+            connection = None
+
+            with self._lock:
+                while self._idle:
+                    candidate, last_used = self._idle.pop()
+
+                    if now - last_used > self.idle_timeout or not self._is_healthy(candidate):
+                        stale.append(candidate)
+                    else:
+                        connection = candidate
+                        break
+
+            for stale_connection in stale:
+                self._discard(stale_connection)
+
+            # The liveness check is a round trip, so it is made outside the lock and only after a long idle
+            if connection is None or now - last_used <= self.health_check_interval or self._is_alive(connection):
+                return connection
+
+            logger.info("Discarding a connection to {uri} that was dropped while idle.".format(uri=self.server_uri))
+            self._discard(connection)
+
+    def checkout(self):
+        """ Checks a bound connection out of the pool, opening a new one if no idle connection is available.
+
+        :raises: **ConnectionPoolExhausted** if no connection frees up within the checkout timeout.
+
+        """
+
+        if self.closed:
+            raise ConnectionPoolExhausted("The connection pool for {uri} is closed.".format(uri=self.server_uri))
+
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise ConnectionPoolExhausted("No connection to {uri} became available within {timeout} "
+                                          "seconds.".format(uri=self.server_uri, timeout=self.checkout_timeout))
+
+        try:
+            connection = self._pop_idle()
+
+            if connection is None:
+                connection = self._create_connection()
+        except Exception:
+            self._slots.release()
+            raise
+
+        return connection
+
+    def checkin(self, connection):
+        """ Returns a connection to the pool. Connections that are no longer healthy are discarded.
+
+        :param connection: A connection previously returned by checkout().
+        :type connection: ldap3.Connection
+
+        """
+
+        try:
+            if self.closed or self.retired or not self._is_healthy(connection):
+                self._discard(connection)
+            else:
+                with self._lock:
+                    self._idle.append((connection, time.time()))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Checks out a connection for the duration of a with block."""
+
+        connection = self.checkout()
+
+        try:
+            yield connection
+        finally:
+            self.checkin(connection)
+
+    def _discard_idle(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+
+        for connection, _last_used in idle:
+            self._discard(connection)
+
+    def retire(self):
+        """ Stops keeping connections open once they are checked back in and unbinds the idle ones, e.g. because
+            they are bound with a password that has since changed. Unlike close(), checkouts still work, so anything
+            still holding the pool keeps working with a new connection each time.
+
+        """
+
+        self.retired = True
+        self._discard_idle()
+
+    def close(self):
+        """Unbinds all idle connections. Checked-out connections are unbound when they are checked back in."""
+
+        self.closed = True
+        self._discard_idle()
+
+
+class _ServerState:
+    """What a MultiServerPool knows about the health of one of its servers."""
+
+    def __init__(self):
+        self.latency = None
+        self.failures = 0
+        self.down_until = 0
+
+
+class MultiServerPool:
+    """
+    A connection pool that spreads connections across several domain controllers, each with its own ConnectionPool.
+
+    Each checkout orders the servers by the pool's strategy: ROUND_ROBIN rotates through them, LEAST_LATENCY prefers
+    the server whose searches and modifications have taken the shortest time on average, and FIRST_AVAILABLE always
+    prefers the first server listed. A server that can't be reached, or whose connection is checked in broken, is
+    skipped for retry_interval seconds. If every server is down they are all still tried, soonest to recover first.
+
+    Writes can be pinned to one server so that a change is read back from the DC it was made on. Searches then go
+    to the other servers, and only fall back to the write server when the others are down.
+
+    """
+
+    def __init__(self, pools, strategy=DEFAULT_SERVER_STRATEGY, write_server_uri=None,
+                 retry_interval=DEFAULT_SERVER_RETRY_INTERVAL):
+        """ Create a multi-server pool.
+
+        :param pools: One connection pool per server, in order of preference.
+        :type pools: list
+        :param strategy (optional): How a server is chosen for each checkout. One of ROUND_ROBIN, LEAST_LATENCY or
+                                    FIRST_AVAILABLE. (default: ROUND_ROBIN)
+        :type strategy: str
+        :param write_server_uri (optional): The uri of the server that writes are sent to. By default writes are
+                                            spread like searches.
+        :type write_server_uri: str
+        :param retry_interval (optional): The number of seconds a failed server is skipped for. (default: 30)
+        :type retry_interval: int
+
+        """
+
+        if not pools:
+            raise ValueError("A multi-server pool needs at least one server.")
+
+        if strategy not in SERVER_STRATEGIES:
+            raise ValueError("Unknown server strategy '{strategy}'. Use one of {strategies}.".format(
+                strategy=strategy, strategies=", ".join(SERVER_STRATEGIES)
+            ))
+
+        self.pools = list(pools)
+        self.strategy = strategy
+        self.retry_interval = retry_interval
+
+        self._write_index = None
+
+        if write_server_uri is not None:
+            server_uris = [pool.server_uri for pool in self.pools]
+
+            if write_server_uri not in server_uris:
+                raise ValueError("The write server {uri} is not one of the pool's servers.".format(
+                    uri=write_server_uri
+                ))
+
+            self._write_index = server_uris.index(write_server_uri)
+
+        self._states = [_ServerState() for _pool in self.pools]
+        self._checked_out = {}
+        self._rotation = itertools.count()
+        self._pinned = threading.local()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<MultiServerPool: " + ", ".join(str(pool.server_uri) for pool in self.pools) + \
+               " (" + str(self.bind_dn) + ")>"
+
+    @property
+    def server_uri(self):
+        return [pool.server_uri for pool in self.pools]
+
+    @property
+    def bind_dn(self):
+        return self.pools[0].bind_dn
+
+    @property
+    def bind_password(self):
+        return self.pools[0].bind_password
+
+    @property
+    def closed(self):
+        return all(pool.closed for pool in self.pools)
+
+    def _candidates(self, write):
+        """Returns the indexes of the servers to try, in order."""
+
+        pinned_index = getattr(self._pinned, 'index', None)
+
+        if pinned_index is not None:
+            return [pinned_index]
+
+        now = time.time()
+
+        with self._lock:
+            indexes = [index for index in range(len(self.pools)) if index != self._write_index]
+
+            if self.strategy == ROUND_ROBIN and indexes:
+                offset = next(self._rotation) % len(indexes)
+                indexes = indexes[offset:] + indexes[:offset]
+            elif self.strategy == LEAST_LATENCY:
+                # Servers without a measurement yet go first so that they get one
+                indexes.sort(key=lambda index: self._states[index].latency or 0)
+
+            if self._write_index is not None:
+                indexes = [self._write_index] + indexes if write else indexes + [self._write_index]
+
+            available = [index for index in indexes if self._states[index].down_until <= now]
+            down = sorted((index for index in indexes if self._states[index].down_until > now),
+                          key=lambda index: self._states[index].down_until)
+
+        return available + down
+
+    def _mark_down(self, index, reason):
+        with self._lock:
+            state = self._states[index]
+            state.failures += 1
+            state.down_until = time.time() + self.retry_interval
+
+        logger.warning("Skipping {uri} for {interval} seconds: {reason}".format(
+            uri=self.pools[index].server_uri, interval=self.retry_interval, reason=reason
+        ))
+
+    def _record_latency(self, index, latency=None):
+        """Marks a server healthy and, if a round trip was timed, counts its average time towards its latency."""
+
+        with self._lock:
+            state = self._states[index]
+            state.failures = 0
+            state.down_until = 0
+
+            if latency is None:
+                return
+            elif state.latency is None:
+                state.latency = latency
+            else:
+                state.latency = LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * state.latency
+
+    def checkout(self, write=False):
+        """ Checks a bound connection out of the first server that can provide one.
+
+        :param write (optional): Whether the connection is for a write, which goes to the write server if one is
+                                 set. (default: False)
+        :type write: bool
+
+        :raises: **LDAPServerUnreachable** or **ConnectionPoolExhausted** if no server can provide a connection.
+
+        """
+
+        error = None
+
+        for index in self._candidates(write):
+            try:
+                connection = self.pools[index].checkout()
+            except (LDAPServerUnreachable, LDAPCommunicationError) as server_error:
+                self._mark_down(index, repr(server_error))
+                error = server_error
+                continue
+            except ConnectionPoolExhausted as exhausted_error:
+                error = exhausted_error
+                continue
+
+            self._time_round_trips(connection)
+
+            with self._lock:
+                self._checked_out[id(connection)] = index
+
+            return connection
+
+        raise error
+
+    @staticmethod
+    def _time_round_trips(connection):
+        """ Times each search and modify a connection sends, once per connection. Only the round trips count, not
+            the time a caller holds the connection for, such as while it consumes a paged search's results.
+
+        """
+
+        if hasattr(connection, '_round_trip_times'):
+            return
+
+        round_trip_times = connection._round_trip_times = []
+
+        def timed(operation):
+            def send(*args, **kwargs):
+                started = time.time()
+
+                try:
+                    return operation(*args, **kwargs)
+                finally:
+                    round_trip_times.append(time.time() - started)
+
+            return send
+
+        connection.search = timed(connection.search)
+        connection.modify = timed(connection.modify)
+
+    def checkin(self, connection):
+        """ Returns a connection to the pool of the server it came from. A connection that comes back broken marks
+            its server down; otherwise the average time of the round trips it made counts towards the server's
+            latency.
+
+        :param connection: A connection previously returned by checkout().
+        :type connection: ldap3.Connection
+
+        """
+
+        with self._lock:
+            index = self._checked_out.pop(id(connection))
+
+        pool = self.pools[index]
+        round_trip_times = connection._round_trip_times
+        latency = sum(round_trip_times) / len(round_trip_times) if round_trip_times else None
+        del round_trip_times[:]
+
+        if pool._is_healthy(connection):
+            self._record_latency(index, latency)
+        elif not pool.closed:
+            self._mark_down(index, "a connection to it was dropped")
+
+        pool.checkin(connection)
+
+    @contextmanager
+    def connection(self):
+        """Checks out a connection for reading for the duration of a with block."""
+
+        connection = self.checkout()
+
+        try:
+            yield connection
+        finally:
+            self.checkin(connection)
+
+    @contextmanager
+    def write_connection(self):
+        """Checks out a connection to the write server for the duration of a with block."""
+
+        connection = self.checkout(write=True)
+
+        try:
+            yield connection
+        finally:
+            self.checkin(connection)
+
+    @contextmanager
+    def pinned(self):
+        """ Sends every checkout made by the current thread within a with block to one server: the write server if
+            one is set, otherwise the first server the strategy picks. Use it for work that has to see one DC's view
+            of the directory, such as reading a DC's highestCommittedUSN and then searching for changes above it.
+
+        """
+
+        if getattr(self._pinned, 'index', None) is not None:
+            yield
+            return
+
+        self._pinned.index = self._candidates(write=True)[0]
+
+        try:
+            yield
+        finally:
+            self._pinned.index = None
+
+    def server_health(self):
+        """ Returns what the pool knows about each server: whether it is available, its moving average latency in
+            seconds (None until it has been used), and the number of consecutive failures.
+
+        """
+
+        now = time.time()
+
+        with self._lock:
+            return {
+                str(pool.server_uri): {
+                    'available': state.down_until <= now,
+                    'latency': state.latency,
+                    'failures': state.failures,
+                } for pool, state in zip(self.pools, self._states)
+            }
+
+    def retire(self):
+        """Retires the pool of every server."""
+
+        for pool in self.pools:
+            pool.retire()
+
+    def close(self):
+        """Closes the pool of every server."""
+
+        for pool in self.pools:
+            pool.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(server_uri, bind_dn=None, bind_password=None, size=DEFAULT_POOL_SIZE, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+             strategy=DEFAULT_SERVER_STRATEGY, write_server_uri=None):
+    """ Returns the shared connection pool for a server uri and bind dn, creating it if necessary.
+
+    A list of server uris gets a MultiServerPool with a pool of the given size for each server, chosen between with
+    the strategy and write_server_uri. The size, idle_timeout, strategy and write_server_uri only take effect when
+    the pool is created. Pools are also keyed by a hash of the bind password, so a group created with another
+    password gets its own pool and never closes one that other groups are using. The pools of the old password are
+    retired instead: they are forgotten and their idle connections unbound, but groups still holding them keep
+    working.
+
+    """
+
+    if isinstance(server_uri, (list, tuple)) and len(server_uri) == 1:
+        server_uri = server_uri[0]
+
+    multiple_servers = isinstance(server_uri, (list, tuple))
+    password_hash = hashlib.sha256(bind_password.encode('utf-8')).hexdigest() if bind_password else None
+
+    if multiple_servers:
+        key = (tuple(server_uri), bind_dn, password_hash, strategy, write_server_uri)
+    else:
+        key = (server_uri, bind_dn, password_hash)
+
+    superseded = []
+
+    with _pools_lock:
+        pool = _pools.get(key)
+
+        if pool is None or pool.closed:
+            if multiple_servers:
+                pool = MultiServerPool([ConnectionPool(uri, bind_dn, bind_password, size=size,
+                                                       idle_timeout=idle_timeout) for uri in server_uri],
+                                       strategy=strategy, write_server_uri=write_server_uri)
+            else:
+                pool = ConnectionPool(server_uri, bind_dn, bind_password, size=size, idle_timeout=idle_timeout)
+
+            # A new password for the same servers and bind dn supersedes the old one
+            for other_key in list(_pools):
+                if other_key[:2] == key[:2] and other_key[2] != password_hash:
+                    superseded.append(_pools.pop(other_key))
+
+            _pools[key] = pool
+
+    for superseded_pool in superseded:
+        superseded_pool.retire()
+
+    return pool
+
+
+def close_pools():
+    """Closes and forgets every shared connection pool."""
+
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,185 @@
+"""
+.. module:: ldap_groups.registry
+    :synopsis: LDAP Groups Shared Group Registry.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+import logging
+import threading
+
+from .cache import ATTRIBUTES
+from .groups import ADGroup
+
+logger = logging.getLogger(__name__)
+
+# Refresh well within the pool's idle timeout so the connections the groups use stay open
+DEFAULT_REFRESH_INTERVAL = 240
+
+
+def _freeze(value):
+    """Makes ADGroup arguments hashable so they can be part of a registry key."""
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    elif isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+
+    return value
+
+
+class GroupRegistry:
+    """
+    Long-lived ADGroup instances shared by every thread, keyed by dn and constructor arguments.
+
+    Groups are created lazily, so getting one from the registry never contacts the server. Warming a group
+    validates it (and opens a pooled connection) ahead of time, and refreshing re-validates every group and forgets
+    the attributes it has read, so long-lived groups don't serve stale attributes.
+
+    """
+
+    def __init__(self):
+        self._groups = {}
+        self._lock = threading.Lock()
+
+        self._refresh_thread = None
+        self._stop_refreshing = threading.Event()
+
+    def __len__(self):
+        return len(self._groups)
+
+    def __repr__(self):
+        return "<GroupRegistry: " + str(len(self)) + " groups>"
+
+    def get_group(self, group_dn, **kwargs):
+        """ Returns the shared ADGroup for a dn and configuration, creating it if necessary. Settings are only read
+            when the group is created.
+
+        :param group_dn: The distinguished name of the group.
+        :type group_dn: str
+        :param kwargs: Any other ADGroup arguments. Groups with different arguments are different registry entries.
+
+        """
+
+        key = (group_dn.lower(), _freeze(kwargs))
+
+        with self._lock:
+            group = self._groups.get(key)
+
+            if group is None:
+                group = ADGroup(group_dn, **dict(kwargs, lazy=True))
+                self._groups[key] = group
+
+        return group
+
+    def warm(self, group_dns, **kwargs):
+        """ Creates and validates groups ahead of their first use.
+
+        :param group_dns: The distinguished names of the groups.
+        :type group_dns: list
+        :param kwargs: Any other ADGroup arguments, as passed to get_group.
+
+        :returns: The warmed groups.
+
+        :raises: **InvalidGroupDN** if one of the dns is invalid.
+
+        """
+
+        groups = []
+
+        for group_dn in group_dns:
+            group = self.get_group(group_dn, **kwargs)
+            group._ensure_valid()
+            groups.append(group)
+
+        return groups
+
+    def refresh(self):
+        """ Re-validates every group and forgets the attributes it has read, other than its prefetch attributes,
+            which are read again. Groups that no longer exist are dropped from the registry.
+
+        """
+
+        with self._lock:
+            entries = list(self._groups.items())
+
+        for key, group in entries:
+            try:
+                valid, reason = group._get_valididty()
+            except Exception:
+                logger.exception("Unable to refresh {group}.".format(group=group))
+                continue
+
+            if valid:
+                # The process cache would otherwise hand the forgotten attributes straight back
+                if group.cache:
+                    group.cache.invalidate(group._cache_key(ATTRIBUTES, group.group_dn.lower()))
+
+                group._reset_attributes(keep=group.prefetch_attributes)
+                group._validated = True
+            else:
+                logger.warning("Dropping {group} from the registry: {reason}".format(group=group, reason=reason))
+
+                with self._lock:
+                    if self._groups.get(key) is group:
+                        del self._groups[key]
+
+    def _refresh_periodically(self, interval):
+        while not self._stop_refreshing.wait(interval):
+            self.refresh()
+
+    def start_refresh(self, interval=DEFAULT_REFRESH_INTERVAL):
+        """ Refreshes the registry on a daemon thread every interval seconds. Does nothing if the thread is already
+            running.
+
+        :param interval (optional): The number of seconds between refreshes. (default: 240)
+        :type interval: int
+
+        """
+
+        with self._lock:
+            if self._refresh_thread and self._refresh_thread.is_alive():
+                return
+
+            self._stop_refreshing.clear()
+            self._refresh_thread = threading.Thread(target=self._refresh_periodically, args=(interval,),
+                                                    name="ldap-groups-registry-refresh", daemon=True)
+            self._refresh_thread.start()
+
+    def stop_refresh(self):
+        """Stops the refresh thread and waits for it to finish."""
+
+        with self._lock:
+            thread, self._refresh_thread = self._refresh_thread, None
+
+        self._stop_refreshing.set()
+
+        if thread:
+            thread.join()
+
+    def clear(self):
+        """Stops refreshing and forgets every group."""
+
+        self.stop_refresh()
+
+        with self._lock:
+            self._groups.clear()
+
+
+_default_registry = GroupRegistry()
+
+
+def get_registry():
+    """Returns the process-wide group registry."""
+
+    return _default_registry
+
+
+def get_group(group_dn, **kwargs):
+    """ Returns the shared ADGroup for a dn and configuration from the process-wide registry.
+        See GroupRegistry.get_group.
+
+    """
+
+    return _default_registry.get_group(group_dn, **kwargs)
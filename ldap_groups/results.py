@@ -0,0 +1,268 @@
+"""
+.. module:: ldap_groups.results
+    :synopsis: LDAP Groups Result Objects.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+
+class BatchModificationResult:
+    """
+    The per-item outcome of a batch group modification.
+
+    Every lookup value passed to the modification ends up in exactly one of these collections:
+
+    * ``modified`` - values that were added to or removed from the group.
+    * ``unchanged`` - values that were already in the group (when adding) or not in it (when removing).
+    * ``missing`` - values that don't match any account or group in the directory.
+    * ``failed`` - a dictionary mapping values that could not be modified to the error message.
+
+    """
+
+    def __init__(self):
+        self.modified = []
+        self.unchanged = []
+        self.missing = []
+        self.failed = {}
+
+    def __repr__(self):
+        return "<BatchModificationResult: {modified} modified, {unchanged} unchanged, {missing} missing, {failed} " \
+               "failed>".format(modified=len(self.modified), unchanged=len(self.unchanged),
+                                missing=len(self.missing), failed=len(self.failed))
+
+    @property
+    def succeeded(self):
+        """True if every value was found and is now in the requested state."""
+
+        return not self.missing and not self.failed
+
+
+class MembershipReconciliation:
+    """
+    The outcome of making a group's user members match a desired set with set_members.
+
+    * ``added`` - a BatchModificationResult for the desired accounts that weren't members.
+    * ``removed`` - a BatchModificationResult for the members that weren't desired.
+    * ``unchanged`` - desired accounts that were already members.
+    * ``missing`` - desired lookup values that don't match any account.
+    * ``dns`` - a dictionary mapping the accounts in added, removed and unchanged to their distinguished names.
+
+    Accounts are reported by lookup value. A member being removed that has no lookup value, or shares one with
+    another account, is reported by its distinguished name instead.
+    * ``dry_run`` - True if nothing was modified. ``added.modified`` and ``removed.modified`` then list the changes
+      that would have been made.
+
+    """
+
+    def __init__(self, dry_run=False):
+        self.added = BatchModificationResult()
+        self.removed = BatchModificationResult()
+        self.unchanged = []
+        self.missing = []
+        self.dns = {}
+        self.dry_run = dry_run
+
+    def __repr__(self):
+        return "<MembershipReconciliation: {added} added, {removed} removed, {unchanged} unchanged, {missing} " \
+               "missing{dry_run}>".format(added=len(self.added.modified), removed=len(self.removed.modified),
+                                          unchanged=len(self.unchanged), missing=len(self.missing),
+                                          dry_run=" (dry run)" if self.dry_run else "")
+
+    @property
+    def succeeded(self):
+        """True if every desired account was found and the group's members now match the desired set."""
+
+        return not self.missing and not self.added.failed and not self.removed.failed
+
+
+class DNResolution(dict):
+    """
+    A dictionary mapping lookup values to the distinguished name of the single entry that matched them.
+
+    Values that couldn't be resolved to exactly one entry are left out of the mapping and reported instead:
+
+    * ``missing`` - values that matched no entry.
+    * ``ambiguous`` - a dictionary mapping values that matched several entries to the distinguished names found.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(DNResolution, self).__init__(*args, **kwargs)
+        self.missing = []
+        self.ambiguous = {}
+
+    def __repr__(self):
+        return "<DNResolution: {resolved} resolved, {missing} missing, {ambiguous} ambiguous>".format(
+            resolved=len(self), missing=len(self.missing), ambiguous=len(self.ambiguous)
+        )
+
+
+class MemberPage(list):
+    """
+    A list of member information dictionaries for one page of a group's sorted members.
+
+    * ``offset`` - the position of the first member on the page in the sorted member list, starting at 0.
+    * ``limit`` - the largest number of members the page can hold.
+    * ``total`` - the number of members in the group, as counted when the page was read.
+    * ``sort_by`` - the attribute the members are sorted by.
+    * ``server_sorted`` - True if the server sorted and sliced the members (server side sort and virtual list view),
+      False if they were sorted from the cached member list.
+
+    """
+
+    def __init__(self, members=(), offset=0, limit=0, total=0, sort_by=None, server_sorted=False):
+        super(MemberPage, self).__init__(members)
+        self.offset = offset
+        self.limit = limit
+        self.total = total
+        self.sort_by = sort_by
+        self.server_sorted = server_sorted
+
+    def __repr__(self):
+        return "<MemberPage: {count} of {total} members from {offset}, sorted by {sort_by}>".format(
+            count=len(self), total=self.total, offset=self.offset, sort_by=self.sort_by
+        )
+
+    @property
+    def has_next(self):
+        return self.offset + len(self) < self.total
+
+
+class ChangeSet:
+    """
+    The entries that changed under a search base since a sync cookie was issued.
+
+    * ``groups`` - a dictionary mapping the dns of changed groups to their attributes.
+    * ``users`` - a dictionary mapping the dns of changed users to their attr_list attributes.
+    * ``members`` - a dictionary mapping the dns of changed groups to their complete member lists. Filled in when
+      changes are found with uSNChanged, which can only tell that a group's membership changed.
+    * ``members_added`` and ``members_removed`` - dictionaries mapping group dns to the member dns added to or
+      removed from them. Filled in when changes are found with DirSync, which reports membership deltas.
+    * ``deleted`` - the dns of deleted groups and users.
+    * ``cookie`` - the cookie to pass to the next pull.
+    * ``full`` - True if there was no usable cookie, so everything under the search base was returned.
+
+    """
+
+    def __init__(self, full=False):
+        self.groups = {}
+        self.users = {}
+        self.members = {}
+        self.members_added = {}
+        self.members_removed = {}
+        self.deleted = []
+        self.cookie = None
+        self.full = full
+
+    def __repr__(self):
+        return "<ChangeSet: {groups} groups, {users} users, {deleted} deleted{full}>".format(
+            groups=len(self.groups), users=len(self.users), deleted=len(self.deleted),
+            full=" (full)" if self.full else ""
+        )
+
+
+def _unwrap(raw_attribute):
+    """Pops one-item lists, as ADGroup's member info dictionaries do."""
+
+    if isinstance(raw_attribute, list) and len(raw_attribute) == 1:
+        return raw_attribute[0]
+
+    return raw_attribute
+
+
+class _MemberRecordMixin:
+    __slots__ = ()
+
+    @classmethod
+    def from_attributes(cls, attributes):
+        """Builds a record straight from a search result's attributes, without an intermediate dictionary."""
+
+        return cls._make([_unwrap(attributes.get(name)) for name in cls.attribute_names])
+
+    def get(self, attribute_name, default=None):
+        """Looks a value up by its LDAP attribute name, e.g. record.get('msDS-PrincipalName')."""
+
+        try:
+            value = self[self._indexes[attribute_name.lower()]]
+        except KeyError:
+            return default
+
+        return default if value is None else value
+
+    def as_dict(self):
+        return dict(zip(self.attribute_names, self))
+
+
+@lru_cache(maxsize=None)
+def _member_record_class(attribute_names):
+    fields = namedtuple("MemberRecord", attribute_names, rename=True)
+
+    return type("MemberRecord", (_MemberRecordMixin, fields), {
+        '__slots__': (),
+        'attribute_names': attribute_names,
+        '_indexes': {name.lower(): index for index, name in enumerate(attribute_names)},
+    })
+
+
+def member_record_class(attr_list):
+    """ Returns the record class for an attribute list. Classes are created once per attribute list and reused.
+
+    Records are namedtuples with one field per attribute, so each member costs a tuple instead of a dictionary.
+    Attribute names that aren't valid identifiers (e.g. 'msDS-PrincipalName') become positional fields like _3;
+    record.get(attribute_name) works for every attribute.
+
+    :param attr_list: The attributes each record holds, in order.
+    :type attr_list: list
+
+    """
+
+    return _member_record_class(tuple(attr_list))
+
+
+class MemberColumns:
+    """
+    Member information stored column-wise: one list per attribute, with the nth member's values at index n of each
+    list. Holds the most members per byte of the result types.
+
+    ``columns['displayName']`` (or ``columns.get('displayName')``) returns a column; iterating yields one record per
+    member.
+
+    """
+
+    def __init__(self, attr_list):
+        self.attr_list = list(attr_list)
+        self.columns = {name: [] for name in self.attr_list}
+
+        self._record_class = member_record_class(self.attr_list)
+        self._lists = [self.columns[name] for name in self.attr_list]
+        self._indexes = {name.lower(): name for name in self.attr_list}
+
+    def __repr__(self):
+        return "<MemberColumns: {members} members, {attributes} attributes>".format(
+            members=len(self), attributes=len(self.attr_list)
+        )
+
+    def __len__(self):
+        return len(self._lists[0]) if self._lists else 0
+
+    def __getitem__(self, attribute_name):
+        return self.columns[self._indexes[attribute_name.lower()]]
+
+    def __iter__(self):
+        return map(self._record_class._make, zip(*self._lists))
+
+    def get(self, attribute_name, default=None):
+        try:
+            return self[attribute_name]
+        except KeyError:
+            return default
+
+    def append_attributes(self, attributes):
+        """Adds a member from a search result's attributes."""
+
+        for name, column in zip(self.attr_list, self._lists):
+            column.append(_unwrap(attributes.get(name)))
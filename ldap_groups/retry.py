@@ -0,0 +1,131 @@
+"""
+.. module:: ldap_groups.retry
+    :synopsis: LDAP Groups Retry Policies.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+import logging
+import random
+import time
+
+from ldap3.core.exceptions import (LDAPCommunicationError, LDAPResponseTimeoutError, LDAPBusyResult,
+                                   LDAPUnavailableResult)
+
+from .exceptions import LDAPServerUnreachable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 30
+DEFAULT_JITTER = 0.5
+
+# Failures that say nothing about the request itself: dropped or timed out connections and busy or restarting DCs
+DEFAULT_RETRYABLE_EXCEPTIONS = (LDAPCommunicationError, LDAPResponseTimeoutError, LDAPBusyResult,
+                                LDAPUnavailableResult, LDAPServerUnreachable)
+
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed LDAP operation is sent again.
+
+    The nth retry waits backoff * 2 ** (n - 1) seconds, capped at max_backoff, and then varied by up to jitter (a
+    fraction of the delay) in either direction so that many clients don't reconnect to a restarted DC at once.
+
+    """
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS, backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF,
+                 jitter=DEFAULT_JITTER, retryable=DEFAULT_RETRYABLE_EXCEPTIONS, sleep=time.sleep):
+        """ Create a retry policy.
+
+        :param max_attempts (optional): The number of times an operation is tried, including the first. Set to 1
+                                        to disable retries. (default: 3)
+        :type max_attempts: int
+        :param backoff (optional): The number of seconds to wait before the first retry. (default: 0.5)
+        :type backoff: float
+        :param max_backoff (optional): The longest wait between attempts, in seconds. (default: 30)
+        :type max_backoff: float
+        :param jitter (optional): How much each wait is randomly varied, as a fraction of the wait. (default: 0.5)
+        :type jitter: float
+        :param retryable (optional): The exception classes that are retried. Anything else is raised immediately.
+                                     (default: DEFAULT_RETRYABLE_EXCEPTIONS)
+        :type retryable: tuple
+        :param sleep (optional): The function used to wait. (default: time.sleep)
+        :type sleep: callable
+
+        """
+
+        if max_attempts < 1:
+            raise ValueError("A retry policy needs at least one attempt.")
+
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retryable = tuple(retryable)
+        self.sleep = sleep
+
+    def __repr__(self):
+        return "<RetryPolicy: {max_attempts} attempts, {backoff}s backoff>".format(max_attempts=self.max_attempts,
+                                                                                   backoff=self.backoff)
+
+    def is_retryable(self, error):
+        return isinstance(error, self.retryable)
+
+    def delay(self, attempt):
+        """Returns the number of seconds to wait after the given failed attempt (starting at 1)."""
+
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return max(0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def wait(self, error, attempt, description):
+        """ Decides whether to retry after a failed attempt, and waits out the backoff if so.
+
+        :param error: The exception the attempt raised.
+        :type error: Exception
+        :param attempt: The number of the attempt that failed, starting at 1.
+        :type attempt: int
+        :param description: What was being attempted, for the log.
+        :type description: str
+
+        :returns: True if the operation should be tried again, False if the error should be raised.
+
+        """
+
+        if attempt >= self.max_attempts or not self.is_retryable(error):
+            return False
+
+        delay = self.delay(attempt)
+
+        logger.warning("{description} failed (attempt {attempt} of {max_attempts}), retrying in {delay:.2f}s: "
+                       "{error!r}".format(description=description, attempt=attempt, max_attempts=self.max_attempts,
+                                          delay=delay, error=error))
+
+        self.sleep(delay)
+        return True
+
+    def call(self, function, description, *args, **kwargs):
+        """ Calls a function, retrying it as long as it raises retryable errors and attempts remain.
+
+        :param function: The function to call.
+        :type function: callable
+        :param description: What the function does, for the log.
+        :type description: str
+
+        """
+
+        attempt = 1
+
+        while True:
+            try:
+                return function(*args, **kwargs)
+            except Exception as error:
+                if not self.wait(error, attempt, description):
+                    raise
+
+            attempt += 1
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
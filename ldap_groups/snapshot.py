@@ -0,0 +1,408 @@
+"""
+.. module:: ldap_groups.snapshot
+    :synopsis: LDAP Groups On-Disk Snapshots.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from collections import deque
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.request import pathname2url
+
+from ldap3 import SUBTREE
+from ldap3.utils.dn import to_dn
+
+from .exceptions import InvalidGroupDN
+from .groups import BREADTH_FIRST, IN_CHAIN
+from .utils import as_list
+
+SCHEMA = """
+    CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    CREATE TABLE entries (
+        id INTEGER PRIMARY KEY,
+        dn TEXT NOT NULL,
+        dn_key TEXT NOT NULL UNIQUE,
+        kind TEXT NOT NULL,
+        attributes TEXT NOT NULL
+    );
+    CREATE TABLE edges (parent_id INTEGER NOT NULL, child_id INTEGER NOT NULL, PRIMARY KEY (parent_id, child_id))
+        WITHOUT ROWID;
+    CREATE TABLE members (group_id INTEGER NOT NULL, user_id INTEGER NOT NULL, PRIMARY KEY (group_id, user_id))
+        WITHOUT ROWID;
+    CREATE INDEX edges_child ON edges (child_id);
+    CREATE INDEX members_user ON members (user_id);
+"""
+
+# Entry kinds
+GROUP = "group"
+ORGANIZATIONAL_UNIT = "organizationalUnit"
+USER = "user"
+
+
+def _parent_dn(dn):
+    """Returns the dn one level up, honoring escaped commas."""
+
+    return ",".join(to_dn(dn)[1:])
+
+
+def export_snapshot(group, path, search_base_dn=None, page_size=500):
+    """ Crawls a subtree of the directory with two paged searches and writes it to an SQLite snapshot.
+
+    The first search finds every group and OU under search_base_dn; the second finds every user under the group's
+    base_dn that is a member of one of them. The snapshot holds their dns, the parent/child edges between groups and
+    OUs, the direct members of each group and each member's attr_list attributes. Nested groups outside
+    search_base_dn are not followed.
+
+    :param group: The group whose configuration and connection pool are used for the crawl.
+    :type group: ADGroup
+    :param path: Where to write the snapshot. An existing snapshot there is replaced once the crawl is complete.
+    :type path: str
+    :param search_base_dn (optional): The root of the subtree to crawl. Defaults to the group's dn.
+    :type search_base_dn: str
+    :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                 Paged searches circumvent that limit. Adjust the page_size to be below the
+                                 server's size limit. (default: 500)
+    :type page_size: int
+
+    :returns: A Snapshot of the file written.
+
+    """
+
+    search_base_dn = search_base_dn if search_base_dn else group.group_dn
+
+    group_search = {
+        'name': 'SNAPSHOT_GROUP_SEARCH',
+        'base_dn': search_base_dn,
+        'scope': SUBTREE,
+        'filter_string': "(|(objectClass=group)(objectClass=organizationalUnit))",
+        'attribute_list': ['objectClass', 'name', 'memberOf']
+    }
+
+    user_search = {
+        'name': 'SNAPSHOT_USER_SEARCH',
+        'base_dn': group.base_dn,
+        'scope': SUBTREE,
+        'filter_string': "(&(objectCategory=user)(memberOf=*))",
+        'attribute_list': list(group.attr_list) + ([] if 'memberOf' in group.attr_list else ['memberOf'])
+    }
+
+    temporary_path = path + ".tmp"
+
+    if os.path.exists(temporary_path):
+        os.remove(temporary_path)
+
+    connection = sqlite3.connect(temporary_path)
+
+    try:
+        connection.executescript(SCHEMA)
+
+        ids = {}
+        kinds = {}
+        member_of = {}
+
+        for entry in group._iter_paged_search(group_search, page_size):
+            attributes = entry["attributes"]
+            object_class = as_list(attributes.get("objectClass"))
+            kind = ORGANIZATIONAL_UNIT if object_class and object_class[-1] == ORGANIZATIONAL_UNIT else GROUP
+            group_attributes = {'objectClass': object_class, 'name': as_list(attributes.get("name"))}
+
+            cursor = connection.execute(
+                "INSERT INTO entries (dn, dn_key, kind, attributes) VALUES (?, ?, ?, ?)",
+                (entry["dn"], entry["dn"].lower(), kind, json.dumps(group_attributes))
+            )
+            ids[entry["dn"].lower()] = cursor.lastrowid
+            kinds[entry["dn"].lower()] = kind
+            member_of[entry["dn"].lower()] = as_list(attributes.get("memberOf"))
+
+        # A group's children are the groups that are members of it; an OU's are the groups and OUs directly in it
+        edges = set()
+
+        for dn_key, child_id in ids.items():
+            for parent_dn in member_of[dn_key]:
+                if parent_dn.lower() in ids:
+                    edges.add((ids[parent_dn.lower()], child_id))
+
+            parent_dn = _parent_dn(dn_key)
+
+            if kinds.get(parent_dn) == ORGANIZATIONAL_UNIT:
+                edges.add((ids[parent_dn], child_id))
+
+        connection.executemany("INSERT INTO edges (parent_id, child_id) VALUES (?, ?)", sorted(edges))
+
+        for entry in group._iter_paged_search(user_search, page_size):
+            group_ids = [ids[dn.lower()] for dn in as_list(entry["attributes"].get("memberOf")) if dn.lower() in ids]
+
+            if not group_ids:
+                continue
+
+            info_dict = group._get_info_dict({
+                "dn": entry["dn"],
+                "attributes": {name: entry["attributes"][name] for name in entry["attributes"]
+                               if name in group.attr_list}
+            })
+
+            cursor = connection.execute(
+                "INSERT INTO entries (dn, dn_key, kind, attributes) VALUES (?, ?, ?, ?)",
+                (entry["dn"], entry["dn"].lower(), USER, json.dumps(info_dict, default=str))
+            )
+            connection.executemany("INSERT OR IGNORE INTO members (group_id, user_id) VALUES (?, ?)",
+                                   [(group_id, cursor.lastrowid) for group_id in group_ids])
+
+        connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+            ('search_base_dn', search_base_dn),
+            ('attr_list', json.dumps(list(group.attr_list))),
+            ('created', str(time.time())),
+        ])
+        connection.commit()
+    finally:
+        connection.close()
+
+    os.replace(temporary_path, path)
+
+    return Snapshot(path)
+
+
+class Snapshot:
+    """A read-only view of a snapshot written by export_snapshot."""
+
+    def __init__(self, path):
+        """ Open a snapshot.
+
+        :param path: The snapshot file.
+        :type path: str
+
+        """
+
+        self.path = path
+        self._connection = sqlite3.connect("file:{path}?mode=ro".format(path=pathname2url(os.path.abspath(path))),
+                                           uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        meta = dict(self._query("SELECT key, value FROM meta"))
+        self.search_base_dn = meta['search_base_dn']
+        self.attr_list = json.loads(meta['attr_list'])
+        self.created = float(meta['created'])
+
+    def __repr__(self):
+        return "<Snapshot: " + str(self.path) + ">"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _query(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def group(self, group_dn):
+        """ Returns a SnapshotADGroup for a group or OU in this snapshot. The dn is checked when the group is used.
+
+        :param group_dn: The distinguished name of the group.
+        :type group_dn: str
+
+        """
+
+        return SnapshotADGroup(self, group_dn)
+
+
+class SnapshotADGroup:
+    """
+    A group answered entirely from a snapshot. It has the read-only methods of ADGroup and never contacts the
+    server. page_size and workers arguments are accepted for compatibility and ignored.
+
+    """
+
+    def __init__(self, snapshot, group_dn, entry=None):
+        self.snapshot = snapshot
+        self.group_dn = group_dn
+        self.attr_list = snapshot.attr_list
+
+        self._entry = entry
+
+    def __repr__(self):
+        try:
+            return "<SnapshotADGroup: " + str(self.group_dn.split(",", 1)[0]) + ">"
+        except AttributeError:
+            return "<SnapshotADGroup: " + str(self.group_dn) + ">"
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.group_dn == other.group_dn
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        return self.group_dn < other.group_dn
+
+    def __hash__(self):
+        return hash(self.group_dn)
+
+    def _get_entry(self):
+        """ Returns this group's (id, kind, attributes) row.
+
+        :raises: **InvalidGroupDN** if this group isn't in the snapshot.
+
+        """
+
+        if self._entry is None:
+            rows = self.snapshot._query("SELECT id, kind, attributes FROM entries WHERE dn_key = ? AND kind != ?",
+                                        (self.group_dn.lower(), USER))
+
+            if not rows:
+                raise InvalidGroupDN("The AD Group distinguished name provided is invalid:\n\tNo such group in "
+                                     "snapshot: {group_dn}".format(group_dn=self.group_dn))
+
+            self._entry = rows[0]
+
+        return self._entry
+
+    def _group_from_row(self, row):
+        group_id, dn, kind, attributes = row
+        return SnapshotADGroup(self.snapshot, dn, (group_id, kind, attributes))
+
+    ###############################################################################################################
+    #                                         Group Information Methods                                           #
+    ###############################################################################################################
+
+    def get_attributes(self, no_cache=False, names=None):
+        """Returns this group's objectClass and name. See ADGroup.get_attributes."""
+
+        attributes = json.loads(self._get_entry()[2])
+
+        if names is None:
+            return attributes
+
+        requested_names = set(name.lower() for name in names)
+        return {name: value for name, value in attributes.items() if name.lower() in requested_names}
+
+    def get_attribute(self, attribute_name, no_cache=False):
+        """See ADGroup.get_attribute."""
+
+        attributes = self.get_attributes(names=[attribute_name])
+
+        if not attributes:
+            return None
+
+        raw_attribute = list(attributes.values())[0]
+        return raw_attribute[0] if len(raw_attribute) == 1 else raw_attribute
+
+    def _get_group_type(self):
+        return self._get_entry()[1]
+
+    def _iter_members(self):
+        for dn, attributes in self.snapshot._query(
+                "SELECT entries.dn, entries.attributes FROM members JOIN entries ON entries.id = members.user_id "
+                "WHERE members.group_id = ?", (self._get_entry()[0],)):
+            yield dn, json.loads(attributes)
+
+    def iter_member_info(self, page_size=500):
+        """See ADGroup.iter_member_info."""
+
+        for _dn, info_dict in self._iter_members():
+            yield info_dict
+
+    def get_member_info(self, page_size=500):
+        """See ADGroup.get_member_info."""
+
+        return list(self.iter_member_info(page_size))
+
+    def iter_tree_members(self, strategy=BREADTH_FIRST, page_size=500, workers=1):
+        """ Yields all members from this node of the tree down, each user once. Both strategies walk the snapshot's
+            edges, so they return the same members. See ADGroup.iter_tree_members.
+
+        """
+
+        if strategy not in (BREADTH_FIRST, IN_CHAIN):
+            raise ValueError("Unknown tree member strategy: {strategy}".format(strategy=strategy))
+
+        member_dns = set()
+        queue = deque([self])
+        visited = set()
+
+        while queue:
+            node = queue.popleft()
+
+            if node not in visited:
+                visited.add(node)
+
+                for dn, info_dict in node._iter_members():
+                    if dn not in member_dns:
+                        member_dns.add(dn)
+                        yield {attribute: info_dict.get(attribute) for attribute in self.attr_list}
+
+                queue.extend(node.iter_children())
+
+    def get_tree_members(self, strategy=BREADTH_FIRST, page_size=500, workers=1):
+        """See ADGroup.get_tree_members."""
+
+        return list(self.iter_tree_members(strategy, page_size, workers))
+
+    ###############################################################################################################
+    #                                        Group Traversal Methods                                              #
+    ###############################################################################################################
+
+    def iter_descendants(self, page_size=500):
+        """Yields the groups and OUs below this one in the snapshot. See ADGroup.iter_descendants."""
+
+        self._get_entry()
+        suffix = "," + self.group_dn.lower()
+
+        for row in self.snapshot._query("SELECT id, dn, kind, attributes FROM entries WHERE kind != ?", (USER,)):
+            if row[1].lower().endswith(suffix):
+                yield self._group_from_row(row)
+
+    def get_descendants(self, page_size=500):
+        """See ADGroup.get_descendants."""
+
+        return list(self.iter_descendants(page_size))
+
+    def iter_children(self, page_size=500):
+        """See ADGroup.iter_children."""
+
+        for row in self.snapshot._query(
+                "SELECT entries.id, entries.dn, entries.kind, entries.attributes FROM edges "
+                "JOIN entries ON entries.id = edges.child_id WHERE edges.parent_id = ?", (self._get_entry()[0],)):
+            yield self._group_from_row(row)
+
+    def get_children(self, page_size=500):
+        """See ADGroup.get_children."""
+
+        return list(self.iter_children(page_size))
+
+    def child(self, group_name, page_size=500):
+        """See ADGroup.child."""
+
+        for child in self.iter_children(page_size):
+            if (child.get_attribute("name") or "").lower() == group_name.lower():
+                return child
+
+        return None
+
+    def parent(self):
+        """See ADGroup.parent."""
+
+        return self.ancestor(1)
+
+    def ancestor(self, generation):
+        """See ADGroup.ancestor."""
+
+        ancestor_dn = self.group_dn
+
+        for _index in range(generation):
+            if ''.join(ancestor_dn.split("DC")[0].split()) == '':
+                break
+            else:
+                ancestor_dn = _parent_dn(ancestor_dn)
+
+        return self if ancestor_dn == self.group_dn else SnapshotADGroup(self.snapshot, ancestor_dn)
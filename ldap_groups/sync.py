@@ -0,0 +1,295 @@
+"""
+.. module:: ldap_groups.sync
+    :synopsis: LDAP Groups Incremental Directory Sync.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+import base64
+import json
+import logging
+import re
+
+from ldap3 import BASE, SUBTREE
+from ldap3.protocol.microsoft import show_deleted_control
+from ldap3.utils.dn import escape_rdn
+
+from .exceptions import ImproperlyConfigured
+from .instrumentation import track, PAGED_SEARCH
+from .results import ChangeSet
+from .utils import as_list
+
+logger = logging.getLogger(__name__)
+
+# Sync strategies
+USN_CHANGED = "usn_changed"
+DIR_SYNC = "dir_sync"
+
+DIR_SYNC_CONTROL = '1.2.840.113556.1.4.841'
+
+# DirSync returns extended dns, e.g. <GUID=...>;<SID=...>;CN=...
+EXTENDED_DN_PREFIX = re.compile(r"^(<[^>]*>;)+")
+
+
+def _first(value):
+    return value[0] if isinstance(value, list) and value else value
+
+
+class DirectorySync:
+    """
+    Pulls the groups, users and memberships that changed under a search base since the last pull.
+
+    Each pull returns a ChangeSet and a cookie to pass to the next pull. Without a cookie (or with one issued by
+    another domain controller or for another search base) everything under the search base is returned.
+
+    The USN_CHANGED strategy compares uSNChanged against the domain controller's highestCommittedUSN and needs no
+    special permissions. Update sequence numbers are local to a domain controller, so cookies are tied to the one
+    that issued them. The DIR_SYNC strategy uses Active Directory's DirSync control, which reports membership
+    deltas, but requires the "Replicating Directory Changes" permission and a naming context root as the search
+    base.
+
+    """
+
+    def __init__(self, group, search_base_dn=None, strategy=USN_CHANGED, page_size=500, include_deleted=True):
+        """ Create a directory sync.
+
+        :param group: The group whose configuration and connection pool are used.
+        :type group: ADGroup
+        :param search_base_dn (optional): The base dn to sync. Defaults to the group's base_dn.
+        :type search_base_dn: str
+        :param strategy (optional): USN_CHANGED or DIR_SYNC. (default: USN_CHANGED)
+        :type strategy: str
+        :param page_size (optional): Many servers have a limit on the number of results that can be returned.
+                                     Paged searches circumvent that limit. Adjust the page_size to be below the
+                                     server's size limit. (default: 500)
+        :type page_size: int
+        :param include_deleted (optional): Set to False to skip looking for deleted entries, which requires read
+                                           access to the Deleted Objects container. (default: True)
+        :type include_deleted: boolean
+
+        """
+
+        if strategy not in (USN_CHANGED, DIR_SYNC):
+            raise ImproperlyConfigured("Unknown sync strategy: {strategy}".format(strategy=strategy))
+
+        self.group = group
+        self.search_base_dn = search_base_dn if search_base_dn else group.base_dn
+        self.strategy = strategy
+        self.page_size = page_size
+        self.include_deleted = include_deleted
+
+        self.entry_attributes = list(group.attr_list) + [
+            attribute for attribute in ['objectClass', 'name', 'uSNChanged'] if attribute not in group.attr_list
+        ]
+
+        self.ROOT_DSE_SEARCH = {
+            'name': 'ROOT_DSE_SEARCH',
+            'base_dn': "",
+            'scope': BASE,
+            'filter_string': "(objectClass=*)",
+            'attribute_list': ['highestCommittedUSN', 'dsServiceName', 'defaultNamingContext', 'namingContexts']
+        }
+
+        self.CHANGED_SEARCH = {
+            'name': 'CHANGED_SEARCH',
+            'base_dn': self.search_base_dn,
+            'scope': SUBTREE,
+            'filter_string': "(&(|(objectClass=group)(objectCategory=user))(uSNChanged>={usn}))",
+            'attribute_list': self.entry_attributes
+        }
+
+        # Deleted entries are moved to the Deleted Objects container of their naming context, so the search is
+        # rooted at the naming context that holds the search base once the rootDSE has been read
+        self.DELETED_SEARCH = {
+            'name': 'DELETED_SEARCH',
+            'base_dn': None,
+            'scope': SUBTREE,
+            'filter_string': "(&(isDeleted=TRUE)(|(objectClass=group)(objectClass=user))(uSNChanged>={usn}))",
+            'attribute_list': ['name', 'lastKnownParent'],
+            'controls': [show_deleted_control(criticality=True)]
+        }
+
+    def __repr__(self):
+        return "<DirectorySync: " + str(self.search_base_dn) + " (" + self.strategy + ")>"
+
+    def _encode_cookie(self, state):
+        return base64.urlsafe_b64encode(json.dumps(state, sort_keys=True).encode("utf-8")).decode("ascii")
+
+    def _decode_cookie(self, cookie):
+        """Returns the state in a cookie, or None if it can't be used with this sync."""
+
+        if not cookie:
+            return None
+
+        try:
+            state = json.loads(base64.urlsafe_b64decode(cookie.encode("ascii")).decode("utf-8"))
+        except (ValueError, TypeError):
+            logger.warning("Ignoring a sync cookie that can't be decoded.")
+            return None
+
+        if state.get('strategy') != self.strategy or state.get('base_dn', "").lower() != self.search_base_dn.lower():
+            logger.info("Ignoring a sync cookie issued for another search base or strategy.")
+            return None
+
+        return state
+
+    def _add_entry(self, changes, dn, attributes):
+        """Files a changed entry under groups or users."""
+
+        object_class = [value.lower() for value in as_list(attributes.get("objectClass"))]
+        info_dict = self.group._get_info_dict({"dn": dn, "attributes": attributes})
+
+        if "group" in object_class:
+            changes.groups[dn] = info_dict
+        else:
+            changes.users[dn] = {attribute: info_dict.get(attribute) for attribute in self.group.attr_list}
+
+    def pull(self, cookie=None):
+        """ Returns the changes since the cookie was issued.
+
+        :param cookie (optional): The cookie of the last ChangeSet, or None to pull everything.
+        :type cookie: str
+
+        :returns: A ChangeSet.
+
+        """
+
+        state = self._decode_cookie(cookie)
+
+        if self.strategy == DIR_SYNC:
+            return self._pull_dir_sync(state)
+
+        # USNs are local to a DC, so a multi-server pool must send the whole pull to one server
+        pinned = getattr(self.group.connection_pool, 'pinned', None)
+
+        if pinned:
+            with pinned():
+                return self._pull_usn_changed(state)
+
+        return self._pull_usn_changed(state)
+
+    def _pull_usn_changed(self, state):
+        # The high-water mark is read first, so changes made during the pull are picked up again next time
+        root_dse = self.group._search(self.ROOT_DSE_SEARCH)[0]["attributes"]
+        highest_usn = int(_first(root_dse["highestCommittedUSN"]))
+        server = _first(root_dse.get("dsServiceName")) or None
+
+        if state is not None and state.get('server') != server:
+            logger.info("The sync cookie was issued by another domain controller. Pulling everything.")
+            state = None
+
+        changes = ChangeSet(full=state is None)
+        low_usn = 0 if state is None else state['usn'] + 1
+
+        for entry in self.group._iter_paged_search(self.CHANGED_SEARCH, self.page_size, usn=low_usn):
+            self._add_entry(changes, entry["dn"], entry["attributes"])
+
+        for group_dn in changes.groups:
+            changes.members[group_dn] = self.group._group_from_dn(group_dn, trusted=True).get_member_dns()
+
+        if self.include_deleted and state is not None:
+            deleted_search = dict(self.DELETED_SEARCH, base_dn=self._naming_context(root_dse))
+
+            for entry in self.group._iter_paged_search(deleted_search, self.page_size, usn=low_usn):
+                original_dn = self._original_dn(entry)
+
+                # Deletions from outside the synced subtree are left out
+                if self._in_search_base(original_dn):
+                    changes.deleted.append(original_dn)
+
+        changes.cookie = self._encode_cookie({
+            'strategy': self.strategy, 'base_dn': self.search_base_dn, 'server': server, 'usn': highest_usn
+        })
+
+        return changes
+
+    def _naming_context(self, root_dse):
+        """Returns the naming context that holds the search base, falling back to the server's default."""
+
+        contexts = [context for context in as_list(root_dse.get("namingContexts")) if self._in_search_base(
+            self.search_base_dn, context
+        )]
+
+        if contexts:
+            return max(contexts, key=len)
+
+        return _first(root_dse.get("defaultNamingContext")) or self.group.base_dn
+
+    def _in_search_base(self, dn, base_dn=None):
+        """Determines whether a dn is the search base (or base_dn) or below it."""
+
+        dn = dn.lower()
+        base_dn = (base_dn if base_dn else self.search_base_dn).lower()
+
+        return dn == base_dn or dn.endswith("," + base_dn)
+
+    def _original_dn(self, entry):
+        """Rebuilds the dn a deleted entry had from its mangled name and last known parent."""
+
+        name = _first(entry["attributes"].get("name")) or ""
+        parent_dn = _first(entry["attributes"].get("lastKnownParent"))
+
+        if not parent_dn:
+            return entry["dn"]
+
+        return "CN={name},{parent_dn}".format(name=escape_rdn(name.split("\n")[0]), parent_dn=parent_dn)
+
+    def _pull_dir_sync(self, state):
+        changes = ChangeSet(full=state is None)
+        dir_sync_cookie = base64.b64decode(state['cookie']) if state is not None else None
+
+        with self.group.connection_pool.connection() as connection, \
+                track(PAGED_SEARCH, 'DIR_SYNC_SEARCH', self.search_base_dn, group_dn=self.group.group_dn) as operation:
+            dir_sync = connection.extend.microsoft.dir_sync(
+                sync_base=self.search_base_dn,
+                sync_filter="(|(objectClass=group)(objectCategory=user))",
+                attributes=self.entry_attributes + ['member', 'isDeleted', 'lastKnownParent'],
+                cookie=dir_sync_cookie,
+                incremental_values=True
+            )
+
+            while dir_sync.more_results:
+                with operation.request():
+                    response = dir_sync.loop()
+
+                operation.add_response(response)
+
+                for entry in response:
+                    if entry["type"] == "searchResEntry":
+                        self._add_dir_sync_entry(changes, entry)
+
+            changes.cookie = self._encode_cookie({
+                'strategy': self.strategy, 'base_dn': self.search_base_dn,
+                'cookie': base64.b64encode(dir_sync.cookie or b"").decode("ascii")
+            })
+
+        return changes
+
+    def _add_dir_sync_entry(self, changes, entry):
+        dn = EXTENDED_DN_PREFIX.sub("", entry["dn"])
+        attributes = entry["attributes"]
+
+        if str(_first(attributes.get("isDeleted"))).upper() == "TRUE":
+            if self.include_deleted:
+                changes.deleted.append(self._original_dn({"dn": dn, "attributes": attributes}))
+            return
+
+        member_changes = {}
+
+        for attribute_name in list(attributes.keys()):
+            base_name, _separator, value_range = attribute_name.partition(";range=")
+
+            if base_name.lower() == "member":
+                # With incremental values, range 1-1 holds added values and range 0-0 removed ones
+                member_changes[value_range] = as_list(attributes[attribute_name])
+
+        if member_changes:
+            changes.members_added.setdefault(dn, []).extend(member_changes.get("1-1", []) + member_changes.get("", []))
+            changes.members_removed.setdefault(dn, []).extend(member_changes.get("0-0", []))
+
+            if dn not in changes.groups:
+                changes.groups[dn] = {"distinguishedName": dn}
+
+        if "objectClass" in attributes or not member_changes:
+            self._add_entry(changes, dn, attributes)
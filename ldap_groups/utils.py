@@ -24,3 +24,52 @@ def escape_query(query):
     """Escapes certain filter characters from an LDAP query."""
 
     return query.replace("\\", r"\5C").replace("*", r"\2A").replace("(", r"\28").replace(")", r"\29")
+
+
+def chunked(iterable, size):
+    """Splits an iterable into lists of at most size items."""
+
+    chunk = []
+
+    for item in iterable:
+        chunk.append(item)
+
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def as_list(value):
+    """Returns an attribute's values as a list: ldap3 returns single values bare, and None if there are none."""
+
+    if value is None:
+        return []
+
+    return value if isinstance(value, list) else [value]
+
+
+def build_filter(clauses):
+    """ Builds an LDAP filter from a raw filter string, or from a dictionary mapping attribute names to a value or a
+        list of values. Dictionary values are escaped; an attribute with several values matches any of them, and
+        every attribute must match.
+
+    """
+
+    if isinstance(clauses, str):
+        return clauses if clauses.startswith("(") else "(" + clauses + ")"
+
+    filters = []
+
+    for attribute, values in clauses.items():
+        if isinstance(values, (list, tuple, set, frozenset)):
+            filters.append("(|" + "".join("({attribute}={value})".format(attribute=escape_query(attribute),
+                                                                         value=escape_query(str(value)))
+                                          for value in values) + ")")
+        else:
+            filters.append("({attribute}={value})".format(attribute=escape_query(attribute),
+                                                          value=escape_query(str(values))))
+
+    return filters[0] if len(filters) == 1 else "(&" + "".join(filters) + ")"
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+
+from benchmarks.suite import run, OPERATIONS, SCENARIOS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure ADGroup methods against synthetic mock directories.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every scenario's size by this factor.")
+    parser.add_argument("--scenario", action="append", choices=[scenario.name for scenario in SCENARIOS],
+                        help="Only run this scenario. May be repeated.")
+    parser.add_argument("--operation", action="append", choices=list(OPERATIONS),
+                        help="Only run this operation. May be repeated.")
+    parser.add_argument("--no-memory", action="store_true", help="Don't measure peak memory.")
+    parser.add_argument("--json", metavar="PATH", help="Also write the measurements to a json file.")
+    arguments = parser.parse_args()
+
+    row = "{:<14} {:<40} {:>11} {:>9} {:>12} {:>9} {:>12}"
+    print(row.format("scenario", "operation", "round trips", "entries", "bytes", "seconds", "peak KiB"))
+
+    measurements = []
+
+    for measurement in run(arguments.scale, arguments.scenario, arguments.operation, not arguments.no_memory):
+        measurements.append(measurement._asdict())
+        print(row.format(
+            measurement.scenario, measurement.operation, measurement.round_trips, measurement.entries,
+            measurement.bytes, "{:.3f}".format(measurement.seconds),
+            "-" if measurement.peak_memory is None else measurement.peak_memory // 1024
+        ))
+
+    if arguments.json:
+        with open(arguments.json, "w") as open_file:
+            json.dump(measurements, open_file, indent=4)
@@ -65,6 +65,7 @@ setup(
     package_dir={'ldap_groups': 'ldap_groups'},
     include_package_data=True,
     install_requires=INSTALL_REQUIRES,
+    python_requires='>=3.5',
     license=finder.license,
     zip_safe=False,
     keywords="ldap active directory ldap-groups groups adgroups python django ad",
@@ -78,9 +79,8 @@ setup(
         'License :: OSI Approved :: MIT License',
         "Natural Language :: English",
         "Operating System :: OS Independent",
-        "Programming Language :: Python :: 2.7",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.4",
+        "Programming Language :: Python :: 3 :: Only",
         'Programming Language :: Python :: 3.5',
         "Topic :: Software Development :: Libraries :: Python Modules",
         "Topic :: System :: Systems Administration :: Authentication/Directory :: LDAP",
@@ -0,0 +1,307 @@
+"""
+.. module:: tests.mock_directory
+   :synopsis: An in-memory Active Directory stand-in built on ldap3's MOCK_SYNC strategy.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from ldap3 import Server, Connection, MOCK_SYNC, MODIFY_ADD, MODIFY_DELETE, ALL_ATTRIBUTES, NO_ATTRIBUTES
+from ldap3.core.exceptions import LDAPOperationResult
+from ldap3.core.results import (RESULT_ENTRY_ALREADY_EXISTS, RESULT_UNWILLING_TO_PERFORM,
+                                RESULT_UNAVAILABLE_CRITICAL_EXTENSION)
+from ldap3.protocol.formatters.validators import validate_sid
+from pyasn1.codec.ber import decoder, encoder
+
+from ldap_groups.cache import DirectoryCache
+from ldap_groups.controls import (SERVER_SIDE_SORT_CONTROL, VLV_REQUEST_CONTROL, VLV_RESPONSE_CONTROL, SortKeyList,
+                                  VirtualListViewRequest, VirtualListViewResponse)
+from ldap_groups.groups import ADGroup
+from ldap_groups.pool import ConnectionPool
+
+BASE_DN = "DC=example,DC=com"
+BIND_DN = "CN=admin,DC=example,DC=com"
+BIND_PASSWORD = "password"
+
+SHOW_DELETED_CONTROL = "1.2.840.113556.1.4.417"
+DOMAIN_SID = "S-1-5-21-1000-2000-3000"
+
+
+class MockConnectionPool(ConnectionPool):
+    """
+    A connection pool whose connections modify group membership, return ranged attribute values, compute tokenGroups,
+    sort and slice virtual list views and track update sequence numbers the way Active Directory does.
+
+    """
+
+    def __init__(self, *args, max_value_range=1500, directory=None, virtual_list_view=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_value_range = max_value_range
+        self.directory = directory
+        self.virtual_list_view = virtual_list_view
+        self.virtual_list_views = 0
+
+    def _sort_and_slice(self, connection, sort_control, vlv_control, sort_attribute_added):
+        """Applies server side sort and virtual list view controls to a search's response."""
+
+        sort_key = decoder.decode(bytes(sort_control["controlValue"]), asn1Spec=SortKeyList())[0][0]
+        request = decoder.decode(bytes(vlv_control["controlValue"]), asn1Spec=VirtualListViewRequest())[0]
+
+        attribute = str(sort_key["attributeType"])
+        reverse = bool(sort_key["reverseOrder"])
+
+        def sort_value(entry):
+            values = entry["attributes"].get(attribute)
+            values = values if isinstance(values, list) else [values]
+            return str(values[0]).lower() if values and values[0] not in (None, "") else None
+
+        entries = [entry for entry in connection.response or [] if entry["type"] == "searchResEntry"]
+        present = sorted((entry for entry in entries if sort_value(entry) is not None), key=sort_value,
+                         reverse=reverse)
+        entries = present + [entry for entry in entries if sort_value(entry) is None]
+
+        offset = int(request["target"]["byOffset"]["offset"])
+        target = max(1, min(offset, len(entries)))
+        window = entries[max(0, target - 1 - int(request["beforeCount"])):target + int(request["afterCount"])]
+
+        if sort_attribute_added:
+            for entry in window:
+                entry["attributes"].pop(attribute, None)
+                entry["raw_attributes"].pop(attribute, None)
+
+        response = VirtualListViewResponse()
+        response["targetPosition"] = target
+        response["contentCount"] = len(entries)
+        response["virtualListViewResult"] = 0
+
+        self.virtual_list_views += 1
+        connection.response = window
+        connection.result.setdefault("controls", {})[VLV_RESPONSE_CONTROL] = {
+            "description": "", "criticality": False, "value": encoder.encode(response)
+        }
+
+    def _create_connection(self):
+        connection = super()._create_connection()
+        search = connection.search
+        modify = connection.modify
+
+        def ad_search(*args, **kwargs):
+            if kwargs.get("search_base") == "" and self.directory:
+                connection.response = [self.directory.root_dse()]
+                connection.result = {"result": 0, "description": "success", "controls": {}}
+                return True
+
+            # The mock server can't decode the show deleted control, and it has no deleted objects to show anyway
+            if kwargs.get("controls"):
+                kwargs["controls"] = [control for control in kwargs["controls"]
+                                      if str(control["controlType"]) != SHOW_DELETED_CONTROL] or None
+
+            # The mock server ignores sort and virtual list view controls, so they are applied to its response
+            controls = {str(control["controlType"]): control for control in kwargs.get("controls") or []}
+            sort_control = controls.get(SERVER_SIDE_SORT_CONTROL)
+            vlv_control = controls.get(VLV_REQUEST_CONTROL)
+            sort_attribute_added = False
+
+            if vlv_control:
+                if not self.virtual_list_view:
+                    raise LDAPOperationResult(result=RESULT_UNAVAILABLE_CRITICAL_EXTENSION,
+                                              description="unavailableCriticalExtension",
+                                              message="virtual list view not supported", response_type="searchResDone")
+
+                kwargs["controls"] = [control for control in kwargs["controls"]
+                                      if control not in (sort_control, vlv_control)] or None
+
+                sort_attribute = str(decoder.decode(bytes(sort_control["controlValue"]),
+                                                    asn1Spec=SortKeyList())[0][0]["attributeType"])
+
+                if sort_attribute.lower() not in [attribute.lower() for attribute in kwargs["attributes"]]:
+                    kwargs["attributes"] = list(kwargs["attributes"]) + [sort_attribute]
+                    sort_attribute_added = True
+
+            attributes = kwargs.get("attributes")
+            ranges = {}
+            token_groups = False
+
+            if attributes not in (None, ALL_ATTRIBUTES, NO_ATTRIBUTES):
+                # tokenGroups is constructed by the server, so the mock computes it from memberOf
+                token_groups = "tokengroups" in [attribute.lower() for attribute in attributes]
+                attributes = [attribute for attribute in attributes if attribute.lower() != "tokengroups"]
+
+                for attribute in attributes:
+                    name, _separator, value_range = attribute.partition(";range=")
+
+                    if value_range:
+                        ranges[name] = value_range
+
+                kwargs["attributes"] = [attribute.partition(";")[0] for attribute in attributes]
+
+            result = search(*args, **kwargs)
+
+            for entry in connection.response or []:
+                if token_groups and self.directory:
+                    entry["attributes"]["tokenGroups"] = self.directory.token_groups(entry["dn"])
+                    entry["raw_attributes"]["tokenGroups"] = self.directory.token_groups(entry["dn"])
+
+                for name, value_range in ranges.items():
+                    values = entry["attributes"].pop(name, [])
+                    raw_values = entry["raw_attributes"].pop(name, [])
+
+                    if not values:
+                        continue
+
+                    low, high = value_range.split("-")
+                    low = int(low)
+                    high = len(values) - 1 if high == "*" else int(high)
+                    high = min(high, low + self.max_value_range - 1)
+
+                    if high >= len(values) - 1:
+                        key = "{name};range={low}-*".format(name=name, low=low)
+                    else:
+                        key = "{name};range={low}-{high}".format(name=name, low=low, high=high)
+
+                    entry["attributes"][key] = values[low:high + 1]
+                    entry["raw_attributes"][key] = raw_values[low:high + 1]
+
+            if vlv_control:
+                self._sort_and_slice(connection, sort_control, vlv_control, sort_attribute_added)
+
+            return result
+
+        def ad_modify(dn, changes, controls=None):
+            dit = connection.server.dit
+            mod_type, values = changes.get("member", (None, []))
+            current = {value.lower() for value in dit[dn].get("member", [])}
+            requested = {value.encode("utf-8").lower() for value in values}
+
+            # AD rejects the whole modification if any value is already present, or missing when deleting
+            if mod_type == MODIFY_ADD and current & requested:
+                raise LDAPOperationResult(result=RESULT_ENTRY_ALREADY_EXISTS, description="entryAlreadyExists",
+                                          message="member already exists", response_type="modifyResponse")
+            elif mod_type == MODIFY_DELETE and requested - current:
+                raise LDAPOperationResult(result=RESULT_UNWILLING_TO_PERFORM, description="unwillingToPerform",
+                                          message="member not in group", response_type="modifyResponse")
+
+            response = modify(dn, changes, controls)
+
+            if self.directory:
+                self.directory.touch(dn)
+
+            # Keep the memberOf back link in sync
+            for value in values:
+                if value in dit:
+                    back_links = dit[value].setdefault("memberOf", [])
+
+                    if mod_type == MODIFY_ADD:
+                        back_links.append(dn.encode("utf-8"))
+                    elif mod_type == MODIFY_DELETE:
+                        back_links[:] = [link for link in back_links if link.lower() != dn.encode("utf-8").lower()]
+
+            return response
+
+        connection.search = ad_search
+        connection.modify = ad_modify
+        return connection
+
+
+class MockDirectory:
+    """Builds a small directory in which member and memberOf are kept in sync, as they are in AD."""
+
+    def __init__(self):
+        self.server = Server("mock_ad")
+        self.usn = 0
+        self.rid = 1000
+        self.cache = DirectoryCache()
+        self._seed_connection = Connection(self.server, client_strategy=MOCK_SYNC)
+        self._seed_connection.strategy.add_entry(BIND_DN, {"objectClass": ["top", "person"],
+                                                           "userPassword": BIND_PASSWORD})
+        self._seed_connection.strategy.add_entry(BASE_DN, {"objectClass": ["top", "domain"]})
+
+    @property
+    def dit(self):
+        return self.server.dit
+
+    def _next_usn(self):
+        self.usn += 1
+        return str(self.usn)
+
+    def touch(self, dn):
+        """Bumps an entry's uSNChanged, as any change to it does in AD."""
+
+        self.dit[dn]["uSNChanged"] = [self._next_usn().encode("utf-8")]
+
+    def _next_sid(self):
+        self.rid += 1
+        return validate_sid("{domain}-{rid}".format(domain=DOMAIN_SID, rid=self.rid))
+
+    def token_groups(self, dn):
+        """Returns the binary SIDs of every group an entry is a member of, directly or through nesting."""
+
+        sids = []
+        visited = set()
+        queue = [value.decode("utf-8") for value in self.dit[dn].get("memberOf", [])]
+
+        while queue:
+            group_dn = queue.pop()
+
+            if group_dn.lower() not in visited and group_dn in self.dit:
+                visited.add(group_dn.lower())
+                sids.extend(self.dit[group_dn]["objectSid"])
+                queue.extend(value.decode("utf-8") for value in self.dit[group_dn].get("memberOf", []))
+
+        return sids
+
+    def root_dse(self):
+        return {"type": "searchResEntry", "dn": "", "raw_attributes": {},
+                "attributes": {"highestCommittedUSN": [str(self.usn)], "dsServiceName": ["CN=NTDS Settings,CN=DC1"],
+                               "defaultNamingContext": [BASE_DN],
+                               "namingContexts": [BASE_DN, "CN=Configuration," + BASE_DN]}}
+
+    def _add(self, dn, attributes):
+        attributes["distinguishedName"] = dn
+        attributes["uSNChanged"] = self._next_usn()
+        self._seed_connection.strategy.add_entry(dn, attributes)
+        return dn
+
+    def add_ou(self, name, parent_dn=BASE_DN):
+        return self._add("OU={name},{parent}".format(name=name, parent=parent_dn), {
+            "objectClass": ["top", "organizationalUnit"], "name": name,
+        })
+
+    def add_group(self, name, parent_dn=BASE_DN, member_of=()):
+        dn = self._add("CN={name},{parent}".format(name=name, parent=parent_dn), {
+            "objectClass": ["top", "group"], "objectCategory": "group", "name": name, "member": [],
+            "memberOf": [], "objectSid": self._next_sid(),
+        })
+
+        for group_dn in member_of:
+            self.add_membership(group_dn, dn)
+
+        return dn
+
+    def add_user(self, name, parent_dn=BASE_DN, member_of=(), **attributes):
+        user_attributes = {
+            "objectClass": ["top", "person", "organizationalPerson", "user"], "objectCategory": "user",
+            "name": name, "sAMAccountName": name, "displayName": name.title(), "memberOf": [],
+        }
+        user_attributes.update(attributes)
+        dn = self._add("CN={name},{parent}".format(name=name, parent=parent_dn), user_attributes)
+
+        for group_dn in member_of:
+            self.add_membership(group_dn, dn)
+
+        return dn
+
+    def add_membership(self, group_dn, member_dn):
+        self.dit[group_dn]["member"].append(member_dn.encode("utf-8"))
+        self.dit[member_dn]["memberOf"].append(group_dn.encode("utf-8"))
+        self.touch(group_dn)
+
+    def connection_pool(self, **kwargs):
+        kwargs.setdefault("connection_options", {"client_strategy": MOCK_SYNC})
+        return MockConnectionPool(self.server, BIND_DN, BIND_PASSWORD, directory=self, **kwargs)
+
+    def group(self, group_dn, connection_pool=None, **kwargs):
+        kwargs.setdefault("cache", self.cache)
+
+        return ADGroup(group_dn, server_uri="mock_ad", base_dn=BASE_DN, bind_dn=BIND_DN, bind_password=BIND_PASSWORD,
+                       connection_pool=connection_pool if connection_pool else self.connection_pool(), **kwargs)
@@ -0,0 +1,76 @@
+"""
+.. module:: tests.test_aio
+   :synopsis: LDAP Groups asyncio Group Object Tests.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+import asyncio
+from unittest.case import TestCase
+
+from ldap_groups.aio import AsyncADGroup
+from ldap_groups.exceptions import InvalidGroupDN
+
+from tests.mock_directory import MockDirectory, BASE_DN
+
+
+class AsyncADGroupTest(TestCase):
+
+    def setUp(self):
+        self.directory = MockDirectory()
+        self.pool = self.directory.connection_pool()
+
+        self.parent_dn = self.directory.add_group("Parent")
+        self.first_child_dn = self.directory.add_group("First", member_of=[self.parent_dn])
+        self.second_child_dn = self.directory.add_group("Second", member_of=[self.parent_dn])
+
+        self.directory.add_user("alice", member_of=[self.parent_dn])
+        self.directory.add_user("bob", member_of=[self.first_child_dn, self.second_child_dn])
+        self.directory.add_user("carol", member_of=[self.second_child_dn])
+
+        self.group = AsyncADGroup.from_group(self.directory.group(self.parent_dn, connection_pool=self.pool),
+                                             max_concurrency=2)
+
+    def tearDown(self):
+        self.group.close()
+
+    def run_coroutine(self, coroutine):
+        loop = asyncio.new_event_loop()
+
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def test_get_member_info(self):
+        members = self.run_coroutine(self.group.get_member_info())
+
+        self.assertEqual(["alice"], [member["sAMAccountName"] for member in members])
+
+    def test_get_tree_members(self):
+        members = self.run_coroutine(self.group.get_tree_members())
+
+        self.assertEqual(["alice", "bob", "carol"], sorted(member["sAMAccountName"] for member in members))
+
+    def test_get_children_share_executor(self):
+        children = self.run_coroutine(self.group.get_children())
+
+        self.assertEqual({self.first_child_dn, self.second_child_dn}, {child.group_dn for child in children})
+        self.assertTrue(all(child._executor is self.group._executor for child in children))
+
+    def test_child_and_parent(self):
+        child = self.run_coroutine(self.group.child("First"))
+
+        self.assertEqual(self.first_child_dn, child.group_dn)
+        self.assertIsNone(self.run_coroutine(self.group.child("Missing")))
+        self.assertEqual(BASE_DN, self.run_coroutine(child.ancestor(2)).group_dn)
+
+    def test_invalid_group(self):
+        group = AsyncADGroup("CN=Missing," + BASE_DN, server_uri="mock_ad", base_dn=BASE_DN,
+                             connection_pool=self.pool)
+
+        with self.assertRaises(InvalidGroupDN):
+            self.run_coroutine(group.get_member_info())
+
+        group.close()
@@ -0,0 +1,29 @@
+"""
+.. module:: tests.test_benchmarks
+   :synopsis: LDAP Groups Benchmark Suite Tests.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from unittest.case import TestCase
+
+from benchmarks.suite import run, OPERATIONS
+
+
+class BenchmarkSuiteTest(TestCase):
+
+    def test_suite_runs(self):
+        measurements = list(run(scale=0.01, scenarios=["wide_fan_out"], trace_memory=False))
+
+        self.assertEqual(list(OPERATIONS), [measurement.operation for measurement in measurements])
+
+        for measurement in measurements:
+            self.assertGreater(measurement.round_trips, 0, "{operation} made no round trips.".format(
+                operation=measurement.operation
+            ))
+
+    def test_peak_memory(self):
+        measurement = next(run(scale=0.01, scenarios=["cycle"], operations=["get_member_info"]))
+
+        self.assertGreater(measurement.peak_memory, 0)
@@ -0,0 +1,110 @@
+"""
+.. module:: tests.test_cache
+   :synopsis: LDAP Groups Lookup Cache Tests.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from unittest.case import TestCase
+
+from ldap_groups.cache import LRUCache, DirectoryCache, USER_DN, ATTRIBUTES
+
+from tests.mock_directory import MockDirectory
+
+
+class LRUCacheTest(TestCase):
+
+    def test_get_and_set(self):
+        cache = LRUCache()
+        cache.set((USER_DN, "jdoe"), "CN=jdoe")
+
+        self.assertEqual("CN=jdoe", cache.get((USER_DN, "jdoe")))
+        self.assertIsNone(cache.get((USER_DN, "nobody")))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(max_size=2)
+        cache.set((USER_DN, "a"), 1)
+        cache.set((USER_DN, "b"), 2)
+        cache.get((USER_DN, "a"))
+        cache.set((USER_DN, "c"), 3)
+
+        self.assertEqual(1, cache.get((USER_DN, "a")))
+        self.assertIsNone(cache.get((USER_DN, "b")), "The least recently used entry was not evicted.")
+        self.assertEqual(2, len(cache))
+
+    def test_entries_expire(self):
+        cache = LRUCache(timeout=-1)
+        cache.set((USER_DN, "a"), 1)
+
+        self.assertIsNone(cache.get((USER_DN, "a")), "An expired entry was returned.")
+
+    def test_clear_namespace(self):
+        cache = LRUCache()
+        cache.set((USER_DN, "a"), 1)
+        cache.set((ATTRIBUTES, "a"), 2)
+        cache.clear_namespace(USER_DN)
+
+        self.assertIsNone(cache.get((USER_DN, "a")))
+        self.assertEqual(2, cache.get((ATTRIBUTES, "a")))
+
+
+class DirectoryCacheTest(TestCase):
+
+    def test_stats(self):
+        cache = DirectoryCache()
+        cache.get((USER_DN, "a"))
+        cache.set((USER_DN, "a"), "CN=a")
+        cache.get((USER_DN, "a"))
+        cache.get((USER_DN, "a"))
+
+        self.assertEqual({USER_DN: {'hits': 2, 'misses': 1}}, cache.stats())
+
+
+class ADGroupCacheTest(TestCase):
+
+    def setUp(self):
+        self.directory = MockDirectory()
+        self.group_dn = self.directory.add_group("Staff")
+        self.directory.add_user("jdoe")
+        self.pool = self.directory.connection_pool()
+
+        self.searches = []
+        checkout = self.pool.checkout
+
+        def counting_checkout():
+            self.searches.append(True)
+            return checkout()
+
+        self.pool.checkout = counting_checkout
+
+    def group(self):
+        return self.directory.group(self.group_dn, connection_pool=self.pool, lazy=True)
+
+    def test_attributes_are_shared_between_instances(self):
+        self.group().get_attributes()
+        del self.searches[:]
+
+        self.assertEqual("Staff", self.group().get_attribute("name"))
+        self.assertEqual([], self.searches, "Cached attributes were searched for again.")
+
+    def test_no_cache(self):
+        group = self.group()
+        group.get_attributes()
+        self.directory.dit[self.group_dn]["description"] = [b"Changed"]
+
+        self.assertIsNone(group.get_attribute("description"))
+        self.assertEqual("Changed", group.get_attribute("description", no_cache=True))
+
+    def test_user_dn_lookups_are_cached(self):
+        self.group()._get_user_dn("jdoe")
+        del self.searches[:]
+
+        self.assertEqual("CN=jdoe,DC=example,DC=com", self.group()._get_user_dn("JDOE"))
+        self.assertEqual([], self.searches, "A cached user dn was searched for again.")
+
+    def test_membership_changes_invalidate_attributes(self):
+        self.group().get_attributes()
+        self.group().add_member("jdoe")
+
+        self.assertEqual("CN=jdoe,DC=example,DC=com", self.group().get_attribute("member"))
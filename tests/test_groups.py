@@ -0,0 +1,576 @@
+"""
+.. module:: tests.test_groups
+   :synopsis: LDAP Groups Group Object Tests.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from unittest.case import TestCase
+
+from ldap_groups.exceptions import InvalidGroupDN, AccountDoesNotExist, EntryAlreadyExists, EntryNotInGroup
+from ldap_groups.groups import RECORDS, COLUMNS
+from ldap_groups.instrumentation import record_operations
+
+from tests.mock_directory import MockDirectory, BASE_DN
+
+
+class ADGroupTest(TestCase):
+
+    def setUp(self):
+        self.directory = MockDirectory()
+        self.pool = self.directory.connection_pool()
+
+        self.groups_ou = self.directory.add_ou("Groups")
+        self.parent_dn = self.directory.add_group("Parent", self.groups_ou)
+        self.child_dn = self.directory.add_group("Child", self.groups_ou, member_of=[self.parent_dn])
+        self.grandchild_dn = self.directory.add_group("Grandchild", self.groups_ou, member_of=[self.child_dn])
+
+        self.directory.add_user("alice", member_of=[self.parent_dn])
+        self.directory.add_user("bob", member_of=[self.child_dn])
+        self.directory.add_user("carol", member_of=[self.grandchild_dn])
+        self.directory.add_user("dave")
+
+        self.group = self.directory.group(self.parent_dn, connection_pool=self.pool)
+
+    def test_invalid_group(self):
+        with self.assertRaises(InvalidGroupDN):
+            self.directory.group("CN=Missing," + BASE_DN, connection_pool=self.pool)
+
+    def test_lazy_group_defers_validation(self):
+        group = self.directory.group("CN=Missing," + BASE_DN, connection_pool=self.pool, lazy=True)
+
+        with self.assertRaises(InvalidGroupDN):
+            group.get_member_info()
+
+    def test_lazy_group_does_not_connect(self):
+        self.pool.checkout = None
+
+        self.directory.group(self.parent_dn, connection_pool=self.pool, lazy=True)
+
+    def test_traversal_does_not_revalidate(self):
+        checkouts = []
+        checkout = self.pool.checkout
+
+        def counting_checkout():
+            checkouts.append(True)
+            return checkout()
+
+        self.pool.checkout = counting_checkout
+        ou = self.directory.group(self.groups_ou, connection_pool=self.pool)
+        del checkouts[:]
+
+        descendants = ou.get_descendants()
+        self.assertEqual(1, len(checkouts), "Building the descendant list took more than one search.")
+
+        descendants[0].get_member_info()
+        self.assertEqual(2, len(checkouts), "A descendant was validated again before its first search.")
+
+    def test_get_attribute(self):
+        self.assertEqual("Parent", self.group.get_attribute("name"))
+        self.assertIsNone(self.group.get_attribute("description"))
+
+    def test_get_attribute_only_fetches_that_attribute(self):
+        group = self.directory.group(self.parent_dn, connection_pool=self.pool, cache=False)
+        group.get_attribute("name")
+
+        self.assertNotIn("member", group.attributes, "Unrequested attributes were fetched.")
+        self.assertEqual({"name": ["Parent"]}, dict(group.get_attributes(names=["NAME"])))
+
+        group.get_attributes()
+        self.assertIn("member", group.attributes)
+
+    def test_get_attributes_no_cache(self):
+        self.group.get_attribute("description")
+        self.directory.dit[self.parent_dn]["description"] = [b"Changed"]
+
+        self.assertIsNone(self.group.get_attribute("description"))
+        self.assertEqual("Changed", self.group.get_attribute("description", no_cache=True))
+
+    def test_object_class_is_prefetched(self):
+        checkouts = []
+        checkout = self.pool.checkout
+
+        def counting_checkout():
+            checkouts.append(True)
+            return checkout()
+
+        self.pool.checkout = counting_checkout
+        group = self.directory.group(self.parent_dn, connection_pool=self.pool, cache=False)
+        children = group.get_children()
+        self.assertEqual(2, len(checkouts), "Finding the group's type took an extra search.")
+
+        children[0].get_children()
+        self.assertEqual(3, len(checkouts), "Finding a child's type took an extra search.")
+
+    def test_get_member_info(self):
+        members = self.group.get_member_info()
+
+        self.assertEqual(["alice"], [member["sAMAccountName"] for member in members])
+
+    def test_iter_member_info(self):
+        for index in range(5):
+            self.directory.add_user("user{index}".format(index=index), member_of=[self.parent_dn])
+
+        members = self.group.iter_member_info(page_size=2)
+
+        self.assertIsInstance(next(members), dict)
+        self.assertEqual(5, len(list(members)))
+
+    def test_member_records(self):
+        self.directory.add_user("erin", member_of=[self.parent_dn, self.grandchild_dn])
+        group = self.directory.group(self.parent_dn, connection_pool=self.pool,
+                                     attr_list=["sAMAccountName", "msDS-PrincipalName"])
+
+        records = group.get_member_info(result_type=RECORDS)
+
+        self.assertEqual(["alice", "erin"], sorted(record.sAMAccountName for record in records))
+        self.assertEqual([], records[0].get("msDS-PrincipalName"))
+        self.assertEqual(sorted(member["sAMAccountName"] for member in group.get_tree_members()),
+                         sorted(record.get("sAMAccountName") for record in group.get_tree_members(result_type=RECORDS)))
+        self.assertEqual(type(records[0]), type(next(group.iter_member_info(result_type=RECORDS))))
+
+    def test_member_columns(self):
+        columns = self.group.get_tree_members(result_type=COLUMNS)
+
+        self.assertEqual(3, len(columns))
+        self.assertEqual(["alice", "bob", "carol"], sorted(columns["samaccountname"]))
+        self.assertEqual(sorted(member["sAMAccountName"] for member in self.group.get_member_info()),
+                         [record.sAMAccountName for record in self.group.get_member_info(result_type=COLUMNS)])
+
+        with self.assertRaises(ValueError):
+            next(self.group.iter_member_info(result_type=COLUMNS))
+
+    def test_member_filter(self):
+        self.directory.add_user("erin", member_of=[self.parent_dn], department="Sales")
+        self.directory.add_user("fred", member_of=[self.parent_dn], department="Sales {x}")
+        self.directory.add_user("gina", member_of=[self.child_dn], department="Sales")
+
+        def names(members):
+            return sorted(member["sAMAccountName"] for member in members)
+
+        self.assertEqual(["erin"], names(self.group.get_member_info(member_filter={"department": "Sales"})))
+        self.assertEqual(["erin", "fred"], names(self.group.get_member_info(
+            member_filter={"department": ["Sales", "Sales {x}"]}
+        )))
+        self.assertEqual(["fred"], names(self.group.get_member_info(member_filter="(department=Sales {x})",
+                                                                    from_member_attribute=True)))
+        self.assertEqual(["erin", "gina"], names(self.group.get_tree_members(member_filter={"department": "Sales"},
+                                                                             workers=2)))
+
+    def test_member_projection(self):
+        members = self.group.get_tree_members(attr_list=["displayName"])
+
+        self.assertEqual([{"displayName": "Alice"}, {"displayName": "Bob"}, {"displayName": "Carol"}],
+                         sorted(members, key=lambda member: member["displayName"]))
+        self.assertEqual(["Alice"], [record.displayName for record in self.group.get_member_info(
+            result_type=RECORDS, attr_list=["displayName"]
+        )])
+        self.assertEqual({"displayName": "Alice"}, next(self.group.iter_member_info(attr_list=["displayName"])))
+
+    def test_iter_member_dns(self):
+        user_dns = {self.directory.add_user("user{index}".format(index=index), member_of=[self.parent_dn])
+                    for index in range(5)}
+        group = self.directory.group(self.parent_dn, connection_pool=self.directory.connection_pool(max_value_range=2))
+
+        expected = user_dns | {self.child_dn, "CN=alice," + BASE_DN}
+        self.assertEqual(expected, set(group.iter_member_dns()), "A range of member values was lost.")
+        self.assertEqual(expected, set(group.get_member_dns(range_size=3)))
+
+    def test_iter_member_dns_of_empty_group(self):
+        empty_dn = self.directory.add_group("Empty")
+
+        self.assertEqual([], self.directory.group(empty_dn, connection_pool=self.pool).get_member_dns())
+
+    def test_get_member_info_from_member_attribute(self):
+        for index in range(5):
+            self.directory.add_user("user{index}".format(index=index), member_of=[self.parent_dn])
+
+        group = self.directory.group(self.parent_dn, connection_pool=self.directory.connection_pool(max_value_range=2))
+        members = group.get_member_info(page_size=2, from_member_attribute=True)
+
+        self.assertEqual(
+            sorted(member["sAMAccountName"] for member in group.get_member_info()),
+            sorted(member["sAMAccountName"] for member in members)
+        )
+
+    def test_closed_generator_returns_connection(self):
+        self.pool.size = 1
+        members = self.group.iter_member_info()
+        next(members)
+        members.close()
+
+        self.assertEqual(1, len(self.pool._idle), "The generator's connection was not checked back in.")
+
+    def test_iter_tree_members(self):
+        members = self.group.iter_tree_members(page_size=1)
+
+        self.assertEqual({"alice", "bob", "carol"}, {member["sAMAccountName"] for member in members})
+
+    def test_iter_children_and_descendants(self):
+        ou = self.directory.group(self.groups_ou, connection_pool=self.pool)
+
+        self.assertEqual([self.child_dn], [child.group_dn for child in self.group.iter_children()])
+        self.assertEqual(set(descendant.group_dn for descendant in ou.get_descendants()),
+                         set(descendant.group_dn for descendant in ou.iter_descendants(page_size=1)))
+
+    def test_get_tree_members(self):
+        members = self.group.get_tree_members()
+
+        self.assertEqual({"alice", "bob", "carol"}, {member["sAMAccountName"] for member in members})
+
+    def test_get_tree_members_deduplicates(self):
+        self.directory.add_user("erin", member_of=[self.parent_dn, self.grandchild_dn])
+
+        members = [member["sAMAccountName"] for member in self.group.get_tree_members()]
+
+        self.assertEqual(1, members.count("erin"), "A user in two nested groups was listed twice.")
+
+    def test_get_tree_members_from_ou(self):
+        ou = self.directory.group(self.groups_ou, connection_pool=self.pool)
+
+        self.assertEqual({"alice", "bob", "carol"}, {member["sAMAccountName"] for member in ou.get_tree_members()})
+
+    def test_get_tree_members_in_parallel(self):
+        self.directory.add_user("erin", member_of=[self.parent_dn, self.grandchild_dn])
+
+        self.assertEqual(sorted(member["sAMAccountName"] for member in self.group.get_tree_members()),
+                         sorted(member["sAMAccountName"] for member in self.group.get_tree_members(workers=3)))
+
+    def test_get_tree_members_with_cycle(self):
+        self.directory.add_membership(self.grandchild_dn, self.parent_dn)
+
+        for workers in (1, 2):
+            members = self.group.get_tree_members(workers=workers)
+            self.assertEqual(["alice", "bob", "carol"], sorted(member["sAMAccountName"] for member in members))
+
+    def test_get_tree_members_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            self.group.get_tree_members(strategy="depth_first")
+
+    def test_get_children(self):
+        self.assertEqual([self.child_dn], [child.group_dn for child in self.group.get_children()])
+
+    def test_ou_children(self):
+        ou = self.directory.group(self.groups_ou, connection_pool=self.pool)
+
+        children = {child.group_dn for child in ou.get_children()}
+
+        self.assertTrue({self.parent_dn, self.child_dn, self.grandchild_dn} <= children)
+
+    def test_get_descendants(self):
+        ou = self.directory.group(self.groups_ou, connection_pool=self.pool)
+
+        self.assertEqual({self.groups_ou, self.parent_dn, self.child_dn, self.grandchild_dn},
+                         {descendant.group_dn for descendant in ou.get_descendants()})
+
+    def test_child(self):
+        self.assertEqual(self.child_dn, self.group.child("Child").group_dn)
+        self.assertIsNone(self.group.child("Grandchild"))
+
+    def test_parent_and_ancestor(self):
+        self.assertEqual(self.groups_ou, self.group.parent().group_dn)
+        self.assertEqual(BASE_DN, self.group.ancestor(2).group_dn)
+        self.assertEqual(self.group, self.group.ancestor(0))
+
+    def test_derived_groups_share_the_pool(self):
+        self.assertIs(self.pool, self.group.get_children()[0].connection_pool)
+        self.assertIs(self.pool, self.group.parent().connection_pool)
+
+    def test_get_user_groups(self):
+        self.assertEqual(sorted([self.parent_dn, self.child_dn, self.grandchild_dn]),
+                         sorted(self.group.get_user_groups("carol")))
+        self.assertEqual([self.grandchild_dn], self.group.get_user_groups("carol", nested=False))
+        self.assertEqual([], self.group.get_user_groups("dave"))
+
+        with self.assertRaises(AccountDoesNotExist):
+            self.group.get_user_groups("nobody")
+
+    def test_get_user_groups_round_trips(self):
+        self.group.get_user_groups("carol")
+
+        with record_operations() as operations:
+            self.assertEqual(sorted([self.parent_dn, self.child_dn]), sorted(self.group.get_user_groups("bob")))
+
+        self.assertEqual(["USER_SEARCH", "TOKEN_GROUPS_SEARCH"], [operation.template for operation in operations],
+                         "Group SIDs that were already mapped were searched for again.")
+
+        with record_operations() as operations:
+            self.group.get_user_groups("bob")
+            self.group.get_user_groups("BOB")
+
+        self.assertEqual([], operations, "A cached user's groups were fetched again.")
+
+    def test_get_user_groups_after_modification(self):
+        self.assertEqual([self.parent_dn], self.group.get_user_groups("alice"))
+
+        self.directory.group(self.grandchild_dn).add_member("alice")
+
+        self.assertEqual(sorted([self.parent_dn, self.child_dn, self.grandchild_dn]),
+                         sorted(self.group.get_user_groups("alice")))
+
+    def test_add_and_remove_member(self):
+        dave_dn = "CN=dave," + BASE_DN
+
+        self.group.add_member("dave")
+        self.assertIn(dave_dn, self._member_dns())
+
+        self.group.remove_member("dave")
+        self.assertNotIn(dave_dn, self._member_dns())
+
+    def test_add_missing_member(self):
+        with self.assertRaises(AccountDoesNotExist):
+            self.group.add_member("nobody")
+
+    def _member_dns(self):
+        return [dn.decode("utf-8") for dn in self.directory.dit[self.parent_dn].get("member", [])]
+
+    def test_add_existing_member(self):
+        with self.assertRaises(EntryAlreadyExists):
+            self.group.add_member("alice")
+
+    def test_remove_missing_member(self):
+        with self.assertRaises(EntryNotInGroup):
+            self.group.remove_member("dave")
+
+
+class BatchModificationTest(TestCase):
+
+    def setUp(self):
+        self.directory = MockDirectory()
+        self.group_dn = self.directory.add_group("Staff")
+        self.other_dn = self.directory.add_group("Other")
+
+        for index in range(10):
+            self.directory.add_user("user{index}".format(index=index),
+                                    member_of=[self.group_dn] if index < 3 else [])
+
+        self.group = self.directory.group(self.group_dn)
+
+    def _member_dns(self):
+        return {dn.decode("utf-8") for dn in self.directory.dit[self.group_dn].get("member", [])}
+
+    def test_add_members(self):
+        values = ["user{index}".format(index=index) for index in range(10)] + ["nobody"]
+        result = self.group.add_members(values, chunk_size=4)
+
+        self.assertEqual(sorted(values[3:10]), sorted(result.modified))
+        self.assertEqual(sorted(values[:3]), sorted(result.unchanged))
+        self.assertEqual(["nobody"], result.missing)
+        self.assertFalse(result.succeeded)
+        self.assertEqual(10, len(self._member_dns()))
+
+    def test_lookup_is_case_insensitive(self):
+        result = self.group.add_members(["USER5"])
+
+        self.assertEqual(["USER5"], result.modified)
+
+    def test_remove_members(self):
+        result = self.group.remove_members(["user1", "user2", "user7"])
+
+        self.assertEqual(["user1", "user2"], sorted(result.modified))
+        self.assertEqual(["user7"], result.unchanged)
+        self.assertEqual({"CN=user0," + BASE_DN}, self._member_dns())
+
+    def test_add_and_remove_children(self):
+        result = self.group.add_children(["Other", "Missing"])
+
+        self.assertEqual(["Other"], result.modified)
+        self.assertEqual(["Missing"], result.missing)
+        self.assertIn(self.other_dn, self._member_dns())
+
+        result = self.group.remove_children(["Other"])
+
+        self.assertTrue(result.succeeded)
+        self.assertNotIn(self.other_dn, self._member_dns())
+
+    def test_set_members(self):
+        self.directory.add_membership(self.group_dn, self.other_dn)
+
+        with record_operations() as operations:
+            result = self.group.set_members(["user1", "USER2", "user5", "user6", "nobody"], chunk_size=1)
+
+        self.assertEqual(["user5", "user6"], sorted(result.added.modified))
+        self.assertEqual(["user0"], result.removed.modified)
+        self.assertEqual(["USER2", "user1"], sorted(result.unchanged))
+        self.assertEqual(["nobody"], result.missing)
+        self.assertEqual({value: "CN={user},".format(user=value.lower()) + BASE_DN
+                          for value in ("user0", "user1", "USER2", "user5", "user6")}, result.dns)
+        self.assertEqual({"CN=user{index},".format(index=index) + BASE_DN for index in (1, 2, 5, 6)} | {self.other_dn},
+                         self._member_dns(), "Child groups should be left alone.")
+        self.assertEqual(["USER_BATCH_SEARCH", "MEMBER_RANGE_SEARCH", "USER_ACCOUNT_DN_SEARCH"],
+                         [operation.template for operation in operations][:3])
+
+    def test_set_members_only_removes_user_accounts(self):
+        contact_dn = self.directory._add("CN=Vendor," + BASE_DN, {
+            "objectClass": ["top", "person", "organizationalPerson", "contact"], "objectCategory": "person",
+            "name": "Vendor", "memberOf": [],
+        })
+        computer_dn = self.directory.add_user("laptop", objectClass=["top", "person", "user", "computer"])
+        foreign_dn = "CN=OtherDomainGroup,DC=other,DC=com"
+
+        self.directory.add_membership(self.group_dn, contact_dn)
+        self.directory.add_membership(self.group_dn, computer_dn)
+        self.directory.dit[self.group_dn]["member"].append(foreign_dn.encode("utf-8"))
+
+        result = self.group.set_members(["user0"], dry_run=True)
+
+        self.assertEqual(["user1", "user2"], sorted(result.removed.modified))
+
+        self.group.set_members(["user0"])
+
+        self.assertEqual({"CN=user0," + BASE_DN, contact_dn, computer_dn, foreign_dn}, self._member_dns())
+
+    def test_set_members_dry_run(self):
+        result = self.group.set_members(["user0", "user9"], dry_run=True)
+
+        self.assertEqual(["user9"], result.added.modified)
+        self.assertEqual(["user1", "user2"], sorted(result.removed.modified))
+        self.assertEqual("CN=user1," + BASE_DN, result.dns["user1"])
+        self.assertEqual({"CN=user{index},".format(index=index) + BASE_DN for index in range(3)}, self._member_dns())
+
+
+class DNResolutionTest(TestCase):
+
+    def setUp(self):
+        self.directory = MockDirectory()
+        self.group_dn = self.directory.add_group("Staff")
+        self.other_ou = self.directory.add_ou("Other")
+
+        for index in range(5):
+            self.directory.add_user("user{index}".format(index=index))
+
+        self.duplicate_dns = [self.directory.add_user("twin"), self.directory.add_user("twin", self.other_ou)]
+        self.group = self.directory.group(self.group_dn)
+
+    def test_resolve_user_dns(self):
+        resolution = self.group.resolve_user_dns(["user0", "user3", "twin", "nobody"], chunk_size=2)
+
+        self.assertEqual({"user0": "CN=user0," + BASE_DN, "user3": "CN=user3," + BASE_DN}, dict(resolution))
+        self.assertEqual(["nobody"], resolution.missing)
+        self.assertEqual(["twin"], list(resolution.ambiguous))
+        self.assertEqual(sorted(self.duplicate_dns), sorted(resolution.ambiguous["twin"]))
+
+    def test_resolve_group_dns(self):
+        resolution = self.group.resolve_group_dns(["staff", "Missing"])
+
+        self.assertEqual({"staff": self.group_dn}, dict(resolution))
+        self.assertEqual(["Missing"], resolution.missing)
+
+    def test_values_with_filter_characters(self):
+        resolution = self.group.resolve_user_dns(["user*", "(user0)"])
+
+        self.assertEqual({}, dict(resolution))
+        self.assertEqual(["user*", "(user0)"], sorted(resolution.missing, reverse=True))
+
+
+class MemberPageTest(TestCase):
+
+    def setUp(self):
+        self.directory = MockDirectory()
+        self.group_dn = self.directory.add_group("Staff")
+
+        for name, display_name in [("user0", "Erin"), ("user1", "bob"), ("user2", "Dave"), ("user3", "Alice"),
+                                   ("user4", "Carol")]:
+            self.directory.add_user(name, member_of=[self.group_dn], displayName=display_name)
+
+        self.directory.add_user("user5", member_of=[self.group_dn], displayName="")
+        self.directory.add_user("outsider", displayName="Aaron")
+
+    def _names(self, page):
+        return [member["sAMAccountName"] for member in page]
+
+    def test_virtual_list_view(self):
+        pool = self.directory.connection_pool()
+        group = self.directory.group(self.group_dn, connection_pool=pool, cache=False)
+
+        page = group.get_member_page(offset=1, limit=3)
+
+        self.assertEqual(["user1", "user4", "user2"], self._names(page))
+        self.assertEqual((1, 3, 6, "displayName"), (page.offset, page.limit, page.total, page.sort_by))
+        self.assertTrue(page.server_sorted)
+        self.assertTrue(page.has_next)
+        self.assertEqual([{"sAMAccountName": "user3"}], group.get_member_page(limit=1, attr_list=["sAMAccountName"]))
+
+        self.assertEqual(["user0", "user2"], self._names(group.get_member_page(limit=2, reverse=True)))
+        self.assertEqual(["user5"], self._names(group.get_member_page(offset=5, limit=2)))
+        self.assertEqual([], group.get_member_page(offset=10))
+        self.assertEqual(5, pool.virtual_list_views)
+
+    def test_fallback_caches_sorted_dns(self):
+        pool = self.directory.connection_pool(virtual_list_view=False)
+        group = self.directory.group(self.group_dn, connection_pool=pool)
+
+        with record_operations() as operations:
+            first_page = group.get_member_page(offset=0, limit=4)
+            second_page = group.get_member_page(offset=4, limit=4)
+
+        self.assertEqual(["user3", "user1", "user4", "user2"], self._names(first_page))
+        self.assertEqual(["user0", "user5"], self._names(second_page))
+        self.assertEqual(6, second_page.total)
+        self.assertFalse(second_page.server_sorted)
+        self.assertFalse(second_page.has_next)
+        self.assertEqual(["MEMBER_PAGE_SEARCH", "GROUP_MEMBER_SEARCH", "MEMBER_DN_SEARCH", "MEMBER_DN_SEARCH"],
+                         [operation.template for operation in operations])
+
+    def test_membership_changes_clear_sorted_dns(self):
+        pool = self.directory.connection_pool(virtual_list_view=False)
+        group = self.directory.group(self.group_dn, connection_pool=pool)
+
+        self.assertEqual(6, group.get_member_page().total)
+
+        group.add_member("outsider")
+
+        self.assertEqual(["outsider", "user3"], self._names(group.get_member_page(limit=2)))
+
+    def test_invalid_page(self):
+        group = self.directory.group(self.group_dn)
+
+        with self.assertRaises(ValueError):
+            group.get_member_page(limit=0)
+
+
+class GlobalCatalogTest(TestCase):
+
+    def setUp(self):
+        # The Global Catalog also holds a member from another domain of the forest
+        self.directory = MockDirectory()
+        self.global_catalog = MockDirectory()
+
+        for directory in (self.directory, self.global_catalog):
+            self.group_dn = directory.add_group("Staff")
+            directory.add_user("alice", member_of=[self.group_dn])
+
+        self.global_catalog.add_user("eve", member_of=[self.group_dn])
+        self.global_catalog.add_user("frank")
+
+    def group(self, **kwargs):
+        return self.directory.group(self.group_dn, global_catalog_pool=self.global_catalog.connection_pool(),
+                                    cache=False, **kwargs)
+
+    def test_member_search_uses_global_catalog(self):
+        members = self.group().get_member_info()
+
+        self.assertEqual(["alice", "eve"], sorted(member["sAMAccountName"] for member in members))
+
+    def test_lookups_use_global_catalog(self):
+        group = self.group()
+        group.add_member("frank")
+
+        self.assertIn(b"CN=frank," + BASE_DN.encode("utf-8"), self.directory.dit[self.group_dn]["member"],
+                      "The user found in the Global Catalog was not added on the domain controller.")
+        self.assertEqual(2, len(self.global_catalog.dit[self.group_dn]["member"]), "The Global Catalog was modified.")
+
+    def test_member_search_overrides_are_routed_again(self):
+        group = self.group()
+
+        self.assertIn("global_catalog", group._member_search(group.GROUP_MEMBER_SEARCH, {"mail": "a@example.com"}))
+        self.assertNotIn("global_catalog", group._member_search(group.GROUP_MEMBER_SEARCH, "(employeeNumber=7)"))
+        self.assertNotIn("global_catalog", group._member_search(group.GROUP_MEMBER_SEARCH,
+                                                                attr_list=["employeeNumber"]))
+
+    def test_unreplicated_attributes_use_domain(self):
+        group = self.group(attr_list=["sAMAccountName", "employeeNumber"])
+
+        self.assertNotIn("global_catalog", group.GROUP_MEMBER_SEARCH)
+        self.assertEqual(["alice"], [member["sAMAccountName"] for member in group.get_member_info()])
@@ -0,0 +1,112 @@
+"""
+.. module:: tests.test_index
+   :synopsis: LDAP Groups Membership Index Tests.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+import os
+import shutil
+import tempfile
+from unittest.case import TestCase
+
+from ldap_groups.index import MembershipIndex
+from ldap_groups.instrumentation import record_operations
+from ldap_groups.snapshot import export_snapshot
+
+from tests.mock_directory import MockDirectory
+
+
+class MembershipIndexTest(TestCase):
+
+    def setUp(self):
+        self.directory = MockDirectory()
+
+        self.groups_ou = self.directory.add_ou("Groups")
+        self.parent_dn = self.directory.add_group("Parent", self.groups_ou)
+        self.child_dn = self.directory.add_group("Child", self.groups_ou, member_of=[self.parent_dn])
+        self.grandchild_dn = self.directory.add_group("Grandchild", self.groups_ou, member_of=[self.child_dn])
+
+        # A cycle: Grandchild is also a parent of Parent
+        self.directory.add_membership(self.grandchild_dn, self.parent_dn)
+
+        self.alice_dn = self.directory.add_user("alice", member_of=[self.parent_dn])
+        self.bob_dn = self.directory.add_user("bob", member_of=[self.child_dn])
+        self.carol_dn = self.directory.add_user("carol", member_of=[self.grandchild_dn])
+        self.dave_dn = self.directory.add_user("dave")
+
+        self.parent = self.directory.group(self.parent_dn)
+
+        with record_operations() as operations:
+            self.index = MembershipIndex.from_directory(self.parent, search_base_dn=self.groups_ou, page_size=2)
+
+        self.load_operations = operations
+
+    def test_load_takes_two_searches(self):
+        self.assertEqual(["INDEX_GROUP_SEARCH", "INDEX_USER_SEARCH"],
+                         [operation.template for operation in self.load_operations])
+
+    def test_is_member(self):
+        self.assertTrue(self.index.is_member(self.carol_dn, self.parent_dn))
+        self.assertTrue(self.index.is_member(self.carol_dn, self.parent))
+        self.assertFalse(self.index.is_member(self.carol_dn, self.parent_dn, nested=False))
+        self.assertTrue(self.index.is_member(self.child_dn, self.parent_dn, nested=False))
+        self.assertFalse(self.index.is_member(self.dave_dn, self.parent_dn))
+        self.assertFalse(self.index.is_member("CN=Missing,DC=example,DC=com", self.parent_dn))
+
+    def test_members_of_matches_tree_members(self):
+        for group_dn in [self.parent_dn, self.child_dn, self.grandchild_dn]:
+            live_dns = sorted(member["distinguishedName"] for member in self.directory.group(group_dn).get_tree_members())
+
+            self.assertEqual(live_dns, sorted(self.index.members_of(group_dn)))
+
+        self.assertEqual([self.bob_dn], self.index.members_of(self.child_dn, nested=False))
+
+    def test_groups_of(self):
+        self.assertEqual(sorted([self.parent_dn, self.child_dn, self.grandchild_dn]),
+                         sorted(self.index.groups_of(self.bob_dn)))
+        self.assertEqual([self.child_dn], self.index.groups_of(self.bob_dn, nested=False))
+        self.assertEqual([], self.index.groups_of(self.dave_dn))
+
+    def test_incremental_update(self):
+        lone_dn = self.directory.add_group("Lone", self.groups_ou)
+        lone = self.directory.group(lone_dn)
+
+        self.assertTrue(self.index.is_member(self.carol_dn, self.child_dn))
+
+        self.index.remove_child(self.directory.group(self.grandchild_dn), "Parent")
+        self.index.remove_child(self.parent, "Child")
+
+        self.assertFalse(self.index.is_member(self.carol_dn, self.parent_dn))
+        self.assertEqual([self.alice_dn], self.index.members_of(self.parent_dn))
+
+        self.index.add_member(lone, "dave")
+        self.index.add_child(self.parent, "Lone")
+
+        self.assertTrue(self.index.is_member(self.dave_dn, self.parent_dn))
+        self.assertEqual(sorted([self.alice_dn, self.dave_dn]), sorted(self.index.members_of(self.parent_dn)))
+
+        self.index.remove_member(lone, "dave")
+
+        self.assertFalse(self.index.is_member(self.dave_dn, self.parent_dn))
+        self.assertEqual([], self.index.groups_of(self.dave_dn))
+
+        # The directory agrees with the index
+        self.assertEqual([self.alice_dn], [member["distinguishedName"] for member in self.parent.get_tree_members()])
+
+    def test_from_snapshot(self):
+        temporary_directory = tempfile.mkdtemp()
+
+        try:
+            snapshot = export_snapshot(self.directory.group(self.groups_ou),
+                                       os.path.join(temporary_directory, "groups.sqlite3"))
+
+            with snapshot:
+                index = MembershipIndex.from_snapshot(snapshot)
+
+            for group_dn in [self.parent_dn, self.child_dn, self.grandchild_dn]:
+                self.assertEqual(sorted(self.index.members_of(group_dn)), sorted(index.members_of(group_dn)))
+                self.assertFalse(index.is_member(group_dn, self.groups_ou))
+        finally:
+            shutil.rmtree(temporary_directory)
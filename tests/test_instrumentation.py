@@ -0,0 +1,107 @@
+"""
+.. module:: tests.test_instrumentation
+   :synopsis: LDAP Groups Instrumentation Tests.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from unittest.case import TestCase
+
+from ldap_groups.exceptions import EntryAlreadyExists
+from ldap_groups.instrumentation import (record_operations, add_hook, remove_hook, LoggingHook, StatsdHook,
+                                         SEARCH, PAGED_SEARCH, MODIFY)
+
+from tests.mock_directory import MockDirectory
+
+
+class FakeStatsdClient:
+
+    def __init__(self):
+        self.counters = {}
+        self.timings = {}
+
+    def incr(self, name, count=1):
+        self.counters[name] = self.counters.get(name, 0) + count
+
+    def timing(self, name, milliseconds):
+        self.timings[name] = milliseconds
+
+
+class InstrumentationTest(TestCase):
+
+    def setUp(self):
+        self.directory = MockDirectory()
+        self.group_dn = self.directory.add_group("Staff")
+
+        for index in range(5):
+            self.directory.add_user("user{index}".format(index=index), member_of=[self.group_dn])
+
+        self.group = self.directory.group(self.group_dn, connection_pool=self.directory.connection_pool())
+
+    def test_search_is_recorded(self):
+        with record_operations() as operations:
+            self.group.get_attribute("name")
+
+        self.assertEqual(1, len(operations))
+        self.assertEqual(SEARCH, operations[0].operation_type)
+        self.assertEqual("ATTRIBUTES_SEARCH", operations[0].template)
+        self.assertEqual(self.group_dn, operations[0].base_dn)
+        self.assertEqual(1, operations[0].entries)
+        self.assertGreater(operations[0].bytes, 0)
+
+    def test_paged_search_pages_are_counted(self):
+        with record_operations() as operations:
+            members = self.group.get_member_info(page_size=2)
+
+        self.assertEqual(5, len(members))
+        self.assertEqual([(PAGED_SEARCH, "GROUP_MEMBER_SEARCH")],
+                         [(operation.operation_type, operation.template) for operation in operations])
+        self.assertEqual(3, operations[0].pages)
+        self.assertEqual(5, operations[0].entries)
+
+    def test_failed_modification_is_recorded(self):
+        with record_operations() as operations:
+            with self.assertRaises(EntryAlreadyExists):
+                self.group.add_member("user0")
+
+        self.assertEqual(MODIFY, operations[-1].operation_type)
+        self.assertIsNotNone(operations[-1].error)
+
+    def test_failing_hook_is_ignored(self):
+        def failing_hook(operation):
+            raise RuntimeError
+
+        add_hook(failing_hook)
+
+        try:
+            with self.assertLogs("ldap_groups.instrumentation"):
+                self.assertEqual("Staff", self.group.get_attribute("name"))
+        finally:
+            remove_hook(failing_hook)
+
+    def test_logging_hook(self):
+        hook = LoggingHook()
+        add_hook(hook)
+
+        try:
+            with self.assertLogs("ldap_groups.operations", level="DEBUG") as logs:
+                self.group.get_attribute("name")
+        finally:
+            remove_hook(hook)
+
+        self.assertEqual("ATTRIBUTES_SEARCH", logs.records[0].ldap_operation['template'])
+
+    def test_statsd_hook(self):
+        client = FakeStatsdClient()
+        hook = StatsdHook(client)
+        add_hook(hook)
+
+        try:
+            self.group.get_member_info(page_size=2)
+        finally:
+            remove_hook(hook)
+
+        self.assertEqual(1, client.counters["ldap_groups.paged_search.GROUP_MEMBER_SEARCH.operations"])
+        self.assertEqual(3, client.counters["ldap_groups.paged_search.GROUP_MEMBER_SEARCH.round_trips"])
+        self.assertIn("ldap_groups.paged_search.GROUP_MEMBER_SEARCH.duration", client.timings)
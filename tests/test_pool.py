@@ -0,0 +1,276 @@
+"""
+.. module:: tests.test_pool
+   :synopsis: LDAP Groups Connection Pool Tests.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+import threading
+import time
+from unittest.case import TestCase
+
+from ldap3.core.exceptions import LDAPSocketReceiveError
+
+from ldap_groups.exceptions import ConnectionPoolExhausted, InvalidCredentials, LDAPServerUnreachable
+from ldap_groups.pool import (ConnectionPool, MultiServerPool, get_pool, close_pools, FIRST_AVAILABLE,
+                              LEAST_LATENCY)
+
+from tests.mock_directory import MockConnectionPool, MockDirectory, BASE_DN, BIND_DN
+
+
+class ConnectionPoolTest(TestCase):
+
+    def setUp(self):
+        self.directory = MockDirectory()
+        self.pool = self.directory.connection_pool(size=2, checkout_timeout=0.1)
+
+    def test_connections_are_bound(self):
+        with self.pool.connection() as connection:
+            self.assertTrue(connection.bound, "Checked out connection was not bound.")
+
+    def test_connections_are_reused(self):
+        with self.pool.connection() as first_connection:
+            pass
+
+        with self.pool.connection() as second_connection:
+            self.assertIs(first_connection, second_connection, "Idle connection was not reused.")
+
+    def test_unhealthy_connections_are_discarded(self):
+        with self.pool.connection() as first_connection:
+            first_connection.unbind()
+
+        with self.pool.connection() as second_connection:
+            self.assertIsNot(first_connection, second_connection, "Closed connection was handed out again.")
+            self.assertTrue(second_connection.bound)
+
+    def test_idle_timeout(self):
+        self.pool.idle_timeout = -1
+
+        with self.pool.connection() as first_connection:
+            pass
+
+        with self.pool.connection() as second_connection:
+            self.assertIsNot(first_connection, second_connection, "Expired connection was handed out again.")
+
+    def test_dead_idle_connections_are_replaced(self):
+        with self.pool.connection() as first_connection:
+            pass
+
+        def dropped(*args, **kwargs):
+            raise LDAPSocketReceiveError("connection reset by peer")
+
+        # Still looks bound, but the server dropped the socket while it sat idle
+        first_connection.search = dropped
+        self.pool._idle = [(first_connection, time.time() - self.pool.health_check_interval - 1)]
+
+        with self.pool.connection() as second_connection:
+            self.assertIsNot(first_connection, second_connection, "Dropped connection was handed out again.")
+            self.assertTrue(second_connection.bound)
+
+    def test_live_idle_connections_are_reused(self):
+        with self.pool.connection() as first_connection:
+            pass
+
+        self.pool._idle = [(first_connection, time.time() - self.pool.health_check_interval - 1)]
+
+        with self.pool.connection() as second_connection:
+            self.assertIs(first_connection, second_connection, "Live idle connection was not reused.")
+
+    def test_size_is_bounded(self):
+        first_connection = self.pool.checkout()
+        second_connection = self.pool.checkout()
+
+        with self.assertRaises(ConnectionPoolExhausted):
+            self.pool.checkout()
+
+        self.pool.checkin(first_connection)
+        self.assertIs(first_connection, self.pool.checkout(), "Checked in connection was not reused.")
+        self.pool.checkin(first_connection)
+        self.pool.checkin(second_connection)
+
+    def test_concurrent_checkout(self):
+        self.pool.checkout_timeout = 5
+        checked_out = []
+
+        def worker():
+            for _index in range(20):
+                with self.pool.connection() as connection:
+                    checked_out.append(connection)
+
+        threads = [threading.Thread(target=worker) for _index in range(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(80, len(checked_out))
+        self.assertLessEqual(len(set(map(id, checked_out))), 2, "More connections were opened than the pool allows.")
+
+    def test_invalid_credentials(self):
+        pool = ConnectionPool(self.directory.server, BIND_DN, "wrong",
+                              connection_options=self.pool.connection_options)
+
+        with self.assertRaises(InvalidCredentials):
+            pool.checkout()
+
+
+class UnreachablePool(MockConnectionPool):
+    """A mock connection pool whose server is down."""
+
+    def _create_connection(self):
+        raise LDAPServerUnreachable("The LDAP server is down or the SERVER_URI is invalid.")
+
+
+class MultiServerPoolTest(TestCase):
+
+    def setUp(self):
+        self.directories = [MockDirectory(), MockDirectory()]
+        self.pools = [directory.connection_pool() for directory in self.directories]
+
+    def servers_used(self, pool, count, write=False):
+        servers = []
+
+        for _index in range(count):
+            with (pool.write_connection() if write else pool.connection()) as connection:
+                servers.append(self.directories.index(next(directory for directory in self.directories
+                                                           if directory.server is connection.server)))
+
+        return servers
+
+    def test_round_robin(self):
+        self.assertEqual([0, 1, 0, 1], self.servers_used(MultiServerPool(self.pools), 4))
+
+    def test_first_available(self):
+        pool = MultiServerPool([UnreachablePool(self.directories[0].server, BIND_DN)] + self.pools[1:],
+                               strategy=FIRST_AVAILABLE)
+
+        self.assertEqual([1, 1], self.servers_used(pool, 2))
+
+        self.assertEqual(1, pool._states[0].failures, "The unreachable server was not marked down.")
+
+    def test_down_servers_are_skipped(self):
+        pool = MultiServerPool(self.pools, strategy=FIRST_AVAILABLE)
+
+        with pool.connection() as connection:
+            connection.unbind()
+
+        self.assertEqual([1, 1], self.servers_used(pool, 2))
+
+        # The retry interval passes
+        pool._states[0].down_until = 0
+        self.assertEqual([0], self.servers_used(pool, 1), "A recovered server was not used again.")
+
+    def test_every_server_down(self):
+        pool = MultiServerPool([UnreachablePool(directory.server, BIND_DN) for directory in self.directories])
+
+        with self.assertRaises(LDAPServerUnreachable):
+            pool.checkout()
+
+    def test_least_latency(self):
+        pool = MultiServerPool(self.pools, strategy=LEAST_LATENCY)
+        pool._record_latency(0, 0.5)
+        pool._record_latency(1, 0.1)
+
+        self.assertEqual([1, 1], self.servers_used(pool, 2))
+
+    def test_latency_is_the_round_trip_time(self):
+        pool = MultiServerPool(self.pools[:1], strategy=LEAST_LATENCY)
+
+        with pool.connection() as connection:
+            connection.search(BASE_DN, "(objectClass=*)")
+
+            # Consuming the results doesn't count
+            time.sleep(0.2)
+
+        self.assertLess(pool._states[0].latency, 0.2)
+
+        with pool.connection():
+            pass
+
+        self.assertLess(pool._states[0].latency, 0.2, "A checkout without round trips changed the latency.")
+
+    def test_pinned_writes(self):
+        pool = MultiServerPool(self.pools, write_server_uri=self.pools[1].server_uri)
+
+        self.assertEqual([1, 1], self.servers_used(pool, 2, write=True))
+        self.assertEqual([0, 0], self.servers_used(pool, 2), "Searches were sent to the write server.")
+
+    def test_pinned(self):
+        pool = MultiServerPool(self.pools)
+
+        with pool.pinned():
+            servers = self.servers_used(pool, 3)
+
+        self.assertEqual(1, len(set(servers)), "Pinned checkouts went to more than one server.")
+        self.assertEqual(2, len(set(self.servers_used(pool, 2))))
+
+    def test_unknown_write_server(self):
+        with self.assertRaises(ValueError):
+            MultiServerPool(self.pools, write_server_uri="ldap://elsewhere.example.com")
+
+    def test_group_modifications_use_write_server(self):
+        for directory in self.directories:
+            group_dn = directory.add_group("staff")
+            directory.add_user("alice")
+
+        pool = MultiServerPool(self.pools, write_server_uri=self.pools[1].server_uri)
+        group = self.directories[0].group(group_dn, connection_pool=pool, cache=False)
+        group.add_member("alice")
+
+        self.assertEqual([], self.directories[0].dit[group_dn]["member"])
+        self.assertEqual(1, len(self.directories[1].dit[group_dn]["member"]))
+
+
+class SharedPoolTest(TestCase):
+
+    def tearDown(self):
+        close_pools()
+
+    def test_pools_are_shared_by_server_and_bind_dn(self):
+        self.assertIs(get_pool("ldap://example.com", "CN=a"), get_pool("ldap://example.com", "CN=a"))
+        self.assertIsNot(get_pool("ldap://example.com", "CN=a"), get_pool("ldap://example.com", "CN=b"))
+
+    def test_server_lists(self):
+        pool = get_pool(["ldap://dc1.example.com", "ldap://dc2.example.com"], "CN=a")
+
+        self.assertIsInstance(pool, MultiServerPool)
+        self.assertEqual(["ldap://dc1.example.com", "ldap://dc2.example.com"], pool.server_uri)
+        self.assertIs(pool, get_pool(("ldap://dc1.example.com", "ldap://dc2.example.com"), "CN=a"))
+        self.assertIsInstance(get_pool(["ldap://dc1.example.com"], "CN=a"), ConnectionPool)
+
+    def test_another_password_gets_its_own_pool(self):
+        old_pool = get_pool("ldap://example.com", "CN=a", "old")
+        new_pool = get_pool("ldap://example.com", "CN=a", "new")
+
+        self.assertIsNot(old_pool, new_pool)
+        self.assertFalse(old_pool.closed, "A pool other groups may still use was closed.")
+        self.assertIs(new_pool, get_pool("ldap://example.com", "CN=a", "new"))
+
+    def test_another_password_retires_the_old_pool(self):
+        directory = MockDirectory()
+        old_pool = get_pool("ldap://example.com", "CN=a", "old")
+        other_pool = get_pool("ldap://example.com", "CN=b", "old")
+
+        with directory.connection_pool().connection() as old_connection:
+            pass
+
+        old_pool._idle.append((old_connection, time.time()))
+        get_pool("ldap://example.com", "CN=a", "new")
+
+        self.assertTrue(old_pool.retired)
+        self.assertFalse(old_connection.bound, "An idle connection bound with the old password was kept.")
+        self.assertFalse(other_pool.retired, "The pool of another bind dn was retired.")
+        self.assertIs(other_pool, get_pool("ldap://example.com", "CN=b", "old"))
+
+    def test_retired_pools_discard_connections_at_checkin(self):
+        pool = MockDirectory().connection_pool()
+        connection = pool.checkout()
+        pool.retire()
+
+        pool.checkin(connection)
+
+        self.assertFalse(connection.bound)
+        self.assertEqual([], pool._idle)
@@ -0,0 +1,141 @@
+"""
+.. module:: tests.test_registry
+   :synopsis: LDAP Groups Registry Tests.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+import threading
+import time
+from unittest.case import TestCase
+
+from ldap_groups.exceptions import InvalidGroupDN
+from ldap_groups.instrumentation import record_operations
+from ldap_groups.registry import GroupRegistry
+
+from tests.mock_directory import MockDirectory, BASE_DN
+
+
+class GroupRegistryTest(TestCase):
+
+    def setUp(self):
+        self.directory = MockDirectory()
+        self.pool = self.directory.connection_pool()
+
+        self.parent_dn = self.directory.add_group("Parent")
+        self.child_dn = self.directory.add_group("Child", member_of=[self.parent_dn])
+        self.directory.add_user("alice", member_of=[self.parent_dn])
+
+        self.registry = GroupRegistry()
+
+    def tearDown(self):
+        self.registry.clear()
+
+    def get_group(self, group_dn, **kwargs):
+        kwargs.setdefault("cache", False)
+
+        return self.registry.get_group(group_dn, server_uri="mock_ad", base_dn=BASE_DN, connection_pool=self.pool,
+                                       **kwargs)
+
+    def test_groups_are_shared(self):
+        group = self.get_group(self.parent_dn)
+
+        self.assertIs(group, self.get_group(self.parent_dn.upper()))
+        self.assertIsNot(group, self.get_group(self.parent_dn, attr_list=["sAMAccountName"]))
+        self.assertIs(self.get_group(self.parent_dn, attr_list=["sAMAccountName"]),
+                      self.get_group(self.parent_dn, attr_list=["sAMAccountName"]))
+
+    def test_get_group_does_not_contact_the_server(self):
+        with record_operations() as operations:
+            self.get_group("CN=Missing," + BASE_DN)
+
+        self.assertEqual([], operations)
+
+    def test_warm(self):
+        self.registry.warm([self.parent_dn], server_uri="mock_ad", base_dn=BASE_DN, connection_pool=self.pool,
+                           cache=False)
+
+        with record_operations() as operations:
+            self.assertEqual(["alice"], [member["sAMAccountName"] for member in
+                                         self.get_group(self.parent_dn).get_member_info()])
+
+        self.assertEqual(["GROUP_MEMBER_SEARCH"], [operation.template for operation in operations],
+                         "A warmed group was validated again.")
+
+        with self.assertRaises(InvalidGroupDN):
+            self.registry.warm(["CN=Missing," + BASE_DN], server_uri="mock_ad", base_dn=BASE_DN,
+                               connection_pool=self.pool, cache=False)
+
+    def test_refresh(self):
+        group = self.get_group(self.child_dn)
+        self.assertEqual("Child", group.get_attribute("name"))
+
+        self.directory.dit[self.child_dn]["name"] = [b"Renamed"]
+        self.registry.refresh()
+
+        self.assertEqual("Renamed", group.get_attribute("name"), "Refreshing kept a stale attribute.")
+        self.assertEqual("group", group._get_group_type())
+
+        del self.directory.dit[self.child_dn]
+        self.registry.refresh()
+
+        self.assertEqual(0, len(self.registry), "A deleted group was kept.")
+        self.assertIsNot(group, self.get_group(self.child_dn))
+
+    def test_refresh_with_a_cache(self):
+        group = self.get_group(self.child_dn, cache=self.directory.cache, prefetch_attributes=["description"])
+        self.assertEqual("Child", group.get_attribute("name"))
+
+        self.directory.dit[self.child_dn]["name"] = [b"Renamed"]
+        self.directory.dit[self.child_dn]["description"] = [b"Renamed group"]
+        self.registry.refresh()
+
+        self.assertEqual("Renamed", group.get_attribute("name"), "Refreshing kept a stale cached attribute.")
+        self.assertEqual("Renamed group", group.get_attribute("description"),
+                         "Refreshing didn't read the prefetch attributes again.")
+
+    def test_background_refresh(self):
+        group = self.get_group(self.parent_dn)
+        self.registry.start_refresh(interval=0.01)
+
+        try:
+            deadline = time.time() + 5
+
+            while not group._validated and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            self.registry.stop_refresh()
+
+        self.assertTrue(group._validated, "The refresh thread never ran.")
+
+    def test_shared_group_attributes_are_thread_safe(self):
+        group = self.get_group(self.parent_dn)
+        group._ensure_valid()
+        errors = []
+        stop = threading.Event()
+
+        def read(no_cache):
+            while not stop.is_set():
+                try:
+                    for name in ["name", "objectClass", "distinguishedName"]:
+                        if group.get_attribute(name, no_cache=no_cache) is None:
+                            errors.append(name)
+                except Exception as error:
+                    errors.append(error)
+
+        threads = [threading.Thread(target=read, args=(index % 2 == 0,), daemon=True) for index in range(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for _refresh in range(50):
+            self.registry.refresh()
+            group.get_attributes()
+
+        stop.set()
+
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual([], errors)
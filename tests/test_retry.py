@@ -0,0 +1,178 @@
+"""
+.. module:: tests.test_retry
+   :synopsis: LDAP Groups Retry Policy Tests.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from unittest.case import TestCase
+
+from ldap3.core.exceptions import LDAPSocketReceiveError, LDAPUnwillingToPerformResult, LDAPInvalidFilterError
+
+from ldap_groups.instrumentation import record_operations
+from ldap_groups.retry import RetryPolicy
+
+from tests.mock_directory import MockConnectionPool, MockDirectory, BIND_DN, BIND_PASSWORD
+
+
+class FlakyConnectionPool(MockConnectionPool):
+    """
+    A mock connection pool whose nth search or modify raises a given error. Paged search cookies are valid on every
+    connection, as they are on a DC that hasn't restarted.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+        self.failures = {}
+        self._paged_sets = []
+
+    def _create_connection(self):
+        connection = super()._create_connection()
+
+        connection.strategy._paged_sets = self._paged_sets
+
+        search = connection.search
+        modify = connection.modify
+
+        def fail(operation, *args, **kwargs):
+            self.calls += 1
+            error = self.failures.pop(self.calls, None)
+
+            if error is not None and getattr(error, "after_operation", False):
+                operation(*args, **kwargs)
+
+            if error is not None:
+                raise error
+
+            return operation(*args, **kwargs)
+
+        connection.search = lambda *args, **kwargs: fail(search, *args, **kwargs)
+        connection.modify = lambda *args, **kwargs: fail(modify, *args, **kwargs)
+        return connection
+
+
+def dropped_connection(after_operation=False):
+    error = LDAPSocketReceiveError("connection reset by peer")
+    error.after_operation = after_operation
+    return error
+
+
+class RetryPolicyTest(TestCase):
+
+    def setUp(self):
+        self.delays = []
+        self.policy = RetryPolicy(max_attempts=3, backoff=1, jitter=0.5, sleep=self.delays.append)
+
+    def test_delay(self):
+        for attempt, base in [(1, 1), (2, 2), (3, 4)]:
+            self.assertTrue(base * 0.5 <= self.policy.delay(attempt) <= base * 1.5)
+
+        self.assertEqual(30, RetryPolicy(backoff=1, jitter=0).delay(10))
+
+    def test_call(self):
+        errors = [dropped_connection(), dropped_connection()]
+
+        def flaky():
+            if errors:
+                raise errors.pop()
+
+            return "done"
+
+        self.assertEqual("done", self.policy.call(flaky, "flaky"))
+        self.assertEqual(2, len(self.delays))
+
+    def test_call_gives_up(self):
+        def broken():
+            raise dropped_connection()
+
+        with self.assertRaises(LDAPSocketReceiveError):
+            self.policy.call(broken, "broken")
+
+        self.assertEqual(2, len(self.delays))
+
+    def test_errors_that_are_not_retryable(self):
+        def broken():
+            raise LDAPInvalidFilterError("bad filter")
+
+        with self.assertRaises(LDAPInvalidFilterError):
+            self.policy.call(broken, "broken")
+
+        self.assertEqual([], self.delays)
+
+
+class ADGroupRetryTest(TestCase):
+
+    def setUp(self):
+        self.directory = MockDirectory()
+        self.pool = FlakyConnectionPool(self.directory.server, BIND_DN, BIND_PASSWORD, directory=self.directory,
+                                        connection_options={"client_strategy": "MOCK_SYNC"})
+
+        self.group_dn = self.directory.add_group("Parent")
+        self.usernames = ["user{index}".format(index=index) for index in range(5)]
+
+        for username in self.usernames:
+            self.directory.add_user(username, member_of=[self.group_dn])
+
+        self.group = self.directory.group(self.group_dn, connection_pool=self.pool,
+                                          retry_policy=RetryPolicy(sleep=lambda delay: None))
+        self.pool.calls = 0
+
+    def test_search_is_retried_on_a_new_connection(self):
+        self.pool.failures[1] = dropped_connection()
+
+        self.assertEqual("Parent", self.group.get_attribute("name", no_cache=True))
+        self.assertEqual(1, len(self.pool._idle), "The broken connection was handed back to the pool.")
+        self.assertTrue(self.pool._idle[0][0].bound)
+
+    def test_paged_search_resumes_from_its_cookie(self):
+        self.pool.failures[2] = dropped_connection()
+
+        with record_operations() as operations:
+            members = self.group.get_member_info(page_size=2)
+
+        self.assertEqual(self.usernames, sorted(member["sAMAccountName"] for member in members))
+        self.assertEqual(4, operations[0].round_trips, "The search started over instead of resuming.")
+
+    def test_paged_search_starts_over_when_its_cookie_is_rejected(self):
+        self.pool.failures[2] = dropped_connection()
+        self.pool.failures[3] = LDAPUnwillingToPerformResult("invalid cookie")
+
+        with record_operations() as operations:
+            members = self.group.get_member_info(page_size=2)
+
+        self.assertEqual(self.usernames, sorted(member["sAMAccountName"] for member in members),
+                         "Entries were lost or yielded twice when the search started over.")
+        self.assertEqual(6, operations[0].round_trips)
+
+    def test_modification_applied_before_the_connection_dropped(self):
+        self.directory.add_user("erin")
+        self.group._get_user_dn("erin")
+        self.pool.calls = 0
+        self.pool.failures[1] = dropped_connection(after_operation=True)
+
+        self.group.add_member("erin")
+
+        self.assertIn("erin", [member["sAMAccountName"] for member in self.group.get_member_info()])
+
+    def test_multi_value_modification_is_split_after_a_retry(self):
+        self.directory.add_user("erin")
+        self.group.resolve_user_dns(["erin", "user0"])
+        self.pool.calls = 0
+        self.pool.failures[1] = dropped_connection()
+
+        result = self.group.add_members(["erin", "user0"])
+
+        self.assertEqual(["erin"], result.modified)
+        self.assertEqual(["user0"], result.unchanged)
+        self.assertIn("erin", [member["sAMAccountName"] for member in self.group.get_member_info()])
+
+    def test_retries_disabled(self):
+        group = self.directory.group(self.group_dn, connection_pool=self.pool, retry_policy=False)
+        self.pool.calls = 0
+        self.pool.failures[1] = dropped_connection()
+
+        with self.assertRaises(LDAPSocketReceiveError):
+            group.get_attribute("name", no_cache=True)
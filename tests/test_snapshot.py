@@ -0,0 +1,85 @@
+"""
+.. module:: tests.test_snapshot
+   :synopsis: LDAP Groups Snapshot Tests.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+import os
+import shutil
+import tempfile
+from unittest.case import TestCase
+
+from ldap_groups.exceptions import InvalidGroupDN
+from ldap_groups.instrumentation import record_operations
+from ldap_groups.snapshot import export_snapshot, Snapshot
+
+from tests.mock_directory import MockDirectory
+
+
+class SnapshotTest(TestCase):
+
+    def setUp(self):
+        self.directory = MockDirectory()
+
+        self.groups_ou = self.directory.add_ou("Groups")
+        self.parent_dn = self.directory.add_group("Parent", self.groups_ou)
+        self.child_dn = self.directory.add_group("Child", self.groups_ou, member_of=[self.parent_dn])
+        self.grandchild_dn = self.directory.add_group("Grandchild", self.groups_ou, member_of=[self.child_dn])
+        self.directory.add_membership(self.grandchild_dn, self.parent_dn)
+
+        self.directory.add_user("alice", member_of=[self.parent_dn])
+        self.directory.add_user("bob", member_of=[self.child_dn, self.grandchild_dn])
+        self.directory.add_user("carol", member_of=[self.grandchild_dn])
+        self.directory.add_user("dave")
+
+        self.ou = self.directory.group(self.groups_ou)
+
+        self.temporary_directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.temporary_directory, "groups.sqlite3")
+
+        with record_operations() as operations:
+            self.snapshot = export_snapshot(self.ou, self.path, page_size=2)
+
+        self.crawl_operations = operations
+
+    def tearDown(self):
+        self.snapshot.close()
+        shutil.rmtree(self.temporary_directory)
+
+    def test_crawl_takes_two_searches(self):
+        self.assertEqual(["SNAPSHOT_GROUP_SEARCH", "SNAPSHOT_USER_SEARCH"],
+                         [operation.template for operation in self.crawl_operations])
+
+    def test_matches_live_directory(self):
+        for group_dn in [self.groups_ou, self.parent_dn, self.child_dn]:
+            live_group = self.directory.group(group_dn)
+            snapshot_group = self.snapshot.group(group_dn)
+
+            self.assertEqual(sorted(member["sAMAccountName"] for member in live_group.get_member_info()),
+                             sorted(member["sAMAccountName"] for member in snapshot_group.get_member_info()))
+            self.assertEqual(sorted(member["sAMAccountName"] for member in live_group.get_tree_members()),
+                             sorted(member["sAMAccountName"] for member in snapshot_group.get_tree_members()))
+
+            # The mock server's LEVEL searches include the base entry, so an OU is listed as its own child
+            self.assertEqual(sorted(child.group_dn for child in live_group.get_children() if child.group_dn != group_dn),
+                             sorted(child.group_dn for child in snapshot_group.get_children()))
+
+    def test_traversal(self):
+        parent = self.snapshot.group(self.parent_dn)
+
+        self.assertEqual(self.child_dn, parent.child("child").group_dn)
+        self.assertIsNone(parent.child("Missing"))
+        self.assertEqual("group", parent.get_attribute("objectClass")[-1])
+        self.assertEqual(self.groups_ou, parent.parent().group_dn)
+        self.assertEqual(3, len(self.snapshot.group(self.groups_ou).get_descendants()))
+
+    def test_unknown_group(self):
+        with self.assertRaises(InvalidGroupDN):
+            self.snapshot.group("CN=Missing," + self.groups_ou).get_member_info()
+
+    def test_reopen(self):
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(self.groups_ou, snapshot.search_base_dn)
+            self.assertEqual(1, len(snapshot.group(self.parent_dn).get_member_info()))
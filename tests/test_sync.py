@@ -0,0 +1,100 @@
+"""
+.. module:: tests.test_sync
+   :synopsis: LDAP Groups Directory Sync Tests.
+
+.. moduleauthor:: Alex Kavanaugh (@kavdev)
+
+"""
+
+from unittest.case import TestCase
+
+from ldap_groups.exceptions import ImproperlyConfigured
+from ldap_groups.results import ChangeSet
+from ldap_groups.sync import DirectorySync, DIR_SYNC
+
+from tests.mock_directory import MockDirectory, BASE_DN
+
+
+class DirectorySyncTest(TestCase):
+
+    def setUp(self):
+        self.directory = MockDirectory()
+        self.groups_ou = self.directory.add_ou("Groups")
+        self.staff_dn = self.directory.add_group("Staff", self.groups_ou)
+        self.faculty_dn = self.directory.add_group("Faculty", self.groups_ou)
+
+        self.alice_dn = self.directory.add_user("alice", member_of=[self.staff_dn])
+        self.bob_dn = self.directory.add_user("bob", member_of=[self.faculty_dn])
+
+        self.group = self.directory.group(self.staff_dn)
+        self.sync = DirectorySync(self.group)
+
+    def test_first_pull_returns_everything(self):
+        changes = self.sync.pull()
+
+        self.assertTrue(changes.full)
+        self.assertEqual({self.staff_dn, self.faculty_dn}, set(changes.groups))
+        self.assertEqual({self.alice_dn, self.bob_dn}, set(changes.users))
+        self.assertEqual([self.alice_dn], changes.members[self.staff_dn])
+        self.assertEqual("alice", changes.users[self.alice_dn]["sAMAccountName"])
+
+    def test_pull_returns_only_changes(self):
+        cookie = self.sync.pull().cookie
+
+        self.group.add_member("bob")
+        carol_dn = self.directory.add_user("carol")
+        changes = self.sync.pull(cookie)
+
+        self.assertFalse(changes.full)
+        self.assertEqual([self.staff_dn], list(changes.groups))
+        self.assertEqual([carol_dn], list(changes.users))
+        self.assertEqual({self.alice_dn, self.bob_dn}, set(changes.members[self.staff_dn]))
+
+        changes = self.sync.pull(changes.cookie)
+        self.assertEqual(({}, {}), (changes.groups, changes.users), "Unchanged entries were pulled again.")
+
+    def test_cookie_for_another_search_base(self):
+        cookie = self.sync.pull().cookie
+
+        changes = DirectorySync(self.group, search_base_dn=self.groups_ou).pull(cookie)
+
+        self.assertTrue(changes.full)
+        self.assertEqual({self.staff_dn, self.faculty_dn}, set(changes.groups))
+        self.assertEqual({}, changes.users)
+
+    def test_deleted_entries_within_the_search_base(self):
+        sync = DirectorySync(self.group, search_base_dn=self.groups_ou)
+        cookie = sync.pull().cookie
+
+        for name, object_class, parent_dn in [("Retired", "group", self.groups_ou), ("dave", "user", BASE_DN)]:
+            self.directory._add("CN={name}\\0ADEL:1234,CN=Deleted Objects,{base}".format(name=name, base=BASE_DN), {
+                "objectClass": ["top", object_class], "name": name + "\nDEL:1234", "isDeleted": "TRUE",
+                "lastKnownParent": parent_dn,
+            })
+
+        changes = sync.pull(cookie)
+
+        self.assertEqual(["CN=Retired," + self.groups_ou], changes.deleted)
+
+    def test_invalid_cookie(self):
+        with self.assertLogs("ldap_groups.sync", level="WARNING"):
+            self.assertTrue(self.sync.pull("not a cookie").full)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ImproperlyConfigured):
+            DirectorySync(self.group, strategy="polling")
+
+    def test_dir_sync_membership_deltas(self):
+        sync = DirectorySync(self.group, search_base_dn="DC=example,DC=com", strategy=DIR_SYNC)
+        changes = ChangeSet()
+
+        sync._add_dir_sync_entry(changes, {"dn": "<GUID=1234>;<SID=5678>;" + self.staff_dn, "attributes": {
+            "member;range=1-1": [self.bob_dn], "member;range=0-0": [self.alice_dn]
+        }})
+        sync._add_dir_sync_entry(changes, {"dn": "<GUID=abcd>;CN=carol\nDEL:abcd,CN=Deleted Objects,DC=example,DC=com",
+                                           "attributes": {"isDeleted": True, "name": ["carol\nDEL:abcd"],
+                                                          "lastKnownParent": ["DC=example,DC=com"]}})
+
+        self.assertEqual({self.staff_dn: [self.bob_dn]}, changes.members_added)
+        self.assertEqual({self.staff_dn: [self.alice_dn]}, changes.members_removed)
+        self.assertEqual(["CN=carol,DC=example,DC=com"], changes.deleted)
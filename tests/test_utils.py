@@ -8,7 +8,7 @@
 
 from unittest.case import TestCase
 
-from ldap_groups.utils import escape_query
+from ldap_groups.utils import escape_query, chunked, as_list, build_filter
 
 
 class EscapeQueryTest(TestCase):
@@ -53,3 +53,42 @@ class EscapeQueryTest(TestCase):
         input_string = "Hello World! I have no problem characters in me!"
 
         self.assertEqual(input_string, escape_query(input_string), "Regular characters were unexpectedly escaped.")
+
+
+class ChunkedTest(TestCase):
+
+    def test_even_chunks(self):
+        self.assertEqual([[1, 2], [3, 4]], list(chunked([1, 2, 3, 4], 2)))
+
+    def test_remainder(self):
+        self.assertEqual([[1, 2, 3], [4]], list(chunked(iter([1, 2, 3, 4]), 3)))
+
+    def test_empty(self):
+        self.assertEqual([], list(chunked([], 3)))
+
+
+class AsListTest(TestCase):
+
+    def test_single_value(self):
+        self.assertEqual(["group"], as_list("group"))
+
+    def test_list(self):
+        self.assertEqual(["top", "group"], as_list(["top", "group"]))
+
+    def test_none(self):
+        self.assertEqual([], as_list(None))
+
+
+class BuildFilterTest(TestCase):
+
+    def test_dictionary(self):
+        self.assertEqual("(department=Sales)", build_filter({"department": "Sales"}))
+        self.assertEqual("(&(department=Sales)(|(title=A)(title=B)))",
+                         build_filter({"department": "Sales", "title": ["A", "B"]}))
+
+    def test_values_are_escaped(self):
+        self.assertEqual(r"(department=\2A\29\28objectClass=\2A)", build_filter({"department": "*)(objectClass=*"}))
+
+    def test_raw_filter(self):
+        self.assertEqual("(department=Sales)", build_filter("department=Sales"))
+        self.assertEqual("(!(department=Sales))", build_filter("(!(department=Sales))"))